@@ -20,22 +20,175 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 # Finally import the local modules
-from gdelt_processor import fetch_gdelt_data
-from icews_adapter import adapt_gdelt_to_icews
+from gdelt_processor import fetch_gdelt_data, get_latest_slice_id
+from icews_adapter import adapt_gdelt_to_icews, compact_icews_frame
+from gdelt_schema import ICEWS_SOURCE_COLUMNS
+from slice_cache import SliceCache
+from event_store import EventStore
+from shared_cache import SingleFlightCache
+from downloader import slice_time
+from rolling_window import RollingWindow, WINDOW_HOURS
+from ingestor import open_dedup_index, store_new_events
+from rollup import summarise
+from event_frame import shared_frame
+from spatial import DEFAULT_POINT_THRESHOLD, DEFAULT_MAX_OPTIONS
+from table_renderer import TableRenderer, TABLE_COLUMNS, PAGE_SIZES, DEFAULT_PAGE_SIZE, column_label
+from exporter import ExportCache, EXPORT_FORMATS, export_file_name
+import metrics
+
+# A published snapshot older than this means the ingestor is not running
+PUBLISHED_MAX_AGE = datetime.timedelta(minutes=45)
+
+# Local cache of downloaded slices, shared by every session of this process
+@st.cache_resource
+def get_slice_cache():
+    return SliceCache()
+
+# Persistent store of adapted events
+@st.cache_resource
+def get_event_store():
+    return EventStore()
+
+# Event IDs already written to the store, so refreshes never store an event twice
+@st.cache_resource
+def get_dedup_index():
+    return open_dedup_index(get_event_store())
+
+# Adapted events per GDELT slice, shared by every session of this process so
+# simultaneous refreshes of the same slice trigger a single fetch
+@st.cache_resource
+def get_shared_events():
+    return SingleFlightCache()
+
+# Rolling windows of adapted slices, one per window length, shared by every session
+@st.cache_resource
+def get_rolling_window(hours):
+    return RollingWindow(hours, cache=get_slice_cache())
+
+# JSON log and Prometheus endpoint from GDELT_METRICS_LOG / GDELT_METRICS_PORT, set up once per process
+@st.cache_resource
+def start_metrics():
+    metrics.configure_from_env()
+    return True
+
+start_metrics()
+
+# Time windows offered in the sidebar; None is the latest 15-minute slice
+WINDOW_OPTIONS = {"Last 15 Minutes": None}
+WINDOW_OPTIONS.update({f"Last {hours} Hours": hours for hours in WINDOW_HOURS})
+
+def load_published_events():
+    """
+    Reads the latest snapshot published by ingestor.py, if it is recent.
+    
+    Returns:
+        tuple: (events, slice ID), or (None, None) when no fresh snapshot exists
+    """
+    store = get_event_store()
+    meta = store.latest_meta()
+    published = slice_time(meta['slice_id']) if meta else None
+    if published is None or datetime.datetime.utcnow() - published > PUBLISHED_MAX_AGE:
+        return None, None
+    
+    key = ('published', meta['slice_id'])
+    try:
+        # Held in the compact layout, like every frame the app keeps in memory
+        return get_shared_events().get_or_load(key, lambda: compact_icews_frame(store.read_latest())), \
+            meta['slice_id']
+    except Exception as e:
+        print(f"Error reading published events: {e}")
+        return None, None
+
+def load_latest_events():
+    """
+    Returns the latest slice in ICEWS format, sharing the result across sessions.
+    
+    Reads the ingestor's published snapshot when there is a fresh one and
+    only fetches and adapts inline when no ingestor is running.
+    """
+    published, _ = load_published_events()
+    if published is not None and not published.empty:
+        return published
+    
+    slice_key = get_latest_slice_id()
+    
+    def load():
+        gdelt_data = fetch_gdelt_data(columns=ICEWS_SOURCE_COLUMNS, cache=get_slice_cache())
+        if gdelt_data is None or gdelt_data.empty:
+            return None
+        icews_data = adapt_gdelt_to_icews(gdelt_data)
+        # Parts are named by slice ID, as the ingestor names them; without
+        # the listing there is no ID to file the slice under
+        if slice_key is not None:
+            try:
+                store_new_events(get_event_store(), icews_data, slice_key, dedup=get_dedup_index())
+            except Exception as e:
+                print(f"Error writing to event store: {e}")
+        # The store keeps the regular layout; the shared copy is compact
+        return compact_icews_frame(icews_data)
+    
+    if slice_key is None:
+        # Listing unavailable: load without sharing rather than fail outright
+        return load()
+    return get_shared_events().get_or_load(slice_key, load)
+
+def show_performance_panel():
+    """Shows the stage timings and counters collected so far in this process."""
+    data = metrics.snapshot()
+    if not data['stages']:
+        st.caption("No stages recorded yet. Refresh the data to measure the pipeline.")
+        return
+    stages = pd.DataFrame.from_dict(data['stages'], orient='index')
+    stages['mean_seconds'] = stages['seconds_sum'] / stages['calls']
+    st.dataframe(stages[['calls', 'seconds_last', 'mean_seconds', 'seconds_max', 'rows_in', 'rows_out']]
+                 .rename(columns={'seconds_last': 'last s', 'mean_seconds': 'mean s', 'seconds_max': 'max s'})
+                 .round(4))
+    for name, labels, value in sorted(data['counters'], key=lambda item: (item[0], sorted(item[1].items()))):
+        label = ", ".join(f"{key}={value}" for key, value in labels.items())
+        st.markdown(f"**{name}**{f' ({label})' if label else ''}: {value:,}")
+    if st.button("Reset metrics"):
+        metrics.reset()
+
+def show_events(events, rollup=None):
+    """
+    Makes events the session's data, together with the rollup cube the charts read.
+    
+    The frame is never copied: sessions showing the same frame share it and
+    the indexes built over it, and the tabs work on views of it.
+    """
+    st.session_state.data = events
+    st.session_state.events = shared_frame(events)
+    st.session_state.rollup = rollup if rollup is not None else st.session_state.events.rollup
+    st.session_state.last_update = datetime.datetime.now()
+    # Cached pages and exports belong to the previous data
+    st.session_state.table_renderer.clear()
+    st.session_state.exports.clear()
 
 # Initialize session state variables if they don't exist
 if 'data' not in st.session_state:
     st.session_state.data = None
+if 'rollup' not in st.session_state:
+    st.session_state.rollup = None
 if 'last_update' not in st.session_state:
     st.session_state.last_update = None
 if 'selected_event' not in st.session_state:
     st.session_state.selected_event = None
+if 'table_renderer' not in st.session_state:
+    st.session_state.table_renderer = TableRenderer()
+if 'exports' not in st.session_state:
+    st.session_state.exports = ExportCache()
+
+# Show the ingestor's latest snapshot on first load; reading it takes no download
+if st.session_state.data is None:
+    published, published_id = load_published_events()
+    if published is not None and not published.empty:
+        show_events(published)
 
 # Title and description
 st.title("GDELT Data Visualization with ICEWS Explorer")
 st.markdown("""
 This application demonstrates the use of ICEWS Explorer with GDELT data.
-- Data is fetched from GDELT for the last 15 minutes
+- Data is fetched from GDELT for the last 15 minutes, or a rolling window of several hours
 - The data is processed to match ICEWS format
 - Visualizations are generated using ICEWS Explorer-inspired components
 """)
@@ -44,22 +197,61 @@ This application demonstrates the use of ICEWS Explorer with GDELT data.
 with st.sidebar:
     st.header("Controls")
 
+    # Longer windows keep earlier slices in memory and only fetch the new ones
+    window_label = st.selectbox("Time window", list(WINDOW_OPTIONS))
+    window_hours = WINDOW_OPTIONS[window_label]
+    
     # Refresh button to get the latest data
-    if st.button("🔄 Refresh Data (Last 15 Minutes)"):
+    if st.button(f"🔄 Refresh Data ({window_label})"):
         with st.spinner("Fetching latest GDELT data..."):
-            gdelt_data = fetch_gdelt_data()
-            if gdelt_data is not None and not gdelt_data.empty:
-                # Adapt GDELT to ICEWS format
-                st.session_state.data = adapt_gdelt_to_icews(gdelt_data)
-                st.session_state.last_update = datetime.datetime.now()
+            # Shared, read-only frame in ICEWS format
+            icews_rollup = None
+            if window_hours is None:
+                icews_data = load_latest_events()
+            else:
+                window = get_rolling_window(window_hours)
+                try:
+                    window.refresh()
+                except Exception as e:
+                    print(f"Error refreshing rolling window: {e}")
+                icews_data = window.frame()
+                icews_rollup = window.rollup()
+            if icews_data is not None and not icews_data.empty:
+                show_events(icews_data, icews_rollup)
                 st.success("Data successfully loaded!")
             else:
-                st.error("No GDELT data available for the last 15 minutes. Please try again later.")
+                st.error(f"No GDELT data available for the {window_label.lower()}. Please try again later.")
+    
+    # Reload previously ingested events without downloading anything
+    with st.expander("Stored History"):
+        history_days = st.number_input("Days of history", min_value=1, max_value=90, value=1)
+        if st.button("Load from Event Store"):
+            with st.spinner("Reading stored events..."):
+                since = datetime.datetime.utcnow() - datetime.timedelta(days=int(history_days))
+                try:
+                    stored = compact_icews_frame(get_event_store().read(start=since))
+                except Exception as e:
+                    stored = None
+                    st.error(f"Could not read the event store: {e}")
+                if stored is not None and not stored.empty:
+                    show_events(stored)
+                    st.success(f"Loaded {len(stored)} stored events")
+                elif stored is not None:
+                    st.warning("No stored events in that time range. Run backfill.py with --format store to add history.")
 
     # Display last update time if available
     if st.session_state.last_update:
         st.info(f"Last updated: {st.session_state.last_update.strftime('%Y-%m-%d %H:%M:%S')}")
     
+    # Collection is process-wide, so the switch shows the current state and
+    # only changes it when clicked. The panel is filled in at the end of the
+    # run so that this run's render times are included.
+    st.session_state.performance_metrics = metrics.enabled()
+    st.toggle("Performance metrics", key='performance_metrics',
+              on_change=lambda: metrics.enable(st.session_state.performance_metrics),
+              help="Time each pipeline and render stage. Applies to every session of this app.")
+    performance_panel = st.expander("Performance") if metrics.enabled() else None
+    
     # Add information about ICEWS Explorer
     st.markdown("---")
     st.markdown("### About")
@@ -76,11 +268,17 @@ if st.session_state.data is not None and not st.session_state.data.empty:
     tab1, tab2, tab3 = st.tabs(["Event Analysis", "Geographic View", "Data Explorer"])
     
     with tab1:
+        render_timer = metrics.stage('render_event_analysis', rows_in=len(st.session_state.data))
         st.subheader("Event Analysis")
         
+        # Charts read the rollup cube, so their cost follows the number of
+        # buckets and event types rather than the number of events
+        rollup = st.session_state.rollup
+        
         # Event types distribution
-        event_counts = st.session_state.data['event_type'].value_counts().reset_index()
-        event_counts.columns = ['Event Type', 'Count']
+        event_counts = summarise(rollup, 'event_root_type').rename(columns={
+            'event_root_type': 'Event Type', 'count': 'Count',
+            'avg_intensity': 'Avg Goldstein', 'avg_tone': 'Avg Tone'})
         
         fig = px.bar(
             event_counts, 
@@ -88,18 +286,17 @@ if st.session_state.data is not None and not st.session_state.data.empty:
             y='Count',
             title="Distribution of Event Types",
             color='Count',
-            color_continuous_scale='Viridis'
+            color_continuous_scale='Viridis',
+            hover_data=['Avg Goldstein', 'Avg Tone']
         )
         st.plotly_chart(fig, use_container_width=True)
         
         # Event timeline
         st.subheader("Event Timeline")
-        timeline_data = st.session_state.data.copy()
-        timeline_data['hour'] = timeline_data['date'].dt.hour
-        timeline_data['minute'] = timeline_data['date'].dt.minute
-        
-        timeline_counts = timeline_data.groupby(['hour', 'minute']).size().reset_index(name='count')
-        timeline_counts['time_label'] = timeline_counts.apply(lambda x: f"{int(x['hour']):02d}:{int(x['minute']):02d}", axis=1)
+        timeline_counts = summarise(rollup, 'bucket').sort_values('bucket')
+        multi_day = timeline_counts['bucket'].dt.normalize().nunique() > 1
+        timeline_counts['time_label'] = timeline_counts['bucket'].dt.strftime(
+            '%m-%d %H:%M' if multi_day else '%H:%M')
         
         fig = px.line(
             timeline_counts, 
@@ -114,16 +311,7 @@ if st.session_state.data is not None and not st.session_state.data.empty:
         # Event intensity analysis
         st.subheader("Event Intensity Analysis")
         if 'intensity' in st.session_state.data.columns:
-            intensity_data = st.session_state.data.dropna(subset=['intensity']).copy()
-            
-            # Bin intensity into categories
-            intensity_data['intensity_category'] = pd.cut(
-                intensity_data['intensity'],
-                bins=[-10, -5, 0, 5, 10],
-                labels=['Very Negative', 'Negative', 'Positive', 'Very Positive']
-            )
-            
-            intensity_counts = intensity_data['intensity_category'].value_counts().reset_index()
+            intensity_counts = summarise(rollup, 'intensity_category')[['intensity_category', 'count']]
             intensity_counts.columns = ['Intensity', 'Count']
             
             fig = px.pie(
@@ -134,48 +322,101 @@ if st.session_state.data is not None and not st.session_state.data.empty:
                 color_discrete_sequence=px.colors.sequential.Viridis
             )
             st.plotly_chart(fig, use_container_width=True)
+        
+        # Mention aggregates joined by ingestor.py --enrich, when present
+        if 'mention_count' in st.session_state.data.columns:
+            st.subheader("Most Reported Events")
+            reported = st.session_state.data.nlargest(10, 'mention_count')[
+                ['date', 'event_type', 'source_name', 'target_name', 'country',
+                 'mention_count', 'mention_sources', 'first_mention_delay']]
+            reported.columns = ['Date', 'Event Type', 'Source', 'Target', 'Country',
+                                'Mentions', 'Sources', 'First Mention (min)']
+            st.dataframe(reported, hide_index=True, use_container_width=True)
+        render_timer.stop()
     
     with tab2:
+        render_timer = metrics.stage('render_geographic', rows_in=len(st.session_state.data))
         st.subheader("Geographic Distribution")
         
-        # Map of events
-        map_data = st.session_state.data.dropna(subset=['latitude', 'longitude']).copy()
+        # Map of events: a view of the events with coordinates, no rows are copied
+        events = st.session_state.events
+        spatial = events.spatial
+        located = events.located()
         
-        if not map_data.empty:
+        if not located.empty:
             # Add a slider to filter by event intensity if available
-            if 'intensity' in map_data.columns:
+            intensity_range = None
+            if 'intensity' in located.columns:
+                intensity = spatial.intensity
+                lowest, highest = float(np.nanmin(intensity)), float(np.nanmax(intensity))
                 intensity_min, intensity_max = st.slider(
                     "Filter by Event Intensity", 
-                    float(map_data['intensity'].min()), 
-                    float(map_data['intensity'].max()),
-                    (float(map_data['intensity'].min()), float(map_data['intensity'].max()))
+                    lowest, 
+                    highest,
+                    (lowest, highest)
                 )
-                map_data = map_data[(map_data['intensity'] >= intensity_min) & (map_data['intensity'] <= intensity_max)]
+                intensity_range = (intensity_min, intensity_max)
+                map_mask = (intensity >= intensity_min) & (intensity <= intensity_max)
+            else:
+                map_mask = None
+            map_data = located.where(map_mask)
             
-            # Create a new column for displaying "Source Link" instead of the full URL
-            map_data['source_link'] = "Source Link"
+            # Above the threshold the map shows grid cells instead of single events
+            with st.expander("Map Settings"):
+                point_threshold = st.number_input("Show individual events up to", min_value=100,
+                                                  max_value=1000000, value=DEFAULT_POINT_THRESHOLD, step=500)
+            aggregated = len(map_data) > point_threshold
             
-            # Create the scatter_geo plot 
-            fig = px.scatter_geo(
-                map_data,
-                lat='latitude',
-                lon='longitude',
-                color='event_type',
-                hover_name='event_type',
-                hover_data={
-                    'source_name': True,
-                    'target_name': True, 
-                    'intensity': True, 
-                    'location': True,
-                    'source_link': True,  # Display "Source Link" text
-                    'source_url': False,  # Hide the actual URL
-                    'latitude': False,    # Hide latitude
-                    'longitude': False    # Hide longitude
-                },
-                custom_data=['event_id', 'source_url'],  # Keep source_url in custom_data for reference
-                projection='natural earth',
-                title="Geographic Distribution of Events"
-            )
+            figure_timer = metrics.stage('map_figure', rows_in=len(map_data))
+            if aggregated:
+                cell_size = spatial.choose_resolution(map_mask)
+                cells = spatial.aggregate(cell_size, map_mask, mask_key=intensity_range)
+                fig = px.scatter_geo(
+                    cells,
+                    lat='latitude',
+                    lon='longitude',
+                    size='count',
+                    color='event_root_type',
+                    hover_name='event_type',
+                    hover_data={
+                        'count': True,
+                        'intensity': ':.2f',
+                        'event_root_type': False,
+                        'latitude': False,
+                        'longitude': False
+                    },
+                    labels={'count': 'Events', 'intensity': 'Mean intensity', 'event_type': 'Most frequent event'},
+                    projection='natural earth',
+                    title="Geographic Distribution of Events"
+                )
+            else:
+                # Only the plotted columns are materialised, plus one for
+                # displaying "Source Link" instead of the full URL
+                points = map_data.select(['latitude', 'longitude', 'event_root_type', 'event_type',
+                                          'source_name', 'target_name', 'intensity', 'location',
+                                          'event_id', 'source_url']).assign(source_link="Source Link")
+                
+                # Create the scatter_geo plot 
+                fig = px.scatter_geo(
+                    points,
+                    lat='latitude',
+                    lon='longitude',
+                    color='event_root_type',
+                    hover_name='event_type',
+                    hover_data={
+                        'source_name': True,
+                        'target_name': True, 
+                        'intensity': True, 
+                        'location': True,
+                        'source_link': True,  # Display "Source Link" text
+                        'source_url': False,  # Hide the actual URL
+                        'latitude': False,    # Hide latitude
+                        'longitude': False    # Hide longitude
+                    },
+                    custom_data=['event_id', 'source_url'],  # Keep source_url in custom_data for reference
+                    projection='natural earth',
+                    title="Geographic Distribution of Events"
+                )
             
             # Place legend horizontally below the map
             fig.update_layout(
@@ -210,35 +451,54 @@ if st.session_state.data is not None and not st.session_state.data.empty:
             )
             
             # Adjust marker size for better visibility
-            fig.update_traces(
-                marker=dict(size=10, opacity=0.7, line=dict(width=1, color='white'))
-            )
+            if aggregated:
+                fig.update_traces(marker=dict(opacity=0.7, line=dict(width=1, color='white')))
+            else:
+                fig.update_traces(
+                    marker=dict(size=10, opacity=0.7, line=dict(width=1, color='white'))
+                )
+            
+            figure_timer.stop(rows_out=len(cells) if aggregated else len(map_data))
             
             # Display the map
             st.plotly_chart(fig, use_container_width=True)
+            if aggregated:
+                st.caption(f"{len(map_data)} events shown as {len(cells)} grid cells of {cell_size:g}°. "
+                           "Marker size is the number of events; hover for the most frequent event type.")
             
             # Simplified approach: Use a selection widget to choose coordinates
             st.subheader("Select a Location to View Source URL")
             
-            # Create location options with more descriptive labels
-            location_options = []
-            for i, row in map_data.reset_index().iterrows():
-                # Create a descriptive label
-                label = f"{row.event_type}: {row.source_name} → {row.target_name} in {row.location}"
-                if len(label) > 80:  # Truncate if too long
-                    label = label[:77] + "..."
-                location_options.append({"label": label, "value": i})
+            # On the aggregated map an area is picked first and then an event
+            # in it, so the option lists stay bounded like the map itself
+            pick_mask = map_mask
+            if aggregated:
+                area_options = (cells['event_type'].astype(str) + " near "
+                                + cells['latitude'].round(1).astype(str) + ", "
+                                + cells['longitude'].round(1).astype(str) + " ("
+                                + cells['count'].astype(str) + " events)").tolist()
+                selected_area = st.selectbox("Choose an area:", options=range(len(area_options)),
+                                             format_func=lambda x: area_options[x])
+                pick_mask = spatial.cell_mask(cell_size, cells.at[selected_area, 'cell'], map_mask)
+            pick_positions = np.arange(len(located)) if pick_mask is None else np.flatnonzero(pick_mask)
+            if len(pick_positions) > DEFAULT_MAX_OPTIONS:
+                st.caption(f"Listing the first {DEFAULT_MAX_OPTIONS} of {len(pick_positions)} events"
+                           f"{' in this area' if aggregated else ''}.")
+                pick_positions = pick_positions[:DEFAULT_MAX_OPTIONS]
+            
+            # Create location options with more descriptive labels (built once per frame)
+            location_options = events.location_labels()[pick_positions].tolist()
             
             # Create selectbox with descriptive format function
             selected_location_index = st.selectbox(
                 "Choose an event location:",
                 options=range(len(location_options)),
-                format_func=lambda x: location_options[x]["label"] if x < len(location_options) else "Select a location"
+                format_func=lambda x: location_options[x] if x < len(location_options) else "Select a location"
             )
             
             # Display the selected location's URL in a highlighted box
-            if selected_location_index is not None and selected_location_index < len(map_data):
-                selected_location = map_data.iloc[selected_location_index]
+            if selected_location_index is not None and selected_location_index < len(pick_positions):
+                selected_location = located.row(int(pick_positions[selected_location_index]))
                 
                 # Display event details first
                 st.markdown("### Selected Event Details")
@@ -291,7 +551,7 @@ if st.session_state.data is not None and not st.session_state.data.empty:
             
             # Country distribution
             st.subheader("Top Countries")
-            country_counts = map_data['country'].value_counts().head(10).reset_index()
+            country_counts = map_data.column('country').value_counts().head(10).reset_index()
             country_counts.columns = ['Country', 'Count']
             
             fig = px.bar(
@@ -305,111 +565,122 @@ if st.session_state.data is not None and not st.session_state.data.empty:
             st.plotly_chart(fig, use_container_width=True)
         else:
             st.info("Geographic data not available for mapping")
+        render_timer.stop()
     
     with tab3:
+        render_timer = metrics.stage('render_data_explorer', rows_in=len(st.session_state.data))
         st.subheader("Data Explorer")
         
-        # Filters
+        # Filters; option lists and matching rows come from the filter index built at load time
+        filter_index = st.session_state.events.filter_index
         col1, col2 = st.columns(2)
         with col1:
             selected_event_types = st.multiselect(
                 "Filter by Event Type",
-                options=sorted(st.session_state.data['event_type'].unique()),
+                options=filter_index.options('event_type'),
                 default=[]
             )
         
         with col2:
             selected_countries = st.multiselect(
                 "Filter by Country",
-                options=sorted(st.session_state.data['country'].unique()),
+                options=filter_index.options('country'),
+                default=[]
+            )
+        
+        with st.expander("More Filters"):
+            selected_quad_classes = st.multiselect(
+                "Filter by Quad Class",
+                options=filter_index.options('quad_class'),
+                default=[]
+            )
+            selected_source_countries = st.multiselect(
+                "Filter by Source Country",
+                options=filter_index.options('source_country'),
+                default=[]
+            )
+            selected_target_countries = st.multiselect(
+                "Filter by Target Country",
+                options=filter_index.options('target_country'),
                 default=[]
             )
         
-        # Apply filters
-        filtered_data = st.session_state.data.copy()
-        if selected_event_types:
-            filtered_data = filtered_data[filtered_data['event_type'].isin(selected_event_types)]
-        if selected_countries:
-            filtered_data = filtered_data[filtered_data['country'].isin(selected_countries)]
+        # Apply filters: None means every row matches
+        selections = {
+            'event_type': selected_event_types,
+            'country': selected_countries,
+            'quad_class': selected_quad_classes,
+            'source_country': selected_source_countries,
+            'target_country': selected_target_countries,
+        }
+        positions = filter_index.positions(selections)
         
         # Show filtered data
-        st.write(f"Showing {len(filtered_data)} events after filtering")
+        filtered_count = len(st.session_state.data) if positions is None else len(positions)
+        st.write(f"Showing {filtered_count} events after filtering")
         
-        # Add search functionality
-        search_term = st.text_input("Search in data (source, target, location):", "")
-        if search_term:
-            search_mask = (
-                filtered_data['source_name'].astype(str).str.contains(search_term, case=False) |
-                filtered_data['target_name'].astype(str).str.contains(search_term, case=False) |
-                filtered_data['location'].astype(str).str.contains(search_term, case=False)
-            )
-            filtered_data = filtered_data[search_mask]
+        # Add search functionality, answered from the search index built at load time
+        search_term = st.text_input("Search in data (source, target, location):", "",
+                                    help="Finds events where every search word starts a word in the source, "
+                                         "target or location, e.g. 'unit stat' matches 'United States'. "
+                                         "Case and punctuation are ignored; text inside a word is not matched.")
+        search_rows = st.session_state.events.search_index.search(search_term) if search_term else None
+        if search_rows is not None:
+            positions = search_rows if positions is None else np.intersect1d(positions, search_rows,
+                                                                             assume_unique=True)
+        # A view of the matching rows; the table and the export only materialise what they need
+        filtered_data = st.session_state.events.view(positions)
+        if search_rows is not None:
             st.write(f"Found {len(filtered_data)} events matching '{search_term}'")
         
         # Display the data with pagination and clickable source URLs
         if not filtered_data.empty:
-            # Select which columns to display
-            display_data = filtered_data[['date', 'event_type', 'source_name', 'target_name', 
-                                        'country', 'location', 'intensity', 'tone', 'source_url']].copy()
-            
-            # Format the date column for better readability
-            display_data['date'] = display_data['date'].dt.strftime('%Y-%m-%d %H:%M:%S')
-            
-            # Make the source_url clickable
-            # We need to create a new column with formatted HTML
-            display_data['source_url_link'] = display_data['source_url'].apply(
-                lambda x: f'<a href="{x}" target="_blank">Source Link</a>' if pd.notna(x) and x else 'No URL'
-            )
-            
-            # Display the data, excluding the raw URL column (we'll show the HTML links instead)
-            final_display_data = display_data.drop(columns=['source_url'])
-            
-            # Create a column with clickable links using HTML
             st.write("### Event Data")
             
+            # Only the visible page is rendered; pages are cached per filter state
+            filter_key = (id(st.session_state.events), search_term,
+                          tuple((column, tuple(values)) for column, values in selections.items()))
+            renderer = st.session_state.table_renderer
             
-            # Convert source_url_link to HTML-rendered columns
-            html_table = "<table style='width:100%'><tr>"
-            
-            # Header row
-            for col in final_display_data.columns:
-                if col != 'source_url_link':
-                    display_name = col.replace('_', ' ').title()
-                    html_table += f"<th style='text-align:left;padding:8px;border-bottom:1px solid #ddd;'>{display_name}</th>"
-                else:
-                    html_table += f"<th style='text-align:left;padding:8px;border-bottom:1px solid #ddd;'>Source URL</th>"
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                sort_by = st.selectbox("Sort by", [c for c in TABLE_COLUMNS[:-1]
+                                                   if c in st.session_state.data.columns],
+                                       format_func=column_label)
+            with col2:
+                sort_order = st.radio("Order", ["Descending", "Ascending"], horizontal=True)
+            with col3:
+                page_size = st.selectbox("Rows per page", PAGE_SIZES,
+                                         index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE))
             
-            html_table += "</tr>"
+            page_count = renderer.page_count(filtered_data, page_size)
+            if st.session_state.get('table_filter_key') != filter_key:
+                # New filter results start again on the first page
+                st.session_state.table_filter_key = filter_key
+                st.session_state.table_page = 1
+            elif st.session_state.get('table_page', 1) > page_count:
+                st.session_state.table_page = page_count
+            page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count,
+                                   key='table_page')
             
-            # Data rows
-            for _, row in final_display_data.iterrows():
-                html_table += "<tr>"
-                for col in final_display_data.columns:
-                    if col != 'source_url_link':
-                        cell_value = str(row[col]) if pd.notna(row[col]) else ""
-                        html_table += f"<td style='text-align:left;padding:8px;border-bottom:1px solid #ddd;'>{cell_value}</td>"
-                    else:
-                        html_table += f"<td style='text-align:left;padding:8px;border-bottom:1px solid #ddd;'>{row[col]}</td>"
-                html_table += "</tr>"
-            
-            html_table += "</table>"
+            html_table = renderer.render(filtered_data, filter_key, page=page, page_size=page_size,
+                                         sort_by=sort_by, ascending=(sort_order == "Ascending"))
             st.markdown(html_table, unsafe_allow_html=True)
             
-            # Also show the regular dataframe for sorting/filtering (without the HTML column)
-            st.write("### Data Table (Sortable)")
-            regular_display = display_data.drop(columns=['source_url_link'])
-            st.dataframe(regular_display, use_container_width=True)
-            
-            # Option to download the filtered data
-            csv = filtered_data.to_csv(index=False)
+            # Option to download the filtered data; the file is only written
+            # when the button is clicked, and reused while the filters stay the same
+            export_format = st.selectbox("Download format", list(EXPORT_FORMATS),
+                                         format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
+            exports = st.session_state.exports
             st.download_button(
-                label="Download data as CSV",
-                data=csv,
-                file_name=f"gdelt_events_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                mime="text/csv",
+                label=f"Download data as {EXPORT_FORMATS[export_format][0]}",
+                data=lambda: exports.export(filtered_data, filter_key, export_format),
+                file_name=export_file_name(export_format),
+                mime=EXPORT_FORMATS[export_format][2],
             )
         else:
             st.info("No data found with the current filters")
+        render_timer.stop(rows_out=len(filtered_data))
     
 else:
     st.info("Click '🔄 Refresh Data' in the sidebar to load the latest GDELT events from the last 15 minutes")
@@ -446,6 +717,10 @@ else:
         This Streamlit app adapts the visualization concepts from ICEWS Explorer to work with real-time GDELT data.
         """)
 
+if performance_panel is not None:
+    with performance_panel:
+        show_performance_panel()
+
 # Footer
 st.markdown("---")
 st.markdown("GDELT Data Visualization with ICEWS Explorer | Streamlit App")
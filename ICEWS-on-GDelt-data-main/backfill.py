@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Historical backfill of GDELT 2.0 events into ICEWS format.
+
+Enumerates the 15-minute export slices between a start and end time from
+masterfilelist.txt (or a local mirror of it), then downloads, parses and
+adapts them across a process pool. Every finished slice is written to its own
+file and recorded in a checkpoint, so an interrupted run resumes where it
+stopped.
+
+Example:
+    python backfill.py --start 2025-01-01T00:00 --end 2025-01-08T00:00 --output backfill_data
+"""
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from downloader import MASTERFILELIST_URL, DEFAULT_TIMEOUT, iter_file_list, slice_id, slice_time
+
+CHECKPOINT_FILE = 'checkpoint.json'
+OUTPUT_FORMATS = ('parquet', 'csv', 'store')
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+
+# Event stores opened by this (worker) process, by output directory
+_stores = {}
+
+
+def list_export_slices(start, end, source=MASTERFILELIST_URL, timeout=DEFAULT_TIMEOUT):
+    """
+    Lists the export slices published in [start, end).
+
+    Args:
+        start (datetime.datetime): First slice time to include (UTC)
+        end (datetime.datetime): Slice time to stop before (UTC)
+        source (str): URL or local path of masterfilelist.txt
+        timeout (float or tuple): Per-request timeout
+
+    Returns:
+        list: SliceFile entries sorted by slice time
+    """
+    slices = []
+    for entry in iter_file_list(source, timeout=timeout):
+        if not entry.url.endswith('.export.CSV.zip'):
+            continue
+        published = slice_time(entry.url)
+        if published is not None and start <= published < end:
+            slices.append(entry)
+    slices.sort(key=lambda entry: entry.url.rsplit('/', 1)[-1])
+    return slices
+
+
+def load_checkpoint(output_dir):
+    """
+    Reads the set of slice IDs already written to output_dir.
+
+    Args:
+        output_dir (str): Backfill output directory
+
+    Returns:
+        set: Completed slice IDs
+    """
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r') as f:
+        return set(json.load(f).get('completed', []))
+
+
+def save_checkpoint(output_dir, completed):
+    """
+    Atomically records the completed slice IDs.
+
+    Args:
+        output_dir (str): Backfill output directory
+        completed (set): Completed slice IDs
+    """
+    path = os.path.join(output_dir, CHECKPOINT_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'completed': sorted(completed)}, f)
+    os.replace(tmp_path, path)
+
+
+def write_frame(df, path, output_format):
+    """
+    Writes a frame atomically so a crash never leaves a partial file behind.
+
+    Args:
+        df (pandas.DataFrame): Data to write
+        path (str): Destination file path
+        output_format (str): 'parquet' or 'csv' (gzip-compressed)
+    """
+    tmp_path = path + '.tmp'
+    if output_format == 'parquet':
+        df.to_parquet(tmp_path, index=False)
+    else:
+        df.to_csv(tmp_path, index=False, compression='gzip')
+    os.replace(tmp_path, path)
+
+
+def _open_store(output_dir):
+    """
+    Returns the event store at output_dir and its dedup index.
+
+    Both are kept for the life of the worker process, so the index is loaded
+    once rather than for every slice; its lock merges what other workers
+    flushed in the meantime.
+    """
+    if output_dir not in _stores:
+        from event_store import EventStore
+        from ingestor import open_dedup_index
+        store = EventStore(output_dir)
+        _stores[output_dir] = (store, open_dedup_index(store))
+    return _stores[output_dir]
+
+
+def process_slice(entry, output_dir, output_format='parquet', engine=None, timeout=DEFAULT_TIMEOUT,
+                  cache_dir=None):
+    """
+    Downloads, parses, adapts and writes one export slice.
+
+    Runs inside a worker process, so it only takes picklable arguments.
+
+    Args:
+        entry (SliceFile): Slice to process
+        output_dir (str): Backfill output directory
+        output_format (str): 'parquet' or 'csv' for one file per slice, or
+            'store' to append into an event_store.EventStore rooted at output_dir
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+        timeout (float or tuple): Per-request timeout
+        cache_dir (str): Optional slice cache directory shared by all workers;
+            without one the slice is streamed
+
+    Returns:
+        tuple: (slice ID, number of ICEWS rows written, excluding events
+            the store already held)
+    """
+    from gdelt_processor import load_export_slice, stream_gdelt_export
+    from gdelt_schema import ICEWS_SOURCE_COLUMNS, concat_frames
+    from icews_adapter import adapt_gdelt_to_icews, adapt_gdelt_chunks
+
+    if cache_dir:
+        # The cache keeps whole zips and parsed frames, so the slice is loaded at once
+        from slice_cache import SliceCache
+        gdelt_df = load_export_slice(entry, columns=ICEWS_SOURCE_COLUMNS, engine=engine,
+                                     cache=SliceCache(cache_dir), timeout=timeout)
+        gdelt_df = gdelt_df.drop_duplicates(subset=['GlobalEventID'])
+        icews_df = adapt_gdelt_to_icews(gdelt_df)
+    else:
+        # Inflated, parsed and adapted chunk by chunk as it downloads, so only
+        # the adapted events of the slice are ever held whole
+        chunks = stream_gdelt_export(entry.url, columns=ICEWS_SOURCE_COLUMNS, engine=engine,
+                                     timeout=timeout)
+        icews_df = concat_frames(list(adapt_gdelt_chunks(chunks)))
+        if not icews_df.empty:
+            icews_df = icews_df.drop_duplicates(subset=['event_id'], ignore_index=True)
+
+    stamp = slice_id(entry.url)
+    if output_format == 'store':
+        # Through the store's dedup index, like the ingestor, so events already
+        # stored by an overlapping run or a live ingestor are not written twice
+        from ingestor import store_new_events
+        store, dedup = _open_store(output_dir)
+        return stamp, store_new_events(store, icews_df, stamp, dedup=dedup)
+
+    extension = 'parquet' if output_format == 'parquet' else 'csv.gz'
+    write_frame(icews_df, os.path.join(output_dir, f"events_{stamp}.{extension}"), output_format)
+    return stamp, len(icews_df)
+
+
+def run_backfill(start, end, output_dir, workers=DEFAULT_WORKERS, source=MASTERFILELIST_URL,
+                 output_format='parquet', engine=None, timeout=DEFAULT_TIMEOUT, cache_dir=None):
+    """
+    Backfills every export slice in [start, end) into output_dir.
+
+    Slices recorded in the checkpoint are skipped. Failed slices are reported
+    and left out of the checkpoint so the next run retries them.
+
+    Args:
+        start (datetime.datetime): First slice time to include (UTC)
+        end (datetime.datetime): Slice time to stop before (UTC)
+        output_dir (str): Directory for per-slice output files and the checkpoint
+        workers (int): Number of worker processes
+        source (str): URL or local path of masterfilelist.txt
+        output_format (str): 'parquet', 'csv' or 'store' (see process_slice)
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+        timeout (float or tuple): Per-request timeout
+        cache_dir (str): Optional slice cache directory
+
+    Returns:
+        dict: Summary with counts of slices done, skipped and failed, and rows written
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    slices = list_export_slices(start, end, source=source, timeout=timeout)
+    completed = load_checkpoint(output_dir)
+    pending = [entry for entry in slices if slice_id(entry.url) not in completed]
+
+    summary = {
+        'slices': len(slices),
+        'skipped': len(slices) - len(pending),
+        'done': 0,
+        'failed': 0,
+        'rows': 0,
+    }
+    print(f"Backfill: {len(slices)} slices in range, {summary['skipped']} already done, "
+          f"{len(pending)} to process with {workers} workers")
+
+    started = time.time()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(process_slice, entry, output_dir, output_format, engine, timeout,
+                            cache_dir): entry
+            for entry in pending
+        }
+        for future in as_completed(futures):
+            entry = futures[future]
+            try:
+                stamp, rows = future.result()
+            except Exception as e:
+                summary['failed'] += 1
+                print(f"Error processing file {entry.url}: {e}")
+                continue
+
+            completed.add(stamp)
+            save_checkpoint(output_dir, completed)
+            summary['done'] += 1
+            summary['rows'] += rows
+            print(f"[{summary['done'] + summary['failed']}/{len(pending)}] {stamp}: {rows} events")
+
+    summary['seconds'] = round(time.time() - started, 2)
+    return summary
+
+
+def parse_time(value):
+    """Parses an ISO-8601 date or date-time given on the command line."""
+    return datetime.datetime.fromisoformat(value)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Backfill historical GDELT events in ICEWS format.")
+    parser.add_argument('--start', type=parse_time, required=True, help="Start time (UTC), e.g. 2025-01-01T00:00")
+    parser.add_argument('--end', type=parse_time, required=True, help="End time (UTC, exclusive)")
+    parser.add_argument('--output', default='backfill_data', help="Output directory")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Number of worker processes")
+    parser.add_argument('--source', default=MASTERFILELIST_URL,
+                        help="masterfilelist.txt URL or path to a local mirror")
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, default='parquet', help="Output file format")
+    parser.add_argument('--engine', choices=('c', 'pyarrow', 'auto'), default=None, help="CSV parse engine")
+    parser.add_argument('--cache-dir', default=None, help="Slice cache directory (disabled when omitted)")
+    args = parser.parse_args(argv)
+
+    if args.end <= args.start:
+        parser.error("--end must be after --start")
+
+    summary = run_backfill(args.start, args.end, args.output, workers=args.workers, source=args.source,
+                           output_format=args.format, engine=args.engine, cache_dir=args.cache_dir)
+    print(f"Done: {summary['done']} slices, {summary['rows']} events, {summary['failed']} failed, "
+          f"{summary['skipped']} skipped in {summary['seconds']}s")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the fetch/parse/adapt/render pipeline on synthetic exports.
+
+Every stage that turns a GDELT export zip into what the dashboard shows is
+timed on its own, at several sizes: unzip, parse, time filter, dedup, adapt,
+compact, rollups, search, filters and rendering (map grid and one table
+page). Each stage runs on the output of the previous stage at least
+--repeat times, and more often while its runs add up to less than
+MIN_STAGE_SECONDS, and the best time is kept; peak memory is measured in a separate pass under
+tracemalloc so that tracing does not slow down the timings.
+
+The results are compared with a stored baseline (benchmarks/baseline.json).
+A stage that is slower or uses more memory than its baseline beyond the
+tolerances is reported as a regression and the run exits with status 1.
+Timings only compare well on the machine that recorded the baseline; the
+machine of both runs is printed when they differ.
+
+Example:
+    python benchmarks/run_benchmarks.py --sizes 10k,100k
+    python benchmarks/run_benchmarks.py --sizes 10k,100k,1M --update-baseline
+"""
+import argparse
+import datetime
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import zipfile
+
+import numpy as np
+import pyarrow
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import DEFAULT_SEED, DEFAULT_STAMP, synthetic_export  # noqa: E402
+from gdelt_schema import ICEWS_SOURCE_COLUMNS, DATEADDED_FORMAT, read_export  # noqa: E402
+from icews_adapter import adapt_gdelt_to_icews, compact_icews_frame  # noqa: E402
+from rollup import rollup_events, summarise  # noqa: E402
+from search_index import SearchIndex  # noqa: E402
+from filter_index import FilterIndex  # noqa: E402
+from spatial import SpatialIndex  # noqa: E402
+from table_renderer import TableRenderer  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+SIZES = {'10k': 10000, '100k': 100000, '1M': 1000000, '10M': 10000000}
+DEFAULT_SIZES = '10k,100k,1M'
+DEFAULT_REPEAT = 3
+# Fast stages are repeated until their runs add up to this many seconds (at
+# most MAX_REPEAT runs), so the best time of a millisecond stage is not noise
+MIN_STAGE_SECONDS = 1.0
+MAX_REPEAT = 50
+
+# A stage regresses when it is slower than time_tolerance x baseline and by
+# more than MIN_TIME_DELTA seconds, or uses more than memory_tolerance x
+# baseline and more than MIN_MEMORY_DELTA bytes at its peak
+DEFAULT_TIME_TOLERANCE = 1.5
+DEFAULT_MEMORY_TOLERANCE = 1.25
+MIN_TIME_DELTA = 0.05
+MIN_MEMORY_DELTA = 4 * 1024 * 1024
+
+SEARCH_QUERIES = ['government', 'united states', 'moscow police', 'xyz']
+
+
+def _unzip(state):
+    with zipfile.ZipFile(state['path']) as archive:
+        return {'raw': archive.read(archive.namelist()[0])}
+
+
+def _parse(state):
+    return {'gdelt': read_export(io.BytesIO(state['raw']), columns=ICEWS_SOURCE_COLUMNS)}
+
+
+def _time_filter(state):
+    # Drops the rows added in an earlier slice, as fetch_gdelt_data does
+    published = datetime.datetime.strptime(state['stamp'], DATEADDED_FORMAT)
+    df = state['gdelt']
+    return {'recent': df[df['datetime'] >= published - datetime.timedelta(minutes=10)]}
+
+
+def _dedup(state):
+    df = state['recent'].drop_duplicates(subset=['GlobalEventID'])
+    return {'unique': df.sort_values('datetime', ascending=False)}
+
+
+def _adapt(state):
+    return {'icews': adapt_gdelt_to_icews(state['unique'])}
+
+
+def _compact(state):
+    return {'events': compact_icews_frame(state['icews'])}
+
+
+def _rollup(state):
+    cube = rollup_events(state['events'])
+    return {'summaries': [summarise(cube, by) for by in ('event_root_type', 'bucket', 'intensity_category')]}
+
+
+def _search(state):
+    index = SearchIndex(state['events'])
+    return {'search_hits': [len(index.search(query)) for query in SEARCH_QUERIES]}
+
+
+def _filter(state):
+    index = FilterIndex(state['events'])
+    options = index.options('event_type')
+    selections = {'event_type': options[:3], 'country': index.options('country')[:5]}
+    return {'positions': index.positions(selections)}
+
+
+def _render(state):
+    events = state['events']
+    spatial = SpatialIndex(events)
+    cells = spatial.aggregate(spatial.choose_resolution())
+    positions = state['positions']
+    page_rows = events if positions is None else events.take(positions)
+    html = TableRenderer().render(page_rows, 'benchmark', page=1, sort_by='date', ascending=False)
+    return {'cells': cells, 'html': html}
+
+
+# Stages in pipeline order; each one reads the outputs of the earlier ones
+STAGES = [
+    ('unzip', _unzip),
+    ('parse', _parse),
+    ('time_filter', _time_filter),
+    ('dedup', _dedup),
+    ('adapt', _adapt),
+    ('compact', _compact),
+    ('rollup', _rollup),
+    ('search', _search),
+    ('filter', _filter),
+    ('render', _render),
+]
+
+
+def _arrow_peak(pool, base, previous_max):
+    """
+    Arrow memory a stage needed, which tracemalloc does not see.
+
+    Arrow only tracks its all-time maximum, so this is the growth of that
+    maximum during the stage when there was one, and otherwise the memory
+    the stage kept allocated.
+    """
+    if pool.max_memory() > previous_max:
+        return pool.max_memory() - base
+    return max(0, pool.bytes_allocated() - base)
+
+
+def run_pipeline(path, stamp=DEFAULT_STAMP, repeat=DEFAULT_REPEAT):
+    """
+    Times every stage on one export zip.
+
+    Args:
+        path (str): Export zip to process
+        stamp (str): Slice ID the rows were published in
+        repeat (int): Least runs per stage; fast stages run more often (see
+            MIN_STAGE_SECONDS) and the best time is kept
+
+    Returns:
+        dict: Stage -> {'seconds', 'peak_bytes'} plus 'rows' (events after
+            dedup). peak_bytes covers Python and numpy allocations at their
+            peak plus the Arrow memory of the stage.
+    """
+    results = {}
+
+    state = {'path': path, 'stamp': stamp}
+    for name, stage in STAGES:
+        times = []
+        while len(times) < max(1, repeat) or (sum(times) < MIN_STAGE_SECONDS and len(times) < MAX_REPEAT):
+            gc.collect()
+            start = time.perf_counter()
+            output = stage(state)
+            times.append(time.perf_counter() - start)
+        state.update(output)
+        results[name] = {'seconds': round(min(times), 6)}
+
+    # Separate pass for memory: tracing makes every allocation slower
+    state = {'path': path, 'stamp': stamp}
+    pool = pyarrow.default_memory_pool()
+    tracemalloc.start()
+    try:
+        for name, stage in STAGES:
+            gc.collect()
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            arrow_base, arrow_max = pool.bytes_allocated(), pool.max_memory()
+            state.update(stage(state))
+            _, peak = tracemalloc.get_traced_memory()
+            results[name]['peak_bytes'] = peak - base + _arrow_peak(pool, arrow_base, arrow_max)
+    finally:
+        tracemalloc.stop()
+
+    results['rows'] = len(state['events'])
+    return results
+
+
+def machine_info():
+    """Describes the machine and library versions of a run."""
+    import pandas as pd
+
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpus': os.cpu_count(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'pyarrow': pyarrow.__version__,
+    }
+
+
+def compare(results, baseline, time_tolerance=DEFAULT_TIME_TOLERANCE,
+            memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    """
+    Compares results with a baseline.
+
+    Args:
+        results (dict): Size label -> run_pipeline() results
+        baseline (dict): Same layout, from the baseline file
+        time_tolerance (float): Allowed slowdown factor
+        memory_tolerance (float): Allowed peak memory growth factor
+
+    Returns:
+        list: One message per regression (empty if none)
+    """
+    regressions = []
+    for size, stages in results.items():
+        expected = baseline.get(size)
+        if expected is None:
+            continue
+        for name, _ in STAGES:
+            current, before = stages.get(name), expected.get(name)
+            if current is None or before is None:
+                continue
+            seconds, base_seconds = current['seconds'], before['seconds']
+            if seconds > base_seconds * time_tolerance and seconds - base_seconds > MIN_TIME_DELTA:
+                regressions.append(f"{size} {name}: {seconds:.3f}s vs {base_seconds:.3f}s baseline "
+                                   f"({seconds / base_seconds:.2f}x)")
+            peak, base_peak = current['peak_bytes'], before['peak_bytes']
+            if peak > base_peak * memory_tolerance and peak - base_peak > MIN_MEMORY_DELTA:
+                regressions.append(f"{size} {name}: peak {peak / 2**20:.1f} MiB vs "
+                                   f"{base_peak / 2**20:.1f} MiB baseline ({peak / max(base_peak, 1):.2f}x)")
+    return regressions
+
+
+def print_results(results, baseline):
+    """Prints one table per size, with the baseline next to each stage."""
+    for size, stages in results.items():
+        expected = baseline.get(size, {})
+        print(f"\n{size} rows ({stages['rows']} events after dedup)")
+        print(f"  {'stage':<12} {'seconds':>9} {'baseline':>9} {'peak MiB':>9} {'baseline':>9}")
+        for name, _ in STAGES:
+            current, before = stages[name], expected.get(name)
+            base_seconds = f"{before['seconds']:.3f}" if before else '-'
+            base_peak = f"{before['peak_bytes'] / 2**20:.1f}" if before else '-'
+            print(f"  {name:<12} {current['seconds']:>9.3f} {base_seconds:>9} "
+                  f"{current['peak_bytes'] / 2**20:>9.1f} {base_peak:>9}")
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Benchmark the GDELT to ICEWS pipeline on synthetic exports.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Comma-separated sizes out of {', '.join(SIZES)} (default: {DEFAULT_SIZES})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Least timed runs per stage")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Random seed of the synthetic data")
+    parser.add_argument('--baseline', default=BASELINE_PATH, help="Baseline file to compare with")
+    parser.add_argument('--update-baseline', action='store_true',
+                        help="Store these results as the new baseline instead of comparing")
+    parser.add_argument('--output', default=None, help="Also write the results to this JSON file")
+    parser.add_argument('--time-tolerance', type=float, default=DEFAULT_TIME_TOLERANCE,
+                        help="Allowed slowdown factor before a stage counts as a regression")
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help="Allowed peak memory growth factor before a stage counts as a regression")
+    args = parser.parse_args(argv)
+
+    labels = [label.strip() for label in args.sizes.split(',') if label.strip()]
+    unknown = [label for label in labels if label not in SIZES]
+    if unknown:
+        parser.error(f"Unknown sizes {unknown}, expected some of {list(SIZES)}")
+
+    results = {}
+    for label in labels:
+        print(f"Preparing {label} rows...", flush=True)
+        path = synthetic_export(SIZES[label], seed=args.seed)
+        print(f"Running {label} rows...", flush=True)
+        results[label] = run_pipeline(path, repeat=args.repeat)
+
+    report = {'machine': machine_info(), 'seed': args.seed, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    stored = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            stored = json.load(f)
+
+    if args.update_baseline:
+        # Sizes not run this time keep their previous baseline
+        merged = dict(stored.get('results', {}))
+        merged.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump({'machine': report['machine'], 'seed': args.seed, 'results': merged}, f, indent=2)
+            f.write('\n')
+        print_results(results, {})
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    baseline = stored.get('results', {}) if stored.get('seed') == args.seed else {}
+    print_results(results, baseline)
+    if not baseline:
+        print(f"\nNo baseline for seed {args.seed} in {args.baseline}; nothing to compare")
+        return 0
+    if stored.get('machine') != report['machine']:
+        print(f"\nWarning: the baseline was recorded on another machine ({stored.get('machine')}); "
+              f"timings may not be comparable")
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    if regressions:
+        print(f"\nPERFORMANCE REGRESSION in {len(regressions)} stage(s):")
+        for message in regressions:
+            print(f"  {message}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Deterministic generator of synthetic GDELT 2.0 export slices for benchmarks.
+
+The generated files have the real 61-column tab-separated layout, and the
+values follow the shape of real exports closely enough to exercise the same
+code paths: CAMEO codes drawn with the skew seen in GDELT (statements and
+consultations dominate, mass violence is rare), QuadClass and Goldstein
+values consistent with the code, actor and geography columns with realistic
+null rates, coordinates clustered around real cities, a few percent of rows
+added in an earlier slice and about 1% duplicated event IDs. The same rows
+and seed always produce byte-identical files.
+
+Example:
+    python benchmarks/synthetic.py --rows 100000 --output synthetic.export.CSV.zip
+"""
+import argparse
+import datetime
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cameo import CAMEO_EVENT_CODES  # noqa: E402
+from gdelt_schema import GDELT_COLUMNS, DATEADDED_FORMAT  # noqa: E402
+
+DEFAULT_SEED = 20250101
+DEFAULT_STAMP = '20250101120000'
+CHUNK_ROWS = 250000
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'gdelt-benchmarks')
+
+# Share of events per CAMEO root code, roughly as in GDELT 2.0
+ROOT_WEIGHTS = {
+    '01': 0.19, '02': 0.07, '03': 0.09, '04': 0.17, '05': 0.05, '06': 0.03, '07': 0.03,
+    '08': 0.02, '09': 0.02, '10': 0.02, '11': 0.07, '12': 0.02, '13': 0.02, '14': 0.02,
+    '15': 0.01, '16': 0.02, '17': 0.06, '18': 0.04, '19': 0.04, '20': 0.005,
+}
+
+# Typical Goldstein score per root code
+ROOT_GOLDSTEIN = {
+    '01': 0.0, '02': 3.0, '03': 4.0, '04': 1.0, '05': 3.5, '06': 6.0, '07': 7.0, '08': 5.0,
+    '09': -2.0, '10': -5.0, '11': -2.0, '12': -4.0, '13': -6.0, '14': -6.5, '15': -7.2,
+    '16': -4.0, '17': -7.0, '18': -9.0, '19': -10.0, '20': -10.0,
+}
+
+# Actor countries (CAMEO code, name), most frequent first
+COUNTRIES = [
+    ('USA', 'UNITED STATES'), ('GBR', 'UNITED KINGDOM'), ('RUS', 'RUSSIA'), ('CHN', 'CHINA'),
+    ('IND', 'INDIA'), ('UKR', 'UKRAINE'), ('ISR', 'ISRAEL'), ('FRA', 'FRANCE'), ('DEU', 'GERMANY'),
+    ('AUS', 'AUSTRALIA'), ('CAN', 'CANADA'), ('PAK', 'PAKISTAN'), ('IRN', 'IRAN'), ('NGA', 'NIGERIA'),
+    ('JPN', 'JAPAN'), ('TUR', 'TURKEY'), ('PSE', 'PALESTINE'), ('ZAF', 'SOUTH AFRICA'),
+    ('BRA', 'BRAZIL'), ('MEX', 'MEXICO'), ('KOR', 'SOUTH KOREA'), ('SYR', 'SYRIA'),
+    ('EGY', 'EGYPT'), ('AFG', 'AFGHANISTAN'), ('SAU', 'SAUDI ARABIA'), ('PHL', 'PHILIPPINES'),
+    ('KEN', 'KENYA'), ('ITA', 'ITALY'), ('ESP', 'SPAIN'), ('IDN', 'INDONESIA'),
+]
+
+# Actor roles (type code, name) used for actors without a named country
+ROLES = [
+    ('GOV', 'GOVERNMENT'), ('COP', 'POLICE'), ('MIL', 'MILITARY'), ('BUS', 'COMPANY'),
+    ('MED', 'JOURNALIST'), ('OPP', 'OPPOSITION'), ('CVL', 'CITIZEN'), ('JUD', 'COURT'),
+    ('EDU', 'STUDENT'), ('LEG', 'PARLIAMENT'), ('HLH', 'HOSPITAL'), ('REB', 'REBEL'),
+]
+
+# Places (full name, FIPS country, ADM1, latitude, longitude, geo type), most frequent first
+PLACES = [
+    ('Washington, District of Columbia, United States', 'US', 'USDC', 38.8951, -77.0364, 3),
+    ('London, London, City of, United Kingdom', 'UK', 'UKH9', 51.5, -0.1167, 4),
+    ('Moscow, Moskva, Russia', 'RS', 'RS48', 55.7522, 37.6156, 4),
+    ('Beijing, Beijing, China', 'CH', 'CH22', 39.9289, 116.388, 4),
+    ('New Delhi, Delhi, India', 'IN', 'IN07', 28.6, 77.2, 4),
+    ('Kyiv, Kyyiv, Misto, Ukraine', 'UP', 'UP12', 50.4333, 30.5167, 4),
+    ('Jerusalem, Israel (general), Israel', 'IS', 'IS00', 31.7667, 35.2333, 4),
+    ('Paris, France (general), France', 'FR', 'FR00', 48.8667, 2.3333, 4),
+    ('Berlin, Berlin, Germany', 'GM', 'GM16', 52.5167, 13.4, 4),
+    ('Sydney, New South Wales, Australia', 'AS', 'AS02', -33.8833, 151.217, 4),
+    ('Ottawa, Ontario, Canada', 'CA', 'CA08', 45.4167, -75.7, 4),
+    ('Islamabad, Islamabad, Pakistan', 'PK', 'PK08', 33.7, 73.1667, 4),
+    ('Tehran, Tehran, Iran', 'IR', 'IR26', 35.75, 51.5148, 4),
+    ('Lagos, Lagos, Nigeria', 'NI', 'NI05', 6.45306, 3.39583, 4),
+    ('Tokyo, Tokyo, Japan', 'JA', 'JA40', 35.685, 139.751, 4),
+    ('California, United States', 'US', 'USCA', 36.17, -119.746, 2),
+    ('Texas, United States', 'US', 'USTX', 31.106, -97.6475, 2),
+    ('Gaza, Israel (general), Israel', 'IS', 'IS00', 31.5, 34.4667, 4),
+    ('United States', 'US', 'US', 39.828175, -98.5795, 1),
+    ('Nairobi, Nairobi Area, Kenya', 'KE', 'KE05', -1.28333, 36.8167, 4),
+]
+
+DOMAINS = ['reuters.com', 'apnews.com', 'bbc.co.uk', 'aljazeera.com', 'thehindu.com', 'nytimes.com',
+           'theguardian.com', 'cnn.com', 'dw.com', 'abc.net.au', 'yahoo.com', 'msn.com']
+
+
+def _zipf(count, exponent=1.1):
+    """Normalised Zipf weights for count items."""
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _event_code_table():
+    """Returns all CAMEO event codes and their sampling weights."""
+    codes = sorted(code for code in CAMEO_EVENT_CODES if code[:2] in ROOT_WEIGHTS)
+    weights = np.zeros(len(codes))
+    for root, share in ROOT_WEIGHTS.items():
+        members = [i for i, code in enumerate(codes) if code.startswith(root)]
+        # Shorter (more generic) codes are reported far more often
+        members.sort(key=lambda i: (len(codes[i]), codes[i]))
+        weights[members] = share * _zipf(len(members), 1.3)
+    return np.array(codes, dtype=object), weights / weights.sum()
+
+
+def _blank(values, rng, rate):
+    """Replaces a share of values with empty strings."""
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < rate] = ''
+    return values
+
+
+def _actor(rng, n, null_rate, country_rate):
+    """Actor code, name, country and type columns for n rows."""
+    countries = rng.choice(len(COUNTRIES), n, p=_zipf(len(COUNTRIES)))
+    roles = rng.choice(len(ROLES), n, p=_zipf(len(ROLES), 0.8))
+    has_country = rng.random(n) < country_rate
+    has_role = rng.random(n) < 0.6
+    country_codes = np.array([c for c, _ in COUNTRIES], dtype=object)[countries]
+    country_names = np.array([name for _, name in COUNTRIES], dtype=object)[countries]
+    role_codes = np.array([c for c, _ in ROLES], dtype=object)[roles]
+    role_names = np.array([name for _, name in ROLES], dtype=object)[roles]
+
+    code = np.where(has_country, country_codes, '') + np.where(has_role, role_codes, '')
+    name = np.where(has_country & ~has_role, country_names, np.where(has_role, role_names, country_names))
+    missing = rng.random(n) < null_rate
+    empty = np.full(n, '', dtype=object)
+    return {
+        'Code': np.where(missing, empty, code),
+        'Name': np.where(missing, empty, name),
+        'CountryCode': np.where(missing | ~has_country, empty, country_codes),
+        'Type1Code': np.where(missing | ~has_role, empty, role_codes),
+    }
+
+
+def _geo(rng, n, null_rate):
+    """Geography columns for n rows, coordinates jittered around real places."""
+    places = rng.choice(len(PLACES), n, p=_zipf(len(PLACES), 0.9))
+    table = list(zip(*PLACES))
+    missing = rng.random(n) < null_rate
+    empty = np.full(n, '', dtype=object)
+    jitter = rng.normal(0, 0.05, size=(2, n))
+    latitude = np.round(np.array(table[3])[places] + jitter[0], 4)
+    longitude = np.round(np.array(table[4])[places] + jitter[1], 4)
+    return {
+        'Type': pd.Series(np.array(table[5])[places], dtype='Int64').mask(missing),
+        'FullName': np.where(missing, empty, np.array(table[0], dtype=object)[places]),
+        'CountryCode': np.where(missing, empty, np.array(table[1], dtype=object)[places]),
+        'ADM1Code': np.where(missing, empty, np.array(table[2], dtype=object)[places]),
+        'ADM2Code': empty,
+        'Lat': np.where(missing, np.nan, latitude),
+        'Long': np.where(missing, np.nan, longitude),
+        'FeatureID': pd.Series(-1000000 - places, dtype='Int64').mask(missing),
+    }
+
+
+def generate_rows(n, seed=DEFAULT_SEED, stamp=DEFAULT_STAMP, first_id=1200000000):
+    """
+    Generates n export rows in GDELT column order.
+
+    Args:
+        n (int): Number of rows
+        seed (int): Random seed; the same seed always gives the same rows
+        stamp (str): Slice ID (YYYYMMDDHHMMSS) the rows are published in
+        first_id (int): GlobalEventID of the first row
+
+    Returns:
+        pandas.DataFrame: GDELT_COLUMNS as written to the file ('' or missing for null)
+    """
+    rng = np.random.default_rng(seed)
+    published = datetime.datetime.strptime(stamp, DATEADDED_FORMAT)
+    columns = {}
+
+    ids = first_id + np.arange(n, dtype=np.int64)
+    duplicated = np.flatnonzero(rng.random(n) < 0.01)
+    duplicated = duplicated[duplicated > 0]
+    ids[duplicated] = ids[rng.integers(0, duplicated)]
+    columns['GlobalEventID'] = ids
+
+    # Most events happened on the publication day, some up to a month before
+    days_back = np.where(rng.random(n) < 0.8, 0, rng.integers(1, 31, n))
+    dates = pd.DatetimeIndex(pd.to_datetime(published.date()) - pd.to_timedelta(days_back, unit='D'))
+    year, month, day = dates.year.to_numpy(), dates.month.to_numpy(), dates.day.to_numpy()
+    columns['Day'] = year * 10000 + month * 100 + day
+    columns['MonthYear'] = year * 100 + month
+    columns['Year'] = year
+    columns['FractionDate'] = np.round(year + (dates.dayofyear.to_numpy() - 1) / 365, 4)
+
+    for prefix, null_rate, country_rate in (('Actor1', 0.08, 0.55), ('Actor2', 0.35, 0.45)):
+        actor = _actor(rng, n, null_rate, country_rate)
+        columns[f'{prefix}Code'] = actor['Code']
+        columns[f'{prefix}Name'] = actor['Name']
+        columns[f'{prefix}CountryCode'] = actor['CountryCode']
+        for suffix in ('KnownGroupCode', 'EthnicCode', 'Religion1Code', 'Religion2Code',
+                       'Type2Code', 'Type3Code'):
+            columns[f'{prefix}{suffix}'] = np.full(n, '', dtype=object)
+        columns[f'{prefix}Type1Code'] = actor['Type1Code']
+
+    codes, weights = _event_code_table()
+    picked = rng.choice(len(codes), n, p=weights)
+    roots = np.array([code[:2] for code in codes], dtype=object)
+    root_number = roots.astype(int)[picked]
+    columns['IsRootEvent'] = (rng.random(n) < 0.55).astype(int)
+    columns['EventCode'] = codes[picked]
+    columns['EventBaseCode'] = np.array([code[:3] for code in codes], dtype=object)[picked]
+    columns['EventRootCode'] = roots[picked]
+    columns['QuadClass'] = np.select([root_number <= 5, root_number <= 8, root_number <= 13], [1, 2, 3], 4)
+    goldstein = np.array([ROOT_GOLDSTEIN[root] for root in roots])[picked] + rng.choice([-0.4, 0, 0, 0.4], n)
+    columns['GoldsteinScale'] = np.round(np.clip(goldstein, -10, 10), 1)
+
+    mentions = rng.geometric(0.35, n)
+    columns['NumMentions'] = mentions
+    columns['NumSources'] = np.minimum(mentions, rng.geometric(0.6, n))
+    columns['NumArticles'] = mentions
+    columns['AvgTone'] = np.round(np.clip(rng.normal(-2.5, 3.5, n), -25, 25), 6)
+
+    for prefix, null_rate in (('Actor1Geo', 0.15), ('Actor2Geo', 0.4), ('ActionGeo', 0.05)):
+        for field, values in _geo(rng, n, null_rate).items():
+            columns[f'{prefix}_{field}'] = values
+
+    # A few percent of the rows were added in an earlier slice
+    earlier = published - datetime.timedelta(minutes=15)
+    columns['DATEADDED'] = np.where(rng.random(n) < 0.04, int(earlier.strftime(DATEADDED_FORMAT)),
+                                    int(stamp))
+
+    domains = np.array(DOMAINS, dtype=object)[rng.choice(len(DOMAINS), n, p=_zipf(len(DOMAINS)))]
+    articles = rng.integers(0, max(1, n // 4), n).astype(str).astype(object)
+    columns['SOURCEURL'] = 'https://www.' + domains + '/news/' + articles + '.html'
+
+    return pd.DataFrame({column: columns[column] for column in GDELT_COLUMNS})
+
+
+def write_export_zip(path, rows, seed=DEFAULT_SEED, stamp=DEFAULT_STAMP, chunk_rows=CHUNK_ROWS,
+                     first_id=1200000000):
+    """
+    Writes a synthetic .export.CSV.zip, generating it in chunks of rows.
+
+    Args:
+        path (str): Destination file
+        rows (int): Number of rows
+        seed (int): Random seed
+        stamp (str): Slice ID the rows are published in
+        chunk_rows (int): Rows generated and written at a time
+        first_id (int): GlobalEventID of the first row
+
+    Returns:
+        str: path
+    """
+    # The member timestamp comes from the slice ID, so the bytes are reproducible
+    member = zipfile.ZipInfo(f"{stamp}.export.CSV", date_time=time.strptime(stamp, DATEADDED_FORMAT)[:6])
+    member.compress_type = zipfile.ZIP_DEFLATED
+    tmp_path = f"{path}.tmp"
+    with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open(member, 'w', force_zip64=True) as f:
+            for index, start in enumerate(range(0, rows, chunk_rows)):
+                count = min(chunk_rows, rows - start)
+                chunk = generate_rows(count, seed=seed + index, stamp=stamp, first_id=first_id + start)
+                f.write(chunk.to_csv(sep='\t', header=False, index=False).encode('utf-8'))
+    os.replace(tmp_path, path)
+    return path
+
+
+def synthetic_export(rows, seed=DEFAULT_SEED, stamp=DEFAULT_STAMP, data_dir=DATA_DIR):
+    """
+    Returns the path of a synthetic export zip, generating it on first use.
+
+    Args:
+        rows (int): Number of rows
+        seed (int): Random seed
+        stamp (str): Slice ID the rows are published in
+        data_dir (str): Directory the generated files are kept in
+
+    Returns:
+        str: Path of the zip
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic-{rows}-{seed}-{stamp}.export.CSV.zip")
+    if not os.path.exists(path):
+        write_export_zip(path, rows, seed=seed, stamp=stamp)
+    return path
+
+
+def write_slices(directory, slices, rows, seed=DEFAULT_SEED, start=DEFAULT_STAMP):
+    """
+    Writes consecutive 15-minute export slices, e.g. for mirror_server.py.
+
+    Args:
+        directory (str): Output directory; files are named <slice ID>.export.CSV.zip
+        slices (int): Number of slices
+        rows (int): Rows per slice
+        seed (int): Random seed of the first slice
+        start (str): Slice ID of the first slice
+
+    Returns:
+        list: Paths of the written files
+    """
+    os.makedirs(directory, exist_ok=True)
+    first = datetime.datetime.strptime(start, DATEADDED_FORMAT)
+    paths = []
+    for index in range(slices):
+        stamp = (first + datetime.timedelta(minutes=15 * index)).strftime(DATEADDED_FORMAT)
+        path = os.path.join(directory, f"{stamp}.export.CSV.zip")
+        # Seeds are spaced so that the per-chunk seeds of two slices never overlap
+        paths.append(write_export_zip(path, rows, seed=seed + 1000 * index, stamp=stamp,
+                                      first_id=1200000000 + index * rows))
+    return paths
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic GDELT 2.0 export zip.")
+    parser.add_argument('--rows', type=int, default=100000, help="Number of rows")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Random seed")
+    parser.add_argument('--stamp', default=DEFAULT_STAMP, help="Slice ID (YYYYMMDDHHMMSS)")
+    parser.add_argument('--output', default=None, help="Output zip (default: cached under the temp directory)")
+    parser.add_argument('--slices', type=int, default=None,
+                        help="Write this many consecutive slices starting at --stamp into --directory")
+    parser.add_argument('--directory', default='mirror_data', help="Output directory for --slices")
+    args = parser.parse_args(argv)
+
+    if args.slices:
+        paths = write_slices(args.directory, args.slices, args.rows, seed=args.seed, start=args.stamp)
+        print(f"Wrote {len(paths)} slices to {args.directory}")
+        return 0
+    if args.output:
+        path = write_export_zip(args.output, args.rows, seed=args.seed, stamp=args.stamp)
+    else:
+        path = synthetic_export(args.rows, seed=args.seed, stamp=args.stamp)
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Headless batch conversion of GDELT 2.0 export zips to ICEWS format.
+
+Takes local export zips (files, directories or glob patterns) or a time
+range of slices listed in masterfilelist.txt, and parses, deduplicates,
+adapts and writes them across a pool of worker processes, one output shard
+per input zip. Each worker streams its zip in chunks of rows, so its memory
+stays bounded by the chunk size whatever the size of the file. Shards that
+already exist are skipped, so an interrupted run resumes where it stopped.
+
+Example:
+    python convert.py archive/ --output icews_data --format tsv --workers 16
+    python convert.py "archive/202501*.export.CSV.zip" --output icews_data --format parquet
+    python convert.py --start 2025-01-01T00:00 --end 2025-02-01T00:00 --output icews_data
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from backfill import DEFAULT_WORKERS, list_export_slices, parse_time
+from downloader import MASTERFILELIST_URL, DEFAULT_TIMEOUT, SliceFile, slice_time
+from gdelt_schema import DEFAULT_CHUNKSIZE
+
+# Output formats: key -> shard file extension
+OUTPUT_FORMATS = {'tsv': 'tab', 'parquet': 'parquet'}
+EXPORT_SUFFIX = '.export.CSV.zip'
+# Files a worker process converts before it is replaced (Python 3.11+)
+TASKS_PER_WORKER = 64
+
+
+def find_inputs(patterns):
+    """
+    Expands files, directories and glob patterns to export zip paths.
+
+    Args:
+        patterns (list): Paths; a directory contributes every export zip
+            below it, a pattern every file it matches
+
+    Returns:
+        list: Distinct paths, sorted by file name (i.e. by slice time)
+    """
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(glob.glob(os.path.join(pattern, '**', f'*{EXPORT_SUFFIX}'), recursive=True))
+        elif os.path.isfile(pattern):
+            paths.add(pattern)
+        else:
+            paths.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(paths, key=lambda path: (os.path.basename(path), path))
+
+
+def shard_path(source, output_dir, output_format):
+    """Returns the output shard of an input zip path or SliceFile."""
+    name = os.path.basename(source.url if isinstance(source, SliceFile) else source)
+    if name.endswith('.zip'):
+        name = name[:-len('.zip')]
+    return os.path.join(output_dir, f"{name}.icews.{OUTPUT_FORMATS[output_format]}")
+
+
+def _open_export(source, timeout):
+    """
+    Opens the CSV member of a local zip, or of a SliceFile's zip as it downloads.
+
+    A download is inflated on the fly (see streaming.open_zip_member), so the
+    archive is never held in memory whole.
+
+    Returns:
+        tuple: (binary reader, object to close when done)
+    """
+    if isinstance(source, SliceFile):
+        from downloader import CHUNK_SIZE, create_session
+        from streaming import open_zip_member
+        response = create_session(1).get(source.url, stream=True, timeout=timeout)
+        response.raise_for_status()
+        return open_zip_member(response.iter_content(chunk_size=CHUNK_SIZE)), response
+    archive = zipfile.ZipFile(source)
+    return archive.open(archive.namelist()[0]), archive
+
+
+def _unique_chunks(chunks, counts):
+    """Drops events already seen in earlier chunks of the same file."""
+    import numpy as np
+
+    # Sorted IDs of the rows kept so far. Only the new chunk's IDs are
+    # sorted; they are merged in at their insertion points, a single copy
+    # of the array (mostly an append, export IDs being nearly sorted)
+    seen = np.empty(0, dtype=np.int64)
+    for chunk in chunks:
+        counts['rows_in'] += len(chunk)
+        ids = chunk['GlobalEventID'].to_numpy(dtype=np.int64, na_value=-1)
+        keep = ~chunk['GlobalEventID'].duplicated().to_numpy()
+        if len(seen):
+            found = np.minimum(np.searchsorted(seen, ids), len(seen) - 1)
+            keep &= seen[found] != ids
+        new = np.sort(ids[keep])
+        seen = np.insert(seen, np.searchsorted(seen, new), new)
+        yield chunk[keep] if not keep.all() else chunk
+
+
+class ShardWriter:
+    """
+    Writes adapted chunks to one shard file, atomically on close.
+
+    TSV shards use the ICEWS event file layout (see exporter.to_icews_layout);
+    Parquet shards keep every adapted column, with one row group per chunk.
+
+    Args:
+        path (str): Destination shard
+        output_format (str): Key of OUTPUT_FORMATS
+    """
+
+    def __init__(self, path, output_format):
+        self.path = path
+        self.output_format = output_format
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._schema = None
+
+    def write(self, chunk):
+        if self.output_format == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._writer is None:
+                self._schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+            self._writer.write_table(pa.Table.from_pandas(chunk, schema=self._schema, preserve_index=False))
+        else:
+            from exporter import to_icews_layout
+
+            header = self._file is None
+            if header:
+                self._file = open(self.tmp_path, 'w', encoding='utf-8', newline='')
+            to_icews_layout(chunk).to_csv(self._file, sep='\t', index=False, header=header)
+        self.rows += len(chunk)
+
+    def close(self):
+        """Finishes the shard; a shard without rows is still written, with its columns."""
+        if self._writer is None and self._file is None:
+            from icews_adapter import empty_icews_frame
+            self.write(empty_icews_frame())
+        if self._writer is not None:
+            self._writer.close()
+        else:
+            self._file.close()
+        os.replace(self.tmp_path, self.path)
+
+    def discard(self):
+        """Drops a partly written shard."""
+        if self._writer is not None:
+            self._writer.close()
+        if self._file is not None:
+            self._file.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+
+def convert_file(source, output_dir, output_format='tsv', chunk_rows=DEFAULT_CHUNKSIZE,
+                 timeout=DEFAULT_TIMEOUT):
+    """
+    Converts one export zip to an ICEWS shard, chunk by chunk.
+
+    Runs inside a worker process, so it only takes picklable arguments.
+
+    Args:
+        source (str or SliceFile): Local zip path, or listing entry to download
+        output_dir (str): Directory of the shards
+        output_format (str): Key of OUTPUT_FORMATS
+        chunk_rows (int): Rows parsed and adapted at a time; bounds the
+            memory of the worker
+        timeout (float or tuple): Per-request timeout for downloads
+
+    Returns:
+        dict: Input name, GDELT rows read, ICEWS rows written, seconds and
+            the worker's peak resident memory in bytes (None if unknown)
+    """
+    from gdelt_schema import ICEWS_SOURCE_COLUMNS, iter_export
+    from icews_adapter import adapt_gdelt_chunks
+
+    started = time.time()
+    counts = {'rows_in': 0}
+    writer = ShardWriter(shard_path(source, output_dir, output_format), output_format)
+    member, handle = _open_export(source, timeout)
+    try:
+        with handle, member:
+            chunks = iter_export(member, columns=ICEWS_SOURCE_COLUMNS, chunksize=chunk_rows)
+            for icews_chunk in adapt_gdelt_chunks(_unique_chunks(chunks, counts)):
+                writer.write(icews_chunk)
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+
+    return {
+        'name': os.path.basename(writer.path),
+        'rows_in': counts['rows_in'],
+        'rows_out': writer.rows,
+        'seconds': time.time() - started,
+        'peak_rss': _peak_rss(),
+    }
+
+
+def _peak_rss():
+    """Peak resident memory of this process in bytes, where the platform reports it."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def run_conversion(sources, output_dir, output_format='tsv', workers=DEFAULT_WORKERS,
+                   chunk_rows=DEFAULT_CHUNKSIZE, overwrite=False, timeout=DEFAULT_TIMEOUT):
+    """
+    Converts export zips to ICEWS shards across a process pool.
+
+    Args:
+        sources (list): Local zip paths and/or SliceFile entries
+        output_dir (str): Directory of the shards
+        output_format (str): Key of OUTPUT_FORMATS
+        workers (int): Number of worker processes
+        chunk_rows (int): Rows per chunk in each worker
+        overwrite (bool): Convert inputs whose shard already exists again
+        timeout (float or tuple): Per-request timeout for downloads
+
+    Returns:
+        dict: Summary with counts of files done, skipped and failed, rows
+            read and written, seconds, rows/sec and the largest worker peak
+            memory
+    """
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {list(OUTPUT_FORMATS)}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    pending = [source for source in sources
+               if overwrite or not os.path.exists(shard_path(source, output_dir, output_format))]
+    summary = {
+        'files': len(sources),
+        'skipped': len(sources) - len(pending),
+        'done': 0,
+        'failed': 0,
+        'rows_in': 0,
+        'rows_out': 0,
+        'peak_rss': None,
+    }
+    print(f"Convert: {len(sources)} files, {summary['skipped']} already converted, "
+          f"{len(pending)} to convert with {workers} workers")
+
+    started = time.time()
+    if pending:
+        # Fresh worker processes now and then return the memory of large files
+        # to the system; the option needs Python 3.11, older versions keep
+        # their workers for the whole run
+        pool_options = {'max_tasks_per_child': TASKS_PER_WORKER} if sys.version_info >= (3, 11) else {}
+        with ProcessPoolExecutor(max_workers=workers, **pool_options) as executor:
+            futures = {
+                executor.submit(convert_file, source, output_dir, output_format, chunk_rows, timeout): source
+                for source in pending
+            }
+            for future in as_completed(futures):
+                source = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    summary['failed'] += 1
+                    name = source.url if isinstance(source, SliceFile) else source
+                    print(f"Error converting file {name}: {e}")
+                    continue
+
+                summary['done'] += 1
+                summary['rows_in'] += result['rows_in']
+                summary['rows_out'] += result['rows_out']
+                if result['peak_rss'] is not None:
+                    summary['peak_rss'] = max(summary['peak_rss'] or 0, result['peak_rss'])
+                elapsed = time.time() - started
+                print(f"[{summary['done'] + summary['failed']}/{len(pending)}] {result['name']}: "
+                      f"{result['rows_out']} events in {result['seconds']:.2f}s "
+                      f"(overall {summary['rows_out'] / max(elapsed, 1e-9):,.0f} rows/s)", flush=True)
+
+    summary['seconds'] = round(time.time() - started, 2)
+    summary['rows_per_second'] = round(summary['rows_out'] / max(summary['seconds'], 1e-9))
+    return summary
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Convert GDELT export zips to ICEWS format without the app.")
+    parser.add_argument('inputs', nargs='*',
+                        help="Export zips, directories of them or glob patterns; omit to use --start/--end")
+    parser.add_argument('--start', type=parse_time, default=None,
+                        help="First slice time (UTC); filters the inputs, or lists slices from --source")
+    parser.add_argument('--end', type=parse_time, default=None, help="Slice time to stop before (UTC)")
+    parser.add_argument('--source', default=MASTERFILELIST_URL,
+                        help="masterfilelist.txt URL or local path, used when no inputs are given")
+    parser.add_argument('--output', default='icews_data', help="Output directory for the shards")
+    parser.add_argument('--format', choices=list(OUTPUT_FORMATS), default='tsv',
+                        help="tsv: ICEWS tab-delimited layout; parquet: every adapted column")
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help="Number of worker processes")
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNKSIZE,
+                        help="Rows each worker parses and adapts at a time (bounds its memory)")
+    parser.add_argument('--overwrite', action='store_true', help="Convert again inputs that already have a shard")
+    args = parser.parse_args(argv)
+
+    if (args.start is None) != (args.end is None):
+        parser.error("--start and --end go together")
+    if args.start is not None and args.end <= args.start:
+        parser.error("--end must be after --start")
+
+    if args.inputs:
+        sources = find_inputs(args.inputs)
+        if args.start is not None:
+            sources = [path for path in sources
+                       if slice_time(path) is not None and args.start <= slice_time(path) < args.end]
+    elif args.start is not None:
+        sources = list_export_slices(args.start, args.end, source=args.source)
+    else:
+        parser.error("give input zips, directories or patterns, or --start and --end")
+
+    if not sources:
+        print("No export zips to convert")
+        return 1
+
+    summary = run_conversion(sources, args.output, output_format=args.format, workers=args.workers,
+                             chunk_rows=args.chunk_rows, overwrite=args.overwrite)
+    peak = f", peak worker memory {summary['peak_rss'] / 2**20:.0f} MiB" if summary['peak_rss'] else ""
+    print(f"Done: {summary['done']} files, {summary['rows_in']} GDELT rows in, {summary['rows_out']} events out, "
+          f"{summary['failed']} failed, {summary['skipped']} skipped in {summary['seconds']}s "
+          f"({summary['rows_per_second']:,} rows/s{peak})")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import contextlib
+import datetime
+import os
+import threading
+
+import numpy as np
+
+# One sorted ID array per day of slices: ids-YYYYMMDD.npy
+BUCKET_PREFIX = 'ids-'
+BUCKET_FORMAT = '%Y%m%d'
+# Lock file serialising writers of one directory across processes
+LOCK_FILE = '.lock'
+
+DEFAULT_RETENTION = datetime.timedelta(days=30)
+DEFAULT_MAX_IDS = 20_000_000  # 8 bytes each, ~160MB
+DEFAULT_BLOOM_HASHES = 4
+
+# Odd 64-bit multipliers for the Bloom filter's multiplicative hashes
+_BLOOM_MULTIPLIERS = np.array([
+    0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93,
+    0xFF51AFD7ED558CCD, 0xC4CEB9FE1A85EC53, 0x94D049BB133111EB, 0xBF58476D1CE4E5B9,
+], dtype=np.uint64)
+
+
+def _lock_file(handle):
+    """Blocks until this process holds an exclusive lock on an open file."""
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(handle):
+    try:
+        import fcntl
+    except ImportError:
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+class DedupIndex:
+    """
+    Persistent record of the GlobalEventIDs already emitted.
+
+    IDs are kept as one sorted uint64 array per day, so a batch is checked
+    with a single vectorised binary search per day and memory is 8 bytes per
+    ID. Days older than the retention period (counted back from the newest
+    day held, so backfills of old data are not expired on arrival) are
+    dropped, and the oldest days are also dropped once max_ids is exceeded,
+    which bounds memory however many IDs have been seen. An optional Bloom
+    filter in front lets most new IDs skip the binary search altogether.
+
+    Arrays are saved with numpy under directory on flush(). Several
+    processes (e.g. the app and ingestor.py) may share a directory: flush()
+    takes a lock file and merges in what other processes wrote before saving,
+    and locked() holds that lock around a check-then-record sequence so no
+    two processes emit the same ID.
+
+    Args:
+        directory (str): Directory holding the per-day ID files
+        retention (datetime.timedelta): How long IDs are remembered
+        max_ids (int): Upper bound on IDs held in memory
+        bloom_bits (int): Size of the Bloom filter in bits (rounded up to a
+            power of two); 0 disables it
+        bloom_hashes (int): Number of Bloom filter hash functions (at most 8)
+    """
+
+    def __init__(self, directory, retention=DEFAULT_RETENTION, max_ids=DEFAULT_MAX_IDS,
+                 bloom_bits=0, bloom_hashes=DEFAULT_BLOOM_HASHES):
+        self.directory = directory
+        self.retention = retention
+        self.max_ids = max_ids
+        self._buckets = {}
+        self._dirty = set()
+        # (mtime, inode) of each day file as last read or written
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._file_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_handle = None
+
+        self._bloom = None
+        if bloom_bits:
+            self._bloom_shift = np.uint64(64 - max(3, int(bloom_bits - 1).bit_length()))
+            self._bloom = np.zeros(1 << (64 - int(self._bloom_shift) - 3), dtype=np.uint8)
+            self._bloom_multipliers = _BLOOM_MULTIPLIERS[:max(1, min(bloom_hashes, len(_BLOOM_MULTIPLIERS)))]
+
+        os.makedirs(directory, exist_ok=True)
+        self._sync()
+
+    # Persistence
+
+    def _path(self, day):
+        return os.path.join(self.directory, f"{BUCKET_PREFIX}{day.strftime(BUCKET_FORMAT)}.npy")
+
+    def _sync(self):
+        """Merges day files written by other processes since they were last read."""
+        changed = False
+        for name in os.listdir(self.directory):
+            if not (name.startswith(BUCKET_PREFIX) and name.endswith('.npy')):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                day = datetime.datetime.strptime(name[len(BUCKET_PREFIX):-4], BUCKET_FORMAT).date()
+                status = os.stat(path)
+                version = (status.st_mtime_ns, status.st_ino)
+                if self._versions.get(day) == version:
+                    continue
+                ids = np.load(path)
+            except (OSError, ValueError) as e:
+                print(f"Error loading dedup index file {name}: {e}")
+                continue
+            with self._lock:
+                known = self._buckets.get(day)
+                self._buckets[day] = ids if known is None else np.union1d(known, ids)
+                self._versions[day] = version
+            changed = True
+        if changed:
+            with self._lock:
+                self._expire()
+                self._rebuild_bloom()
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Holds the directory's lock file, after merging other processes' writes.
+
+        Wrap an unseen() check, the write of the unseen events and their
+        add() and flush() in it, so another process sharing the directory
+        cannot emit the same IDs in between. Re-entrant within a process.
+        """
+        with self._file_lock:
+            if self._lock_depth == 0:
+                self._lock_handle = open(os.path.join(self.directory, LOCK_FILE), 'a+b')
+                _lock_file(self._lock_handle)
+            self._lock_depth += 1
+            try:
+                if self._lock_depth == 1:
+                    self._sync()
+                yield self
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    _unlock_file(self._lock_handle)
+                    self._lock_handle.close()
+                    self._lock_handle = None
+
+    def flush(self):
+        """Writes the days changed since the last flush, merged with the files on disk."""
+        with self.locked(), self._lock:
+            for day in sorted(self._dirty):
+                if day not in self._buckets:
+                    continue
+                path = self._path(day)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, 'wb') as f:
+                    np.save(f, self._buckets[day])
+                os.replace(tmp_path, path)
+                status = os.stat(path)
+                self._versions[day] = (status.st_mtime_ns, status.st_ino)
+            self._dirty.clear()
+
+    # Bloom filter
+
+    def _bloom_positions(self, ids):
+        """Returns a (hashes, len(ids)) array of bit positions."""
+        return (ids[np.newaxis, :] * self._bloom_multipliers[:, np.newaxis]) >> self._bloom_shift
+
+    def _bloom_add(self, ids):
+        positions = self._bloom_positions(ids).ravel()
+        np.bitwise_or.at(self._bloom, positions >> np.uint64(3),
+                         (1 << (positions & np.uint64(7))).astype(np.uint8))
+
+    def _bloom_maybe(self, ids):
+        positions = self._bloom_positions(ids)
+        bits = self._bloom[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8)
+        return np.all(bits & 1, axis=0)
+
+    def _rebuild_bloom(self):
+        if self._bloom is None:
+            return
+        self._bloom[:] = 0
+        for ids in self._buckets.values():
+            if len(ids):
+                self._bloom_add(ids)
+
+    # Expiry
+
+    def _expire(self):
+        """Drops days past the retention period or beyond max_ids (lock held)."""
+        if not self._buckets:
+            return False
+        cutoff = max(self._buckets) - self.retention
+        expired = [day for day in self._buckets if day < cutoff]
+
+        total = sum(len(ids) for day, ids in self._buckets.items() if day >= cutoff)
+        for day in sorted(day for day in self._buckets if day >= cutoff):
+            if total <= self.max_ids:
+                break
+            expired.append(day)
+            total -= len(self._buckets[day])
+
+        for day in expired:
+            del self._buckets[day]
+            self._dirty.discard(day)
+            self._versions.pop(day, None)
+            try:
+                os.remove(self._path(day))
+            except OSError:
+                pass
+        return bool(expired)
+
+    # Lookups
+
+    def unseen(self, ids):
+        """
+        Flags the IDs that have not been recorded yet.
+
+        Repeated IDs within the batch are flagged only at their first position,
+        so the mask can be used directly to drop duplicates.
+
+        Args:
+            ids (array-like): GlobalEventIDs
+
+        Returns:
+            numpy.ndarray: Boolean mask, True for IDs to emit
+        """
+        ids = np.asarray(ids, dtype=np.uint64)
+        mask = np.zeros(len(ids), dtype=bool)
+        if not len(ids):
+            return mask
+        _, first = np.unique(ids, return_index=True)
+        mask[first] = True
+
+        with self._lock:
+            candidates = np.flatnonzero(mask)
+            if self._bloom is not None:
+                candidates = candidates[self._bloom_maybe(ids[candidates])]
+            for known in self._buckets.values():
+                if not len(candidates) or not len(known):
+                    continue
+                values = ids[candidates]
+                positions = np.minimum(np.searchsorted(known, values), len(known) - 1)
+                found = known[positions] == values
+                mask[candidates[found]] = False
+                candidates = candidates[~found]
+        return mask
+
+    def add(self, ids, when):
+        """
+        Records IDs as emitted.
+
+        Args:
+            ids (array-like): GlobalEventIDs
+            when (datetime.datetime): Slice time the IDs belong to; sets the
+                day they expire with
+        """
+        ids = np.unique(np.asarray(ids, dtype=np.uint64))
+        if not len(ids):
+            return
+        day = when.date() if isinstance(when, datetime.datetime) else when
+        with self._lock:
+            known = self._buckets.get(day)
+            self._buckets[day] = ids if known is None else np.union1d(known, ids)
+            self._dirty.add(day)
+            if self._bloom is not None:
+                self._bloom_add(ids)
+            if self._expire():
+                self._rebuild_bloom()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(ids) for ids in self._buckets.values())
+
+    def stats(self):
+        """
+        Summarises the index contents.
+
+        Returns:
+            dict: Days held, IDs held, bytes used and the oldest/newest day
+        """
+        with self._lock:
+            days = sorted(self._buckets)
+            return {
+                'days': len(days),
+                'ids': sum(len(ids) for ids in self._buckets.values()),
+                'bytes': sum(ids.nbytes for ids in self._buckets.values())
+                         + (self._bloom.nbytes if self._bloom is not None else 0),
+                'oldest': days[0].isoformat() if days else None,
+                'newest': days[-1].isoformat() if days else None,
+            }
@@ -0,0 +1,327 @@
+import datetime
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import metrics
+
+# Directory holding lastupdate.txt, masterfilelist.txt and the slice files;
+# point GDELT_BASE_URL at a mirror such as mirror_server.py to work offline
+DEFAULT_BASE_URL = "http://data.gdeltproject.org/gdeltv2"
+GDELT_BASE_URL = os.environ.get('GDELT_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+LASTUPDATE_URL = f"{GDELT_BASE_URL}/lastupdate.txt"
+MASTERFILELIST_URL = f"{GDELT_BASE_URL}/masterfilelist.txt"
+
+# Slice files are named <YYYYMMDDHHMMSS>.<kind>, e.g. 20250101001500.export.CSV.zip
+SLICE_ID_FORMAT = '%Y%m%d%H%M%S'
+
+# Download defaults
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_TIMEOUT = (10, 120)  # (connect, read) seconds
+DEFAULT_MAX_INFLIGHT_BYTES = 256 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+# One line of lastupdate.txt / masterfilelist.txt: "<size> <md5> <url>"
+SliceFile = namedtuple('SliceFile', ['size', 'md5', 'url'])
+
+# Outcome of a single download; content is None when error is set
+DownloadResult = namedtuple('DownloadResult', ['url', 'content', 'error'])
+
+
+class ByteBudget:
+    """
+    Caps the number of bytes that concurrent downloads may hold at once.
+
+    A reservation larger than the whole budget is clamped to the budget, so a
+    single oversized file still proceeds (alone) instead of deadlocking.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, nbytes):
+        nbytes = min(max(nbytes, 0), self.limit)
+        with self._cond:
+            while self.used > 0 and self.used + nbytes > self.limit:
+                self._cond.wait()
+            self.used += nbytes
+        return nbytes
+
+    def release(self, nbytes):
+        with self._cond:
+            self.used -= nbytes
+            self._cond.notify_all()
+
+
+def create_session(max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Creates a requests session whose connection pool fits the worker count.
+
+    Args:
+        max_workers (int): Number of threads that will share the session
+
+    Returns:
+        requests.Session: Session with keep-alive connection pooling
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def parse_update_list(text):
+    """
+    Parses the contents of lastupdate.txt or masterfilelist.txt.
+
+    Args:
+        text (str): Raw file listing, one "<size> <md5> <url>" entry per line
+
+    Returns:
+        list: SliceFile entries in listing order
+    """
+    entries = []
+    for line in text.strip().split('\n'):
+        parts = line.split()
+        if len(parts) >= 3:
+            try:
+                size = int(parts[0])
+            except ValueError:
+                size = None
+            entries.append(SliceFile(size, parts[1], parts[2]))
+    return entries
+
+
+def slice_id(url):
+    """
+    Extracts the slice timestamp string from a GDELT slice file URL.
+
+    Args:
+        url (str): Slice file URL or file name
+
+    Returns:
+        str: YYYYMMDDHHMMSS slice ID, or None if the name does not carry one
+    """
+    name = url.rsplit('/', 1)[-1]
+    stamp = name.split('.', 1)[0]
+    if len(stamp) == 14 and stamp.isdigit():
+        return stamp
+    return None
+
+
+def slice_time(url):
+    """
+    Returns the publication time encoded in a slice file URL.
+
+    Args:
+        url (str): Slice file URL or file name
+
+    Returns:
+        datetime.datetime: Slice timestamp (UTC), or None if not a slice file
+    """
+    stamp = slice_id(url)
+    if stamp is None:
+        return None
+    return datetime.datetime.strptime(stamp, SLICE_ID_FORMAT)
+
+
+def slice_ids_between(after, until):
+    """
+    Lists the 15-minute slice IDs published after one slice and up to a time.
+
+    GDELT names slices by the start of their 15-minute slot, so the IDs can be
+    generated without reading masterfilelist.txt.
+
+    Args:
+        after (datetime.datetime): Exclusive lower bound (UTC)
+        until (datetime.datetime): Inclusive upper bound (UTC)
+
+    Returns:
+        list: YYYYMMDDHHMMSS slice IDs in time order
+    """
+    step = datetime.timedelta(minutes=15)
+    current = after.replace(minute=after.minute - after.minute % 15, second=0, microsecond=0) + step
+    ids = []
+    while current <= until:
+        ids.append(current.strftime(SLICE_ID_FORMAT))
+        current += step
+    return ids
+
+
+def slice_url(base_url, stamp, kind='export.CSV.zip'):
+    """
+    Builds the URL of a slice file from its ID.
+
+    Args:
+        base_url (str): Directory URL of the slice files, e.g. the lastupdate.txt
+            URL with its file name removed
+        stamp (str): YYYYMMDDHHMMSS slice ID
+        kind (str): File kind suffix
+
+    Returns:
+        str: Slice file URL
+    """
+    return f"{base_url.rstrip('/')}/{stamp}.{kind}"
+
+
+def iter_file_list(source=MASTERFILELIST_URL, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Streams entries of a GDELT file listing without holding it in memory.
+
+    masterfilelist.txt lists every slice since 2015 and runs to hundreds of
+    megabytes, so it is read line by line.
+
+    Args:
+        source (str): URL or local path of the listing (e.g. a local mirror)
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout
+
+    Yields:
+        SliceFile: One entry per well-formed line
+    """
+    if os.path.exists(source):
+        with open(source, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                entries = parse_update_list(line)
+                if entries:
+                    yield entries[0]
+        return
+
+    session = session or create_session(1)
+    with session.get(source, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        for line in response.iter_lines(chunk_size=CHUNK_SIZE, decode_unicode=True):
+            if line:
+                entries = parse_update_list(line)
+                if entries:
+                    yield entries[0]
+
+
+def fetch_update_list(url=LASTUPDATE_URL, session=None, timeout=DEFAULT_TIMEOUT):
+    """
+    Downloads and parses a GDELT file listing.
+
+    Args:
+        url (str): URL of lastupdate.txt or masterfilelist.txt
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout
+
+    Returns:
+        list: SliceFile entries in listing order
+    """
+    session = session or create_session(1)
+    response = session.get(url, timeout=timeout)
+    response.raise_for_status()
+    return parse_update_list(response.text)
+
+
+def _download_one(session, item, timeout, budget, cache):
+    """Downloads one URL while holding a byte-budget reservation."""
+    if isinstance(item, SliceFile):
+        url, size_hint = item.url, item.size
+    else:
+        url, size_hint, cache = item, None, None
+
+    if cache is not None:
+        content = cache.get(item)
+        if content is not None:
+            metrics.count('downloads', source='cache')
+            return DownloadResult(url, content, None)
+
+    reserved = 0
+    try:
+        if size_hint:
+            reserved = budget.acquire(size_hint)
+        with session.get(url, stream=True, timeout=timeout) as response:
+            response.raise_for_status()
+            if not reserved:
+                length = int(response.headers.get('Content-Length') or 0)
+                reserved = budget.acquire(length or budget.limit)
+            buffer = bytearray()
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                buffer.extend(chunk)
+        content = bytes(buffer)
+        metrics.count('downloads', source='network')
+        metrics.count('bytes_downloaded', len(content))
+        if cache is not None and not cache.put(item, content):
+            if item.md5:
+                raise ValueError(f"MD5 mismatch for {url}, expected {item.md5}")
+            raise ValueError(f"Incomplete or corrupt zip from {url}")
+        return DownloadResult(url, content, None)
+    except Exception as e:
+        return DownloadResult(url, None, e)
+    finally:
+        if reserved:
+            budget.release(reserved)
+
+
+def download_files(files, max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT,
+                   max_inflight_bytes=DEFAULT_MAX_INFLIGHT_BYTES, session=None, cache=None):
+    """
+    Downloads a list of files concurrently over a pooled session.
+
+    Wall-clock time is bounded by the slowest download rather than the sum of
+    all of them. Failures are reported per file instead of aborting the batch.
+
+    Args:
+        files (list): URLs (str) or SliceFile entries; listed sizes are used
+            to reserve the byte budget before the request is sent
+        max_workers (int): Number of concurrent downloads
+        timeout (float or tuple): Per-request timeout passed to requests
+        max_inflight_bytes (int): Upper bound on bytes being downloaded at once
+        session (requests.Session): Optional session to reuse
+        cache (slice_cache.SliceCache): Optional cache consulted before any
+            request is sent; SliceFile downloads are verified against their
+            listed MD5 and stored in it
+
+    Returns:
+        list: DownloadResult entries in the same order as files
+    """
+    if not files:
+        return []
+
+    session = session or create_session(max_workers)
+    budget = ByteBudget(max_inflight_bytes)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(files))) as executor:
+        futures = [
+            executor.submit(_download_one, session, item, timeout, budget, cache)
+            for item in files
+        ]
+        return [future.result() for future in futures]
+
+
+def fetch_latest_files(kinds=None, url=LASTUPDATE_URL, max_workers=DEFAULT_MAX_WORKERS,
+                       timeout=DEFAULT_TIMEOUT, max_inflight_bytes=DEFAULT_MAX_INFLIGHT_BYTES,
+                       session=None, cache=None):
+    """
+    Downloads the files named in lastupdate.txt concurrently.
+
+    Args:
+        kinds (list): File suffixes to keep, e.g. ['.export.CSV.zip',
+            '.mentions.CSV.zip']; None keeps every listed file
+        url (str): URL of lastupdate.txt
+        max_workers (int): Number of concurrent downloads
+        timeout (float or tuple): Per-request timeout
+        max_inflight_bytes (int): Upper bound on bytes being downloaded at once
+        session (requests.Session): Optional session to reuse
+        cache (slice_cache.SliceCache): Optional local slice cache
+
+    Returns:
+        list: (SliceFile, DownloadResult) pairs in listing order
+    """
+    session = session or create_session(max_workers)
+    entries = fetch_update_list(url, session=session, timeout=timeout)
+    if kinds is not None:
+        entries = [e for e in entries if e.url.endswith(tuple(kinds))]
+
+    results = download_files(entries, max_workers=max_workers, timeout=timeout,
+                             max_inflight_bytes=max_inflight_bytes, session=session,
+                             cache=cache)
+    return list(zip(entries, results))
@@ -0,0 +1,373 @@
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from downloader import DEFAULT_TIMEOUT, CHUNK_SIZE, create_session, slice_url
+from gdelt_schema import (
+    MENTIONS_COLUMNS, MENTIONS_DTYPES, GKG_COLUMNS, GKG_DTYPES, DEFAULT_CHUNKSIZE,
+    iter_table, parse_dateadded,
+)
+from streaming import open_zip_member
+
+# File kinds published with every export slice
+MENTIONS_KIND = 'mentions.CSV.zip'
+GKG_KIND = 'gkg.csv.zip'
+
+# Mentions and GKG columns read for the joins
+MENTION_SOURCE_COLUMNS = ['GlobalEventID', 'EventTimeDate', 'MentionTimeDate', 'MentionSourceName', 'Confidence']
+GKG_SOURCE_COLUMNS = ['GKGRECORDID', 'DocumentIdentifier', 'Themes', 'V2Tone']
+
+# Columns added to the ICEWS frame
+MENTION_FEATURES = ['mention_count', 'mention_sources', 'mention_confidence', 'first_mention_delay']
+GKG_FEATURES = ['gkg_record_id', 'gkg_tone', 'gkg_word_count', 'gkg_themes']
+
+# Dtype of each added column, used to null-fill the columns of a join that failed
+FEATURE_DTYPES = {
+    'mention_count': 'Int32', 'mention_sources': 'Int32',
+    'mention_confidence': 'float32', 'first_mention_delay': 'float32',
+    'gkg_record_id': 'string', 'gkg_tone': 'float32', 'gkg_word_count': 'Int32', 'gkg_themes': 'string',
+}
+
+# Mentions rows per chunk; GKG rows are far wider, so fewer of them per chunk
+MENTIONS_CHUNKSIZE = DEFAULT_CHUNKSIZE
+GKG_CHUNKSIZE = 20000
+
+# Distinct (event, source) pairs held before they are deduplicated again
+PAIR_COMPACTION_THRESHOLD = 1000000
+
+
+class MentionJoin:
+    """
+    Streaming hash join of GDELT mentions onto an ICEWS frame.
+
+    The build side is the ICEWS frame: a hash index from event ID to row
+    position. Mentions chunks are probed against it one at a time and
+    folded into per-event accumulators, so memory is bounded by the size of
+    the frame plus one chunk, however many mentions are streamed. Mentions of
+    events outside the frame (GDELT keeps reporting mentions of older events)
+    are discarded as they arrive.
+
+    Per event the join produces the number of mentions, the number of
+    distinct mentioning sources, the mean confidence (10-100) and the delay
+    in minutes between the event and its first mention.
+
+    Args:
+        icews_df (pandas.DataFrame): Events in ICEWS format
+    """
+
+    def __init__(self, icews_df):
+        ids = icews_df['event_id'].to_numpy(dtype='int64', na_value=-1)
+        # Accumulators are per distinct event ID; _keys maps every row to its ID
+        self._index = pd.Index(pd.unique(ids))
+        self._keys = self._index.get_indexer(ids)
+        size = len(self._index)
+        self._count = np.zeros(size, dtype=np.int64)
+        self._confidence_sum = np.zeros(size, dtype=np.float64)
+        self._confidence_count = np.zeros(size, dtype=np.int64)
+        self._first_delay = np.full(size, np.inf)
+        self._sources = pd.Index([], dtype=object)
+        self._pairs = []
+        self._pair_count = 0
+        self.rows_seen = 0
+        self.rows_matched = 0
+
+    def _source_codes(self, names):
+        """Maps source names to codes in a vocabulary that grows across chunks."""
+        codes, uniques = pd.factorize(names)
+        uniques = pd.Index(np.asarray(uniques, dtype=object))
+        self._sources = self._sources.append(uniques.difference(self._sources))
+        return self._sources.get_indexer(uniques)[codes]
+
+    def _compact_pairs(self):
+        pairs = np.unique(np.concatenate(self._pairs))
+        self._pairs = [pairs]
+        self._pair_count = len(pairs)
+
+    def add(self, chunk):
+        """
+        Probes one mentions chunk and accumulates the matches.
+
+        Args:
+            chunk (pandas.DataFrame): Mentions rows with MENTION_SOURCE_COLUMNS
+        """
+        self.rows_seen += len(chunk)
+        ids = chunk['GlobalEventID'].to_numpy(dtype='int64', na_value=-2)
+        rows = self._index.get_indexer(ids)
+        matched = rows >= 0
+        if not matched.any():
+            return
+        rows = rows[matched]
+        chunk = chunk[matched]
+        self.rows_matched += len(rows)
+        size = len(self._count)  # rows below are positions among the distinct event IDs
+
+        self._count += np.bincount(rows, minlength=size)
+
+        confidence = chunk['Confidence'].to_numpy(dtype='float64', na_value=np.nan)
+        rated = ~np.isnan(confidence)
+        self._confidence_sum += np.bincount(rows[rated], weights=confidence[rated], minlength=size)
+        self._confidence_count += np.bincount(rows[rated], minlength=size)
+
+        delay = (parse_dateadded(chunk['MentionTimeDate']) - parse_dateadded(chunk['EventTimeDate']))
+        delay = (delay.dt.total_seconds() / 60).to_numpy(dtype='float64', na_value=np.nan)
+        timed = ~np.isnan(delay)
+        np.minimum.at(self._first_delay, rows[timed], delay[timed])
+
+        named = chunk['MentionSourceName'].notna().to_numpy()
+        if named.any():
+            sources = self._source_codes(chunk['MentionSourceName'][named])
+            pairs = np.unique((rows[named].astype(np.int64) << 32) | sources.astype(np.int64))
+            self._pairs.append(pairs)
+            self._pair_count += len(pairs)
+            if self._pair_count > PAIR_COMPACTION_THRESHOLD:
+                self._compact_pairs()
+
+    def result(self):
+        """
+        Returns the mention aggregates, one row per ICEWS row.
+
+        Returns:
+            pandas.DataFrame: MENTION_FEATURES columns, positionally aligned
+                with the ICEWS frame; events never mentioned get a count of 0
+                and missing confidence and delay
+        """
+        size = len(self._count)
+        if self._pairs:
+            self._compact_pairs()
+            sources = np.bincount((self._pairs[0] >> 32).astype(np.int64), minlength=size)
+        else:
+            sources = np.zeros(size, dtype=np.int64)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            confidence = self._confidence_sum / self._confidence_count
+        keys = self._keys
+        return pd.DataFrame({
+            'mention_count': self._count[keys].astype(np.int32),
+            'mention_sources': sources[keys].astype(np.int32),
+            'mention_confidence': np.where(self._confidence_count > 0, confidence, np.nan)[keys].astype(np.float32),
+            'first_mention_delay': np.where(np.isinf(self._first_delay), np.nan,
+                                            self._first_delay)[keys].astype(np.float32),
+        })
+
+
+class GkgJoin:
+    """
+    Streaming hash join of GKG records onto an ICEWS frame.
+
+    GKG records describe articles, so they join on the article URL: GKG
+    DocumentIdentifier against the events' source_url. The build side is a
+    hash index over the distinct source URLs of the frame; GKG chunks are
+    probed against it one at a time and only the fields of matching records
+    are kept, per URL. Memory is bounded by the number of distinct URLs plus
+    one chunk, so GKG files of any size can be streamed through it.
+
+    Per event the join produces the GKG record ID, the article tone and word
+    count (from V2Tone) and the article themes.
+
+    Args:
+        icews_df (pandas.DataFrame): Events in ICEWS format
+    """
+
+    def __init__(self, icews_df):
+        codes, urls = pd.factorize(icews_df['source_url'])
+        self._codes = codes
+        self._index = pd.Index(np.asarray(urls, dtype=object))
+        size = len(self._index)
+        self._record_id = np.full(size, None, dtype=object)
+        self._themes = np.full(size, None, dtype=object)
+        self._tone = np.full(size, np.nan, dtype=np.float32)
+        self._word_count = np.full(size, -1, dtype=np.int64)
+        self.rows_seen = 0
+        self.rows_matched = 0
+
+    def add(self, chunk):
+        """
+        Probes one GKG chunk and keeps the matching records.
+
+        Args:
+            chunk (pandas.DataFrame): GKG rows with GKG_SOURCE_COLUMNS
+        """
+        self.rows_seen += len(chunk)
+        urls = self._index.get_indexer(chunk['DocumentIdentifier'])
+        matched = urls >= 0
+        if not matched.any():
+            return
+        urls = urls[matched]
+        chunk = chunk[matched]
+        self.rows_matched += len(urls)
+
+        # V2Tone: tone, positive, negative, polarity, activity density,
+        # self/group density, word count
+        tone = chunk['V2Tone'].str.split(',', expand=True)
+        self._tone[urls] = pd.to_numeric(tone[0], errors='coerce').to_numpy(dtype='float32', na_value=np.nan)
+        if tone.shape[1] > 6:
+            words = pd.to_numeric(tone[6], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            self._word_count[urls] = np.where(np.isnan(words), -1, words).astype(np.int64)
+        self._record_id[urls] = chunk['GKGRECORDID'].to_numpy(dtype=object)
+        self._themes[urls] = chunk['Themes'].str.strip(';').to_numpy(dtype=object)
+
+    def result(self):
+        """
+        Returns the GKG fields, one row per ICEWS row.
+
+        Returns:
+            pandas.DataFrame: GKG_FEATURES columns, positionally aligned with
+                the ICEWS frame; missing where no GKG record matched
+        """
+        codes = self._codes
+        present = codes >= 0
+        take = np.where(present, codes, 0)
+
+        def spread(values, missing):
+            out = values[take] if len(values) else np.full(len(codes), missing, dtype=values.dtype)
+            return np.where(present, out, missing)
+
+        word_count = spread(self._word_count, -1)
+        return pd.DataFrame({
+            'gkg_record_id': pd.Series(spread(self._record_id, None), dtype='string'),
+            'gkg_tone': spread(self._tone, np.nan).astype(np.float32),
+            'gkg_word_count': pd.Series(np.maximum(word_count, 0), dtype='Int32').mask(word_count < 0),
+            'gkg_themes': pd.Series(spread(self._themes, None), dtype='string'),
+        })
+
+
+def open_slice_file(url, session=None, timeout=DEFAULT_TIMEOUT, path=None):
+    """
+    Opens the CSV member of a slice zip as a stream.
+
+    A local path is read through zipfile; a URL is downloaded and inflated
+    on the fly, so neither is ever held in memory whole.
+
+    Args:
+        url (str): Slice file URL
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout
+        path (str): Local copy of the zip to read instead of downloading
+
+    Returns:
+        tuple: (binary reader, object to close when done)
+    """
+    if path is not None:
+        archive = zipfile.ZipFile(path)
+        return archive.open(archive.namelist()[0]), archive
+    session = session or create_session(1)
+    response = session.get(url, stream=True, timeout=timeout)
+    response.raise_for_status()
+    return open_zip_member(response.iter_content(chunk_size=CHUNK_SIZE)), response
+
+
+def stream_join(join, url, names, dtypes, columns, chunksize, session=None, timeout=DEFAULT_TIMEOUT,
+                path=None):
+    """
+    Streams one slice file through a join, chunk by chunk.
+
+    Args:
+        join (MentionJoin or GkgJoin): Join to feed
+        url (str): Slice file URL
+        names (list): Column names of the file
+        dtypes (dict): Column dtypes of the file
+        columns (list): Columns to parse
+        chunksize (int): Rows per chunk
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout
+        path (str): Local copy of the zip to read instead of downloading
+    """
+    reader, handle = open_slice_file(url, session=session, timeout=timeout, path=path)
+    try:
+        for chunk in iter_table(reader, names, dtypes, columns=columns, chunksize=chunksize):
+            join.add(chunk)
+    finally:
+        reader.close()
+        handle.close()
+
+
+def join_mentions(icews_df, sources, session=None, timeout=DEFAULT_TIMEOUT, chunksize=MENTIONS_CHUNKSIZE):
+    """
+    Adds per-event mention aggregates from one or more mentions files.
+
+    Args:
+        icews_df (pandas.DataFrame): Events in ICEWS format
+        sources (list): URLs of .mentions.CSV.zip files (or local paths)
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout
+        chunksize (int): Mentions rows per chunk
+
+    Returns:
+        pandas.DataFrame: icews_df with MENTION_FEATURES columns added
+    """
+    join = MentionJoin(icews_df)
+    for source in sources:
+        path = None if '://' in source else source
+        stream_join(join, source, MENTIONS_COLUMNS, MENTIONS_DTYPES, MENTION_SOURCE_COLUMNS, chunksize,
+                    session=session, timeout=timeout, path=path)
+    return icews_df.assign(**{column: values.to_numpy() for column, values in join.result().items()})
+
+
+def join_gkg(icews_df, sources, session=None, timeout=DEFAULT_TIMEOUT, chunksize=GKG_CHUNKSIZE):
+    """
+    Adds the GKG record of each event's source article from one or more GKG files.
+
+    Args:
+        icews_df (pandas.DataFrame): Events in ICEWS format
+        sources (list): URLs of .gkg.csv.zip files (or local paths)
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout
+        chunksize (int): GKG rows per chunk
+
+    Returns:
+        pandas.DataFrame: icews_df with GKG_FEATURES columns added
+    """
+    join = GkgJoin(icews_df)
+    for source in sources:
+        path = None if '://' in source else source
+        stream_join(join, source, GKG_COLUMNS, GKG_DTYPES, GKG_SOURCE_COLUMNS, chunksize,
+                    session=session, timeout=timeout, path=path)
+    return icews_df.assign(**{column: values.array for column, values in join.result().items()})
+
+
+def missing_features(icews_df, columns):
+    """Returns icews_df with the given feature columns added, all null."""
+    return icews_df.assign(**{
+        column: pd.array([None] * len(icews_df), dtype=FEATURE_DTYPES[column]) for column in columns
+    })
+
+
+def enrich_slice(icews_df, export_url, session=None, timeout=DEFAULT_TIMEOUT, mentions=True, gkg=True):
+    """
+    Joins the mentions and GKG files published with an export slice onto its events.
+
+    The two files sit next to the export file and share its slice ID. A file
+    that cannot be read is reported and its columns are added null-filled, so
+    every enriched slice has the same columns.
+
+    Args:
+        icews_df (pandas.DataFrame): Adapted events of the slice
+        export_url (str): URL of the slice's .export.CSV.zip
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout
+        mentions (bool): Join the mentions file
+        gkg (bool): Join the GKG file
+
+    Returns:
+        pandas.DataFrame: icews_df with the joined columns added
+    """
+    if icews_df is None or icews_df.empty:
+        return icews_df
+    base_url, name = export_url.rsplit('/', 1)
+    stamp = name.split('.', 1)[0]
+    session = session or create_session(1)
+    if mentions:
+        try:
+            icews_df = join_mentions(icews_df, [slice_url(base_url, stamp, MENTIONS_KIND)],
+                                     session=session, timeout=timeout)
+        except Exception as e:
+            print(f"Error joining mentions for slice {stamp}: {e}")
+            icews_df = missing_features(icews_df, MENTION_FEATURES)
+    if gkg:
+        try:
+            icews_df = join_gkg(icews_df, [slice_url(base_url, stamp, GKG_KIND)], session=session,
+                                timeout=timeout)
+        except Exception as e:
+            print(f"Error joining GKG records for slice {stamp}: {e}")
+            icews_df = missing_features(icews_df, GKG_FEATURES)
+    return icews_df
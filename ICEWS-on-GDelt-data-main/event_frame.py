@@ -0,0 +1,246 @@
+import threading
+import weakref
+
+import numpy as np
+
+from filter_index import FilterIndex
+from rollup import rollup_events
+from search_index import SearchIndex
+from spatial import SpatialIndex
+
+_registry = weakref.WeakValueDictionary()
+_registry_lock = threading.Lock()
+
+# Array attributes that hold the storage of pandas' extension arrays (masked
+# integers, categoricals, datetimes); Arrow-backed arrays are immutable already
+_STORAGE_ATTRIBUTES = ('_ndarray', '_data', '_mask', '_codes')
+
+
+def _freeze(df):
+    """
+    Marks the numpy arrays that store the columns of df read-only.
+
+    Goes through the frame's blocks, since a column fetched from a frame is a
+    view and flagging the view would leave the storage itself writable.
+    Writes into the frame in place then raise ValueError; copies (and
+    copy-on-write Series) are unaffected.
+    """
+    for block in df._mgr.blocks:
+        values = block.values
+        for array in (values, *(getattr(values, name, None) for name in _STORAGE_ATTRIBUTES)):
+            if isinstance(array, np.ndarray):
+                array.flags.writeable = False
+
+
+class EventFrame:
+    """
+    One immutable event frame and everything derived from it.
+
+    The frame is shared, never copied: every tab and every session showing
+    the same events reads the same object, and the indexes over it (spatial
+    grid, search, filters, rollup cube, map labels) are built once, on first
+    use, and then shared as well. Row subsets are EventView objects that hold
+    row positions instead of copied rows, so a tab only allocates the few
+    columns it actually materialises.
+
+    Use shared_frame() rather than the constructor so that all sessions get
+    the same instance for the same frame.
+
+    The arrays behind df are made read-only, so code writing into the shared
+    frame (directly or through a view) fails loudly instead of changing what
+    every other session sees.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format; no longer writable afterwards
+    """
+
+    def __init__(self, df):
+        _freeze(df)
+        self.df = df
+        self._derived = {}
+        # Re-entrant: some derived objects are built from others
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.df)
+
+    def _derive(self, name, build):
+        """Returns a derived object, building it once."""
+        with self._lock:
+            if name not in self._derived:
+                self._derived[name] = build()
+            return self._derived[name]
+
+    @property
+    def spatial(self):
+        """SpatialIndex over the events with coordinates."""
+        return self._derive('spatial', lambda: SpatialIndex(self.df))
+
+    @property
+    def search_index(self):
+        """SearchIndex over actor names and locations."""
+        return self._derive('search_index', lambda: SearchIndex(self.df))
+
+    @property
+    def filter_index(self):
+        """FilterIndex over the Data Explorer filter columns."""
+        return self._derive('filter_index', lambda: FilterIndex(self.df))
+
+    @property
+    def rollup(self):
+        """Rollup cube of every event, see rollup.rollup_events."""
+        return self._derive('rollup', lambda: rollup_events(self.df))
+
+    def view(self, positions=None):
+        """
+        Returns a view of some rows.
+
+        Args:
+            positions (numpy.ndarray): Row positions, or None for every row
+
+        Returns:
+            EventView: The rows, without copying them
+        """
+        return EventView(self, positions)
+
+    def located(self):
+        """Returns a view of the events with coordinates, in frame order."""
+        return self.view(self.spatial.positions)
+
+    def location_labels(self):
+        """
+        Returns the map selector label of every event with coordinates.
+
+        Returns:
+            numpy.ndarray: One label per row of located(), truncated to 80 characters
+        """
+        def build():
+            points = self.located()
+            labels = (points.column('event_type').astype(str) + ": "
+                      + points.column('source_name').astype(str) + " → "
+                      + points.column('target_name').astype(str) + " in "
+                      + points.column('location').astype(str))
+            long_labels = labels.str.len() > 80
+            labels = labels.where(~long_labels, labels.str.slice(0, 77) + "...")
+            return labels.to_numpy(dtype=object)
+        return self._derive('location_labels', build)
+
+
+class EventView:
+    """
+    A read-only selection of rows of an EventFrame.
+
+    Holds row positions only. Columns are materialised on request, for the
+    selected rows alone. The view supports the parts of the DataFrame
+    interface that the table renderer and the exporter use (len, empty,
+    columns, column access and take), so it can be passed where a filtered
+    frame was passed before.
+
+    Args:
+        frame (EventFrame): Frame the rows belong to
+        positions (numpy.ndarray): Row positions, or None for every row
+    """
+
+    def __init__(self, frame, positions=None):
+        self.frame = frame
+        self.positions = None if positions is None else np.asarray(positions, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.frame) if self.positions is None else len(self.positions)
+
+    @property
+    def empty(self):
+        return len(self) == 0
+
+    @property
+    def columns(self):
+        return self.frame.df.columns
+
+    def column(self, name):
+        """
+        Returns one column for the rows of the view.
+
+        Args:
+            name (str): Column name
+
+        Returns:
+            pandas.Series: The shared column itself when the view holds every
+                row, otherwise only the selected values, indexed 0..n-1
+        """
+        series = self.frame.df[name]
+        if self.positions is None:
+            return series
+        return series.take(self.positions).reset_index(drop=True)
+
+    def __getitem__(self, name):
+        if isinstance(name, str):
+            return self.column(name)
+        return self.select(name)
+
+    def select(self, columns):
+        """
+        Materialises some columns for the rows of the view.
+
+        Args:
+            columns (list): Column names
+
+        Returns:
+            pandas.DataFrame: Only those columns, indexed 0..n-1
+        """
+        df = self.frame.df[list(columns)]
+        return df if self.positions is None else df.take(self.positions).reset_index(drop=True)
+
+    def take(self, rows):
+        """
+        Materialises some rows of the view.
+
+        Args:
+            rows (array-like): Positions within the view
+
+        Returns:
+            pandas.DataFrame: Every column of those rows
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        return self.frame.df.take(rows if self.positions is None else self.positions[rows])
+
+    def row(self, i):
+        """Returns row i of the view as a Series."""
+        return self.frame.df.iloc[i if self.positions is None else int(self.positions[i])]
+
+    def where(self, mask):
+        """
+        Narrows the view with a boolean mask over its rows.
+
+        Args:
+            mask (numpy.ndarray): One flag per row of the view; None keeps every row
+
+        Returns:
+            EventView: The rows where mask is true
+        """
+        if mask is None:
+            return self
+        rows = np.flatnonzero(mask)
+        return EventView(self.frame, rows if self.positions is None else self.positions[rows])
+
+
+def shared_frame(df):
+    """
+    Returns the process-wide EventFrame for a frame.
+
+    Every caller passing the same frame object gets the same EventFrame, so
+    indexes are built once per frame rather than once per session. The
+    registry holds EventFrames weakly: one lives as long as a session (or a
+    cache) still holds it.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+
+    Returns:
+        EventFrame: Shared wrapper of df
+    """
+    with _registry_lock:
+        frame = _registry.get(id(df))
+        if frame is None or frame.df is not df:
+            frame = EventFrame(df)
+            _registry[id(df)] = frame
+        return frame
@@ -0,0 +1,247 @@
+import datetime
+import json
+import os
+import uuid
+
+import pandas as pd
+
+DEFAULT_STORE_DIR = os.environ.get('GDELT_STORE_DIR', 'event_store')
+
+# Snapshot of the most recently ingested slice, published by ingestor.py
+LATEST_DATA_FILE = 'latest.parquet'
+LATEST_META_FILE = 'latest.json'
+
+# Partition directory names follow the Hive convention: date=YYYY-MM-DD/hour=HH
+DATE_PARTITION = 'date='
+HOUR_PARTITION = 'hour='
+
+
+def _require_pyarrow():
+    """Imports pyarrow, which the event store needs for Parquet I/O."""
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.dataset  # noqa: F401
+    except ImportError as e:
+        raise ImportError("The event store needs pyarrow. Install it with: pip install pyarrow") from e
+
+
+class EventStore:
+    """
+    Append-only Parquet store of adapted ICEWS events, partitioned by hour.
+
+    Each write lands in date=YYYY-MM-DD/hour=HH directories derived from the
+    'date' column. Writing the same part name again (e.g. the same GDELT slice
+    ID) replaces that part instead of duplicating it, so re-running an
+    ingestion is safe. Reads prune whole partitions by time range and push
+    column selection and value filters down to the Parquet reader.
+
+    Args:
+        root (str): Store root directory
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+
+    def write(self, df, part_name=None):
+        """
+        Appends adapted events to the store.
+
+        Args:
+            df (pandas.DataFrame): Events in ICEWS format (needs a 'date' column)
+            part_name (str): Stable name for this batch, e.g. the slice ID;
+                a random name is used when omitted
+
+        Returns:
+            list: Paths of the Parquet files written
+        """
+        _require_pyarrow()
+        if df is None or df.empty:
+            return []
+
+        part_name = part_name or uuid.uuid4().hex
+        df = df.dropna(subset=['date'])
+
+        # Store plain values; Parquet dictionary-encodes repeated strings on
+        # its own and mixed categorical/string parts would not share a schema
+        categorical = [c for c in df.columns if isinstance(df[c].dtype, pd.CategoricalDtype)]
+        if categorical:
+            df = df.astype({c: df[c].cat.categories.dtype for c in categorical})
+
+        paths = []
+        hours = df['date'].dt.floor('h')
+        for hour, group in df.groupby(hours, sort=True):
+            directory = os.path.join(self.root, f"{DATE_PARTITION}{hour:%Y-%m-%d}",
+                                     f"{HOUR_PARTITION}{hour:%H}")
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f"part-{part_name}.parquet")
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            group.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return paths
+
+    def partitions(self, start=None, end=None):
+        """
+        Lists partition directories overlapping [start, end).
+
+        Args:
+            start (datetime.datetime): Earliest event time wanted
+            end (datetime.datetime): Event time to stop before
+
+        Returns:
+            list: (hour start, directory path) pairs in time order
+        """
+        first_hour = pd.Timestamp(start).floor('h') if start is not None else None
+        found = []
+        if not os.path.isdir(self.root):
+            return found
+
+        for date_dir in sorted(os.listdir(self.root)):
+            if not date_dir.startswith(DATE_PARTITION):
+                continue
+            try:
+                day = datetime.datetime.strptime(date_dir[len(DATE_PARTITION):], '%Y-%m-%d')
+            except ValueError:
+                continue
+            if end is not None and day >= end:
+                continue
+            if first_hour is not None and day + datetime.timedelta(days=1) <= first_hour:
+                continue
+
+            day_path = os.path.join(self.root, date_dir)
+            for hour_dir in sorted(os.listdir(day_path)):
+                if not hour_dir.startswith(HOUR_PARTITION):
+                    continue
+                try:
+                    hour = day + datetime.timedelta(hours=int(hour_dir[len(HOUR_PARTITION):]))
+                except ValueError:
+                    continue
+                if first_hour is not None and hour < first_hour:
+                    continue
+                if end is not None and hour >= end:
+                    continue
+                found.append((hour, os.path.join(day_path, hour_dir)))
+        return found
+
+    def files(self, start=None, end=None):
+        """Lists the Parquet files in the partitions overlapping [start, end)."""
+        paths = []
+        for _, directory in self.partitions(start, end):
+            paths.extend(
+                os.path.join(directory, name) for name in sorted(os.listdir(directory))
+                if name.endswith('.parquet')
+            )
+        return paths
+
+    def read(self, start=None, end=None, countries=None, event_types=None, quad_classes=None,
+             columns=None):
+        """
+        Reads events with partition pruning and predicate/column pushdown.
+
+        Args:
+            start (datetime.datetime): Earliest event time to return
+            end (datetime.datetime): Event time to stop before
+            countries (list): Keep only these 'country' values
+            event_types (list): Keep only these 'event_type' values
+            quad_classes (list): Keep only these 'quad_class' values
+            columns (list): Columns to return; None returns all
+
+        Returns:
+            pandas.DataFrame: Matching events sorted by date (newest first)
+        """
+        _require_pyarrow()
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+
+        paths = self.files(start, end)
+        if not paths:
+            return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+
+        # Parts written with and without optional columns (e.g. the enrichment
+        # of ingestor.py --enrich) differ in schema; read them all under the
+        # union, with the columns a part lacks filled with nulls
+        schema = pa.unify_schemas([pq.read_schema(path) for path in paths])
+        dataset = ds.dataset(paths, schema=schema, format='parquet')
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field('date') >= pd.Timestamp(start).to_datetime64())
+        if end is not None:
+            conditions.append(ds.field('date') < pd.Timestamp(end).to_datetime64())
+        if countries:
+            conditions.append(ds.field('country').isin(list(countries)))
+        if event_types:
+            conditions.append(ds.field('event_type').isin(list(event_types)))
+        if quad_classes:
+            conditions.append(ds.field('quad_class').isin([int(q) for q in quad_classes]))
+
+        expression = None
+        for condition in conditions:
+            expression = condition if expression is None else expression & condition
+
+        table = dataset.to_table(columns=list(columns) if columns else None, filter=expression)
+        df = table.to_pandas()
+        if 'date' in df.columns:
+            df = df.sort_values('date', ascending=False, ignore_index=True)
+        return df
+
+    def publish_latest(self, df, slice_id):
+        """
+        Publishes the events of the newest slice as the store's latest snapshot.
+
+        The data file is replaced before the metadata, so a reader that sees
+        the new metadata always finds the matching data.
+
+        Args:
+            df (pandas.DataFrame): Events in ICEWS format
+            slice_id (str): GDELT slice ID the events belong to
+
+        Returns:
+            dict: The published metadata
+        """
+        _require_pyarrow()
+        os.makedirs(self.root, exist_ok=True)
+
+        data_path = os.path.join(self.root, LATEST_DATA_FILE)
+        tmp_path = f"{data_path}.{os.getpid()}.tmp"
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, data_path)
+
+        meta = {
+            'slice_id': slice_id,
+            'rows': int(len(df)),
+            'published_at': datetime.datetime.utcnow().isoformat(timespec='seconds'),
+        }
+        meta_path = os.path.join(self.root, LATEST_META_FILE)
+        tmp_path = f"{meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, meta_path)
+        return meta
+
+    def latest_meta(self):
+        """
+        Returns the metadata of the latest published snapshot.
+
+        Returns:
+            dict: slice_id, rows and published_at (UTC), or None if nothing
+                has been published
+        """
+        try:
+            with open(os.path.join(self.root, LATEST_META_FILE), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def read_latest(self):
+        """
+        Reads the latest published snapshot.
+
+        Returns:
+            pandas.DataFrame: Events of the newest ingested slice, or None
+        """
+        _require_pyarrow()
+        path = os.path.join(self.root, LATEST_DATA_FILE)
+        if not os.path.exists(path):
+            return None
+        return pd.read_parquet(path)
@@ -0,0 +1,231 @@
+import collections
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+
+import numpy as np
+
+# Export formats: key -> (label, file extension, MIME type)
+EXPORT_FORMATS = {
+    'csv': ('CSV (gzip)', 'csv.gz', 'application/gzip'),
+    'parquet': ('Parquet', 'parquet', 'application/vnd.apache.parquet'),
+    'icews': ('ICEWS tab-delimited', 'tab', 'text/tab-separated-values'),
+}
+DEFAULT_CHUNK_ROWS = 50000
+DEFAULT_MAX_EXPORTS = 8
+
+# Column layout of ICEWS event files, mapped from the adapted columns that
+# have an ICEWS counterpart
+ICEWS_EXPORT_COLUMNS = collections.OrderedDict([
+    ('event_id', 'Event ID'),
+    ('date', 'Event Date'),
+    ('source_name', 'Source Name'),
+    ('source_sectors', 'Source Sectors'),
+    ('source_country', 'Source Country'),
+    ('event_type', 'Event Text'),
+    ('cameo_code', 'CAMEO Code'),
+    ('intensity', 'Intensity'),
+    ('target_name', 'Target Name'),
+    ('target_sectors', 'Target Sectors'),
+    ('target_country', 'Target Country'),
+    ('location', 'Location'),
+    ('country', 'Country'),
+    ('latitude', 'Latitude'),
+    ('longitude', 'Longitude'),
+    ('source_url', 'Publisher'),
+])
+
+
+def to_icews_layout(df):
+    """
+    Selects and renames the adapted columns to the ICEWS event file layout.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+
+    Returns:
+        pandas.DataFrame: Columns named as in ICEWS files, dates as YYYY-MM-DD
+    """
+    columns = [c for c in ICEWS_EXPORT_COLUMNS if c in df.columns]
+    layout = df[columns].rename(columns=ICEWS_EXPORT_COLUMNS)
+    if 'Event Date' in layout.columns:
+        layout = layout.assign(**{'Event Date': layout['Event Date'].dt.strftime('%Y-%m-%d')})
+    return layout
+
+
+def iter_chunks(df, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Yields consecutive row chunks of df (a DataFrame or an event_frame.EventView)."""
+    for start in range(0, len(df), chunk_rows):
+        yield df.take(np.arange(start, min(start + chunk_rows, len(df))))
+
+
+def iter_text_export(df, fmt='csv', chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Serialises a frame as delimited text, one chunk at a time.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format, or an EventView of them
+        fmt (str): 'csv' for gzip-compressed CSV or 'icews' for ICEWS
+            tab-delimited text
+        chunk_rows (int): Rows serialised per chunk
+
+    Yields:
+        bytes: Consecutive pieces of the file
+    """
+    compressor = zlib.compressobj(wbits=31) if fmt == 'csv' else None  # wbits=31: gzip container
+    header = True
+    for chunk in iter_chunks(df, chunk_rows):
+        if fmt == 'icews':
+            data = to_icews_layout(chunk).to_csv(sep='\t', index=False, header=header)
+        else:
+            data = chunk.to_csv(index=False, header=header)
+        header = False
+        data = data.encode('utf-8')
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if header:
+        # Empty frame: still emit the header line
+        empty = df.take([])
+        data = (to_icews_layout(empty) if fmt == 'icews' else empty).to_csv(
+            sep='\t' if fmt == 'icews' else ',', index=False).encode('utf-8')
+        yield compressor.compress(data) if compressor is not None else data
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def write_parquet(df, path, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Writes a frame to Parquet with one row group per chunk.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+        path (str): Destination file
+        chunk_rows (int): Rows per row group
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df.take([]), preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in iter_chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_export(df, path, fmt, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Writes an export file atomically, chunk by chunk.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+        path (str): Destination file
+        fmt (str): Key of EXPORT_FORMATS
+        chunk_rows (int): Rows serialised per chunk
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {list(EXPORT_FORMATS)}")
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        if fmt == 'parquet':
+            write_parquet(df, tmp_path, chunk_rows)
+        else:
+            with open(tmp_path, 'wb') as f:
+                for piece in iter_text_export(df, fmt, chunk_rows):
+                    f.write(piece)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def export_file_name(fmt, prefix='gdelt_events', when=None):
+    """Returns a download file name such as gdelt_events_20250101_120000.csv.gz."""
+    import datetime
+    when = when or datetime.datetime.now()
+    return f"{prefix}_{when.strftime('%Y%m%d_%H%M%S')}.{EXPORT_FORMATS[fmt][1]}"
+
+
+class ExportCache:
+    """
+    On-demand export files, cached per filter state and format.
+
+    Nothing is serialised until export() is called (e.g. when the user clicks
+    a download button). The file is then written to a private temporary
+    directory in chunks and reused for the same filter state until it is
+    evicted. The directory is removed when the cache is garbage collected.
+    The caller supplies the filter key; it must change whenever the rows
+    passed in change.
+
+    Args:
+        max_exports (int): Number of export files kept on disk
+        chunk_rows (int): Rows serialised per chunk
+    """
+
+    def __init__(self, max_exports=DEFAULT_MAX_EXPORTS, chunk_rows=DEFAULT_CHUNK_ROWS):
+        self.max_exports = max_exports
+        self.chunk_rows = chunk_rows
+        self.directory = tempfile.mkdtemp(prefix='gdelt-export-')
+        # The directory goes with the cache (i.e. with the session holding
+        # it), or at interpreter exit at the latest
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self.directory, True)
+        self._files = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def path(self, df, filter_key, fmt):
+        """
+        Returns the path of the export file, writing it on first use.
+
+        Args:
+            df (pandas.DataFrame): Filtered events in ICEWS format, or an EventView of them
+            filter_key (hashable): Identifies the filter state that produced df
+            fmt (str): Key of EXPORT_FORMATS
+
+        Returns:
+            str: Path of the export file
+        """
+        key = (filter_key, fmt)
+        with self._lock:
+            path = self._files.get(key)
+            if path is not None and os.path.exists(path):
+                self._files.move_to_end(key)
+                return path
+
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"export-{len(self._files)}-{abs(hash(key))}.{EXPORT_FORMATS[fmt][1]}")
+            write_export(df, path, fmt, self.chunk_rows)
+            self._files[key] = path
+            while len(self._files) > self.max_exports:
+                _, evicted = self._files.popitem(last=False)
+                try:
+                    os.remove(evicted)
+                except OSError:
+                    pass
+            return path
+
+    def export(self, df, filter_key, fmt):
+        """
+        Opens the export file, writing it on first use.
+
+        The file is handed over as an open handle rather than read into
+        memory here, so st.download_button can consume it directly. The
+        handle stays readable if the file is evicted in the meantime.
+
+        Args:
+            df (pandas.DataFrame): Filtered events in ICEWS format, or an EventView of them
+            filter_key (hashable): Identifies the filter state that produced df
+            fmt (str): Key of EXPORT_FORMATS
+
+        Returns:
+            io.BufferedReader: Export file opened for binary reading
+        """
+        return open(self.path(df, filter_key, fmt), 'rb')
+
+    def clear(self):
+        """Removes every cached export file."""
+        with self._lock:
+            self._files.clear()
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+# Columns the Data Explorer can filter on
+FILTER_COLUMNS = ['event_type', 'country', 'quad_class', 'source_country', 'target_country']
+
+
+class FilterIndex:
+    """
+    Per-value position lists for the Data Explorer filters.
+
+    Built once per data load. Every filter column is factorised into integer
+    codes with, for each distinct value, the sorted positions of its rows, and
+    the sorted option lists for the multiselects are computed at the same
+    time. A filter selection is then answered by merging the position lists
+    of the selected values (OR within a column) and intersecting the columns
+    (AND across columns), so its cost follows the number of matching rows and
+    the frame is never copied.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+        columns (list): Columns to index
+    """
+
+    def __init__(self, df, columns=FILTER_COLUMNS):
+        self.size = len(df)
+        self._values = {}
+        self._offsets = {}
+        self._positions = {}
+        self._options = {}
+        for column in columns:
+            if column not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[column])
+            present = codes >= 0
+            order = np.argsort(codes[present], kind='stable')
+            offsets = np.zeros(len(uniques) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(codes[present], minlength=len(uniques)), out=offsets[1:])
+            self._values[column] = {value: i for i, value in enumerate(uniques.tolist())}
+            self._offsets[column] = offsets
+            self._positions[column] = np.flatnonzero(present)[order]
+            self._options[column] = sorted(uniques.tolist())
+
+    def options(self, column):
+        """
+        Returns the sorted distinct values of a column.
+
+        Args:
+            column (str): Indexed column
+
+        Returns:
+            list: Options for a multiselect (empty if not indexed)
+        """
+        return self._options.get(column, [])
+
+    def count(self, column, value):
+        """Returns the number of rows holding value in column."""
+        code = self._values.get(column, {}).get(value)
+        if code is None:
+            return 0
+        offsets = self._offsets[column]
+        return int(offsets[code + 1] - offsets[code])
+
+    def _column_positions(self, column, values):
+        """Sorted positions of rows holding any of values in column."""
+        lookup = self._values.get(column, {})
+        codes = [lookup[value] for value in values if value in lookup]
+        offsets, positions = self._offsets[column], self._positions[column]
+        parts = [positions[offsets[code]:offsets[code + 1]] for code in codes]
+        if not parts:
+            return np.array([], dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        merged = np.concatenate(parts)
+        merged.sort()
+        return merged
+
+    def positions(self, selections):
+        """
+        Resolves a filter selection to row positions.
+
+        Args:
+            selections (dict): Column -> selected values; columns with no
+                selected values do not filter
+
+        Returns:
+            numpy.ndarray: Sorted positions of the matching rows, or None if
+                nothing is selected (every row matches)
+        """
+        active = [(column, values) for column, values in selections.items()
+                  if values and column in self._positions]
+        if not active:
+            return None
+        result = None
+        # Smallest selection first keeps the intersections short
+        for rows in sorted((self._column_positions(c, v) for c, v in active), key=len):
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+            if not len(result):
+                break
+        return result
@@ -4,119 +4,279 @@ import requests
 import io
 import os
 import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
 
-def fetch_gdelt_data():
+from downloader import (
+    LASTUPDATE_URL, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, CHUNK_SIZE,
+    create_session, fetch_update_list, download_files, slice_id
+)
+from streaming import DEFAULT_CHUNK_BYTES, open_zip_member, iter_line_batches
+from cameo import CAMEO_ROOT_CODES
+from gdelt_schema import DATEADDED_FORMAT, read_export, empty_export, concat_frames
+import metrics
+
+def _dateadded_filter(since):
+    """
+    Builds a raw-line predicate that keeps rows added at or after since.
+    
+    DATEADDED is the second to last tab-separated field and SOURCEURL (the
+    last one) never contains a tab, so the comparison works on the raw bytes
+    before the row is parsed. Fixed-width YYYYMMDDHHMMSS strings compare in
+    the same order as the timestamps they encode.
+    
+    Args:
+        since (datetime.datetime): Oldest DATEADDED to keep
+    
+    Returns:
+        callable: Predicate taking one raw line (bytes)
+    """
+    threshold = since.strftime(DATEADDED_FORMAT).encode('ascii')
+    
+    def keep(line):
+        fields = line.rsplit(b'\t', 2)
+        return len(fields) == 3 and fields[1] >= threshold
+    
+    return keep
+
+def read_export_zip(content, columns=None, engine=None):
+    """
+    Parses a downloaded .export.CSV.zip held in memory.
+    
+    Args:
+        content (bytes): Raw zip archive
+        columns (list): GDELT columns to parse; None parses all 61
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+    
+    Returns:
+        pandas.DataFrame: Typed GDELT rows with a parsed 'datetime' column
+    """
+    z = zipfile.ZipFile(BytesIO(content))
+    csv_filename = z.namelist()[0]  # Get the CSV filename inside the zip
+    
+    # Decompression happens inside read_export's read_csv stage
+    with z.open(csv_filename) as f:
+        return read_export(f, columns=columns, engine=engine)
+
+def load_export_slice(entry, columns=None, engine=None, cache=None, session=None,
+                      timeout=DEFAULT_TIMEOUT):
+    """
+    Loads one complete export slice, going through the cache when given.
+    
+    Args:
+        entry (SliceFile): Listing entry of the .export.CSV.zip file
+        columns (list): GDELT columns to parse; None parses all 61
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+        cache (slice_cache.SliceCache): Optional local slice cache
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout in seconds
+    
+    Returns:
+        pandas.DataFrame: Typed GDELT rows of the whole slice
+    """
+    if cache is not None:
+        df = cache.get_frame(entry, columns)
+        if df is not None:
+            return df
+    
+    download = download_files([entry], max_workers=1, timeout=timeout, session=session,
+                              cache=cache)[0]
+    if download.error is not None:
+        raise download.error
+    
+    df = read_export_zip(download.content, columns=columns, engine=engine)
+    if cache is not None:
+        cache.put_frame(entry, df, columns)
+    return df
+
+def stream_gdelt_export(url, since=None, chunk_bytes=DEFAULT_CHUNK_BYTES,
+                        session=None, timeout=DEFAULT_TIMEOUT, columns=None, engine=None):
+    """
+    Streams one GDELT export zip and yields parsed chunks as bytes arrive.
+    
+    The zip member is decompressed on the fly and rows older than since are
+    discarded on their raw DATEADDED field, so peak memory stays at a few
+    chunks regardless of the size of the file.
+    
+    Args:
+        url (str): URL of a .export.CSV.zip file
+        since (datetime.datetime): Oldest DATEADDED to keep; None keeps all rows
+        chunk_bytes (int): Approximate decompressed bytes parsed per chunk
+        session (requests.Session): Optional session to reuse
+        timeout (float or tuple): Per-request timeout in seconds
+        columns (list): GDELT columns to parse; None parses all 61
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+    
+    Yields:
+        pandas.DataFrame: GDELT rows with a parsed 'datetime' column
+    """
+    session = session or create_session(1)
+    keep = _dateadded_filter(since) if since is not None else None
+    
+    with session.get(url, stream=True, timeout=timeout) as response:
+        response.raise_for_status()
+        metrics.count('downloads', source='stream')
+        reader = open_zip_member(_count_bytes(response.iter_content(chunk_size=CHUNK_SIZE)))
+        
+        for batch in iter_line_batches(reader, chunk_bytes=chunk_bytes, keep=keep, stage='time_filter'):
+            yield read_export(BytesIO(batch), columns=columns, engine=engine)
+
+def _count_bytes(chunks):
+    """Passes downloaded chunks through, counting them as bytes_downloaded."""
+    for chunk in chunks:
+        metrics.count('bytes_downloaded', len(chunk))
+        yield chunk
+
+def fetch_gdelt_data(max_workers=DEFAULT_MAX_WORKERS, timeout=DEFAULT_TIMEOUT, streaming=False,
+                     chunk_bytes=DEFAULT_CHUNK_BYTES, columns=None, engine=None, cache=None):
     """
     Fetches GDELT data from the last 15 minutes.
     
+    Args:
+        max_workers (int): Number of concurrent slice downloads
+        timeout (float or tuple): Per-request timeout in seconds
+        streaming (bool): Decompress and parse each export in bounded chunks
+            while it downloads instead of holding whole files in memory
+        chunk_bytes (int): Approximate decompressed bytes per chunk when streaming
+        columns (list): GDELT columns to parse, e.g. gdelt_schema.ICEWS_SOURCE_COLUMNS;
+            None parses all 61. GlobalEventID and DATEADDED are always included.
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+        cache (slice_cache.SliceCache): Optional local cache of slice zips and
+            parsed frames, checked before any slice download. The streaming
+            path does not use it.
+    
     Returns:
         pandas.DataFrame: Processed GDELT data
     """
+    fetch_timer = metrics.stage('fetch')
     try:
+        # The time filter and deduplication need these two columns
+        if columns is not None:
+            columns = list(columns) + [c for c in ('GlobalEventID', 'DATEADDED') if c not in columns]
+        
         # Calculate the timestamps for the last 15 minutes
         now = datetime.datetime.utcnow()
         fifteen_min_ago = now - datetime.timedelta(minutes=15)
         
-        # Format dates for GDELT API
-        date_format = "%Y%m%d"
-        time_format = "%H%M%S"
-        
-        now_date = now.strftime(date_format)
-        now_time = now.strftime(time_format)
-        fifteen_min_ago_date = fifteen_min_ago.strftime(date_format)
-        fifteen_min_ago_time = fifteen_min_ago.strftime(time_format)
-        
-        # Construct the GDELT URL for the last 15 minutes
-        # Using the GDELT 2.0 Events Export API
-        gdelt_url = f"http://data.gdeltproject.org/gdeltv2/lastupdate.txt"
-        
         # Get the latest update file references
-        response = requests.get(gdelt_url)
-        response.raise_for_status()
-        
-        # Parse the response to get the CSV file URLs
-        update_info = response.text.strip().split('\n')
-        csv_urls = []
+        session = create_session(max_workers)
+        with metrics.stage('lastupdate'):
+            update_info = fetch_update_list(LASTUPDATE_URL, session=session, timeout=timeout)
         
-        for line in update_info:
-            parts = line.split()
-            if len(parts) >= 3:
-                file_url = parts[2]
-                # Check if it's an events CSV file
-                if file_url.endswith('.export.CSV.zip'):
-                    csv_urls.append(file_url)
+        # Keep only the events export files
+        csv_files = [entry for entry in update_info if entry.url.endswith('.export.CSV.zip')]
         
-        # Initialize empty DataFrame to hold all data
-        all_data = pd.DataFrame()
+        # Collect per-file frames and concatenate once at the end
+        frames = []
         
-        # Process each CSV file
-        for url in csv_urls:
-            try:
-                # Download the CSV
-                file_response = requests.get(url)
-                file_response.raise_for_status()
-                
-                # Define GDELT column names
-                gdelt_columns = [
-                    'GlobalEventID', 'Day', 'MonthYear', 'Year', 'FractionDate', 
-                    'Actor1Code', 'Actor1Name', 'Actor1CountryCode', 'Actor1KnownGroupCode', 
-                    'Actor1EthnicCode', 'Actor1Religion1Code', 'Actor1Religion2Code', 
-                    'Actor1Type1Code', 'Actor1Type2Code', 'Actor1Type3Code', 
-                    'Actor2Code', 'Actor2Name', 'Actor2CountryCode', 'Actor2KnownGroupCode', 
-                    'Actor2EthnicCode', 'Actor2Religion1Code', 'Actor2Religion2Code', 
-                    'Actor2Type1Code', 'Actor2Type2Code', 'Actor2Type3Code', 
-                    'IsRootEvent', 'EventCode', 'EventBaseCode', 'EventRootCode', 
-                    'QuadClass', 'GoldsteinScale', 'NumMentions', 'NumSources', 
-                    'NumArticles', 'AvgTone', 'Actor1Geo_Type', 'Actor1Geo_FullName', 
-                    'Actor1Geo_CountryCode', 'Actor1Geo_ADM1Code', 'Actor1Geo_ADM2Code', 
-                    'Actor1Geo_Lat', 'Actor1Geo_Long', 'Actor1Geo_FeatureID', 
-                    'Actor2Geo_Type', 'Actor2Geo_FullName', 'Actor2Geo_CountryCode', 
-                    'Actor2Geo_ADM1Code', 'Actor2Geo_ADM2Code', 'Actor2Geo_Lat', 
-                    'Actor2Geo_Long', 'Actor2Geo_FeatureID', 'ActionGeo_Type', 
-                    'ActionGeo_FullName', 'ActionGeo_CountryCode', 'ActionGeo_ADM1Code', 
-                    'ActionGeo_ADM2Code', 'ActionGeo_Lat', 'ActionGeo_Long', 
-                    'ActionGeo_FeatureID', 'DATEADDED', 'SOURCEURL'
-                ]
-                
-                # Read the CSV data
-                import zipfile
-                from io import BytesIO
-                
-                z = zipfile.ZipFile(BytesIO(file_response.content))
-                csv_filename = z.namelist()[0]  # Get the CSV filename inside the zip
-                
-                with z.open(csv_filename) as f:
-                    df = pd.read_csv(f, sep='\t', header=None, names=gdelt_columns)
-                
-                # Filter out events older than 15 minutes
-                # DATEADDED format in GDELT is YYYYMMDDHHMMSS
-                df['datetime'] = pd.to_datetime(df['DATEADDED'], format='%Y%m%d%H%M%S')
-                df = df[df['datetime'] >= fifteen_min_ago]
+        if streaming:
+            def stream_file(entry):
+                # Chunks are only kept once the whole file has streamed, so a
+                # file failing midway is dropped whole, as when downloading
+                return list(stream_gdelt_export(entry.url, since=fifteen_min_ago,
+                                                chunk_bytes=chunk_bytes,
+                                                session=session, timeout=timeout,
+                                                columns=columns, engine=engine))
+            
+            # Stream the files concurrently, like the downloads below
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(csv_files)))) as executor:
+                futures = [executor.submit(stream_file, entry) for entry in csv_files]
+                for entry, future in zip(csv_files, futures):
+                    try:
+                        frames.extend(future.result())
+                    except Exception as e:
+                        print(f"Error processing file {entry.url}: {e}")
+                        metrics.count('file_errors')
+                        continue
+        else:
+            # Parsed frames already in the cache skip both download and parse
+            parsed = {}
+            if cache is not None:
+                for entry in csv_files:
+                    df = cache.get_frame(entry, columns)
+                    if df is not None:
+                        parsed[entry.url] = df
+            missing = [entry for entry in csv_files if entry.url not in parsed]
+            
+            # Download the remaining files concurrently
+            with metrics.stage('download'):
+                downloads = download_files(missing, max_workers=max_workers, timeout=timeout,
+                                           session=session, cache=cache)
+            
+            # Process each CSV file
+            for entry, download in zip(missing, downloads):
+                try:
+                    if download.error is not None:
+                        raise download.error
+                    
+                    # Read the CSV data
+                    df = read_export_zip(download.content, columns=columns, engine=engine)
+                    if cache is not None:
+                        cache.put_frame(entry, df, columns)
+                    parsed[entry.url] = df
                 
-                # Append to our collection
-                all_data = pd.concat([all_data, df])
+                except Exception as e:
+                    print(f"Error processing file {download.url}: {e}")
+                    metrics.count('file_errors')
+                    continue
             
-            except Exception as e:
-                print(f"Error processing file {url}: {e}")
-                continue
+            rows_in = sum(len(parsed[entry.url]) for entry in csv_files if entry.url in parsed)
+            with metrics.stage('time_filter', rows_in=rows_in) as timer:
+                for entry in csv_files:
+                    if entry.url in parsed:
+                        # Filter out events older than 15 minutes
+                        df = parsed[entry.url]
+                        frames.append(df[df['datetime'] >= fifteen_min_ago])
+                rows_out = sum(len(frame) for frame in frames)
+                timer.stop(rows_out=rows_out)
+            metrics.count('rows_dropped', rows_in - rows_out, reason='time_filter')
+        
+        all_data = concat_frames(frames)
         
         # If we found any data
         if not all_data.empty:
             # Remove duplicates based on GlobalEventID
-            all_data = all_data.drop_duplicates(subset=['GlobalEventID'])
+            with metrics.stage('dedup', rows_in=len(all_data)) as timer:
+                rows_in = len(all_data)
+                all_data = all_data.drop_duplicates(subset=['GlobalEventID'])
+                timer.stop(rows_out=len(all_data))
+            metrics.count('rows_dropped', rows_in - len(all_data), reason='dedup')
             
             # Sort by datetime
-            all_data = all_data.sort_values('datetime', ascending=False)
+            with metrics.stage('sort', rows_in=len(all_data)):
+                all_data = all_data.sort_values('datetime', ascending=False)
             
+            fetch_timer.stop(rows_out=len(all_data))
             return all_data
         else:
             # Create a sample empty dataframe with the right columns if no data
-            return pd.DataFrame(columns=gdelt_columns)
+            fetch_timer.stop(rows_out=0)
+            return empty_export(columns)
     
     except Exception as e:
         print(f"Error fetching GDELT data: {e}")
+        fetch_timer.stop(error=True)
         return None
 
+def get_latest_slice_id(timeout=DEFAULT_TIMEOUT):
+    """
+    Returns the ID of the most recently published GDELT slice.
+    
+    Args:
+        timeout (float or tuple): Per-request timeout in seconds
+    
+    Returns:
+        str: YYYYMMDDHHMMSS slice ID, or None if it could not be determined
+    """
+    try:
+        for entry in fetch_update_list(LASTUPDATE_URL, timeout=timeout):
+            if entry.url.endswith('.export.CSV.zip'):
+                return slice_id(entry.url)
+    except Exception as e:
+        print(f"Error fetching GDELT update list: {e}")
+    return None
+
 def get_event_details(event_code):
     """
     Maps GDELT event codes to human-readable event types.
@@ -127,31 +287,7 @@ def get_event_details(event_code):
     Returns:
         str: Human-readable event type
     """
-    # CAMEO event codes mapping (simplified)
-    cameo_codes = {
-        '01': 'Make public statement',
-        '02': 'Appeal',
-        '03': 'Express intent to cooperate',
-        '04': 'Consult',
-        '05': 'Engage in diplomatic cooperation',
-        '06': 'Engage in material cooperation',
-        '07': 'Provide aid',
-        '08': 'Yield',
-        '09': 'Investigate',
-        '10': 'Demand',
-        '11': 'Disapprove',
-        '12': 'Reject',
-        '13': 'Threaten',
-        '14': 'Protest',
-        '15': 'Exhibit military posture',
-        '16': 'Reduce relations',
-        '17': 'Coerce',
-        '18': 'Assault',
-        '19': 'Fight',
-        '20': 'Use unconventional mass violence'
-    }
-    
     # Extract the root code (first two digits)
     root_code = str(event_code)[:2]
     
-    return cameo_codes.get(root_code, 'Other')
+    return CAMEO_ROOT_CODES.get(root_code, 'Other')
@@ -0,0 +1,347 @@
+import numpy as np
+import pandas as pd
+
+import metrics
+
+# GDELT 2.0 events export columns, in file order
+GDELT_COLUMNS = [
+    'GlobalEventID', 'Day', 'MonthYear', 'Year', 'FractionDate',
+    'Actor1Code', 'Actor1Name', 'Actor1CountryCode', 'Actor1KnownGroupCode',
+    'Actor1EthnicCode', 'Actor1Religion1Code', 'Actor1Religion2Code',
+    'Actor1Type1Code', 'Actor1Type2Code', 'Actor1Type3Code',
+    'Actor2Code', 'Actor2Name', 'Actor2CountryCode', 'Actor2KnownGroupCode',
+    'Actor2EthnicCode', 'Actor2Religion1Code', 'Actor2Religion2Code',
+    'Actor2Type1Code', 'Actor2Type2Code', 'Actor2Type3Code',
+    'IsRootEvent', 'EventCode', 'EventBaseCode', 'EventRootCode',
+    'QuadClass', 'GoldsteinScale', 'NumMentions', 'NumSources',
+    'NumArticles', 'AvgTone', 'Actor1Geo_Type', 'Actor1Geo_FullName',
+    'Actor1Geo_CountryCode', 'Actor1Geo_ADM1Code', 'Actor1Geo_ADM2Code',
+    'Actor1Geo_Lat', 'Actor1Geo_Long', 'Actor1Geo_FeatureID',
+    'Actor2Geo_Type', 'Actor2Geo_FullName', 'Actor2Geo_CountryCode',
+    'Actor2Geo_ADM1Code', 'Actor2Geo_ADM2Code', 'Actor2Geo_Lat',
+    'Actor2Geo_Long', 'Actor2Geo_FeatureID', 'ActionGeo_Type',
+    'ActionGeo_FullName', 'ActionGeo_CountryCode', 'ActionGeo_ADM1Code',
+    'ActionGeo_ADM2Code', 'ActionGeo_Lat', 'ActionGeo_Long',
+    'ActionGeo_FeatureID', 'DATEADDED', 'SOURCEURL'
+]
+
+# Explicit dtypes so read_csv never has to infer them.
+# CAMEO and country codes are categoricals of strings, which also keeps the
+# leading zeros of codes such as '042' that an integer parse would drop.
+GDELT_DTYPES = {column: str for column in GDELT_COLUMNS}
+GDELT_DTYPES.update({
+    'GlobalEventID': 'Int64',
+    'Day': 'Int64',
+    'MonthYear': 'Int64',
+    'Year': 'Int64',
+    'FractionDate': 'float64',
+    'IsRootEvent': 'Int8',
+    'QuadClass': 'Int8',
+    'NumMentions': 'Int32',
+    'NumSources': 'Int32',
+    'NumArticles': 'Int32',
+    'GoldsteinScale': 'float32',
+    'AvgTone': 'float32',
+    'DATEADDED': 'Int64',
+})
+for _prefix in ('Actor1Geo', 'Actor2Geo', 'ActionGeo'):
+    GDELT_DTYPES[f'{_prefix}_Type'] = 'Int8'
+    GDELT_DTYPES[f'{_prefix}_Lat'] = 'float32'
+    GDELT_DTYPES[f'{_prefix}_Long'] = 'float32'
+    GDELT_DTYPES[f'{_prefix}_CountryCode'] = 'category'
+for _column in ('Actor1CountryCode', 'Actor2CountryCode',
+                'EventCode', 'EventBaseCode', 'EventRootCode'):
+    GDELT_DTYPES[_column] = 'category'
+
+# Columns read by icews_adapter.adapt_gdelt_to_icews (plus DATEADDED, which
+# the time filter needs)
+ICEWS_SOURCE_COLUMNS = [
+    'GlobalEventID', 'Actor1Name', 'Actor1CountryCode', 'Actor2Name',
+    'Actor2CountryCode', 'EventCode', 'QuadClass', 'GoldsteinScale', 'AvgTone',
+    'ActionGeo_FullName', 'ActionGeo_CountryCode', 'ActionGeo_Lat',
+    'ActionGeo_Long', 'DATEADDED', 'SOURCEURL'
+]
+
+# GDELT 2.0 mentions columns, in file order (one row per article mentioning an event)
+MENTIONS_COLUMNS = [
+    'GlobalEventID', 'EventTimeDate', 'MentionTimeDate', 'MentionType',
+    'MentionSourceName', 'MentionIdentifier', 'SentenceID', 'Actor1CharOffset',
+    'Actor2CharOffset', 'ActionCharOffset', 'InRawText', 'Confidence',
+    'MentionDocLen', 'MentionDocTone', 'MentionDocTranslationInfo', 'Extras'
+]
+MENTIONS_DTYPES = {column: str for column in MENTIONS_COLUMNS}
+MENTIONS_DTYPES.update({
+    'GlobalEventID': 'Int64',
+    'EventTimeDate': 'Int64',
+    'MentionTimeDate': 'Int64',
+    'MentionType': 'Int8',
+    'SentenceID': 'Int32',
+    'Actor1CharOffset': 'Int32',
+    'Actor2CharOffset': 'Int32',
+    'ActionCharOffset': 'Int32',
+    'InRawText': 'Int8',
+    'Confidence': 'Int8',
+    'MentionDocLen': 'Int32',
+    'MentionDocTone': 'float32',
+})
+
+# GDELT 2.1 Global Knowledge Graph columns, in file order (one row per article)
+GKG_COLUMNS = [
+    'GKGRECORDID', 'DATE', 'SourceCollectionIdentifier', 'SourceCommonName',
+    'DocumentIdentifier', 'Counts', 'V2Counts', 'Themes', 'V2Themes',
+    'Locations', 'V2Locations', 'Persons', 'V2Persons', 'Organizations',
+    'V2Organizations', 'V2Tone', 'Dates', 'GCAM', 'SharingImage',
+    'RelatedImages', 'SocialImageEmbeds', 'SocialVideoEmbeds', 'Quotations',
+    'AllNames', 'Amounts', 'TranslationInfo', 'Extras'
+]
+GKG_DTYPES = {column: str for column in GKG_COLUMNS}
+GKG_DTYPES.update({
+    'DATE': 'Int64',
+    'SourceCollectionIdentifier': 'Int8',
+})
+
+# DATEADDED format in GDELT is YYYYMMDDHHMMSS
+DATEADDED_FORMAT = '%Y%m%d%H%M%S'
+
+# Rows per chunk for iter_export
+DEFAULT_CHUNKSIZE = 200000
+
+# Parser engines accepted by read_export
+ENGINES = ('c', 'pyarrow')
+
+
+def resolve_engine(engine=None):
+    """
+    Picks the read_csv engine, falling back to 'c' when pyarrow is missing.
+
+    Args:
+        engine (str): 'c', 'pyarrow', 'auto' (pyarrow when installed) or None ('c')
+
+    Returns:
+        str: Engine name to pass to pandas.read_csv
+    """
+    if engine in (None, 'c'):
+        return 'c'
+    if engine not in ENGINES + ('auto',):
+        raise ValueError(f"Unknown parse engine '{engine}', expected one of {ENGINES + ('auto',)}")
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        if engine == 'pyarrow':
+            print("pyarrow is not installed, falling back to the C parser")
+        return 'c'
+    return 'pyarrow'
+
+
+def read_export(source, columns=None, engine=None):
+    """
+    Parses a GDELT 2.0 events export with explicit dtypes.
+
+    Args:
+        source (str or file-like): Tab-separated export data without a header
+        columns (list): Columns to materialise; None reads all 61
+        engine (str): Parse engine, see resolve_engine
+
+    Returns:
+        pandas.DataFrame: Typed GDELT rows with a parsed 'datetime' column
+    """
+    usecols = list(columns) if columns is not None else GDELT_COLUMNS
+    unknown = set(usecols) - set(GDELT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown GDELT columns: {sorted(unknown)}")
+
+    with metrics.stage('read_csv') as timer:
+        if resolve_engine(engine) == 'pyarrow':
+            df = _read_export_pyarrow(source, usecols)
+        else:
+            df = pd.read_csv(
+                source,
+                sep='\t',
+                header=None,
+                names=GDELT_COLUMNS,
+                usecols=usecols if columns is not None else None,
+                dtype={column: GDELT_DTYPES[column] for column in usecols},
+            )
+        timer.stop(rows_out=len(df))
+    if 'DATEADDED' in df.columns:
+        with metrics.stage('parse_dateadded', rows_in=len(df)):
+            df['datetime'] = parse_dateadded(df['DATEADDED'])
+    return df
+
+
+def iter_export(source, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Parses a GDELT export in chunks of rows with the schema dtypes.
+
+    Args:
+        source (str or file-like): Tab-separated export data without a header
+        columns (list): Columns to materialise; None reads all 61
+        chunksize (int): Rows per chunk
+
+    Yields:
+        pandas.DataFrame: Typed GDELT rows with a parsed 'datetime' column
+    """
+    usecols = list(columns) if columns is not None else GDELT_COLUMNS
+    reader = pd.read_csv(
+        source,
+        sep='\t',
+        header=None,
+        names=GDELT_COLUMNS,
+        usecols=usecols if columns is not None else None,
+        dtype={column: GDELT_DTYPES[column] for column in usecols},
+        chunksize=chunksize,
+    )
+    with reader:
+        for df in reader:
+            if 'DATEADDED' in df.columns:
+                df['datetime'] = parse_dateadded(df['DATEADDED'])
+            yield df
+
+
+def iter_table(source, names, dtypes, columns=None, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Parses a headerless GDELT table (mentions, GKG) in chunks of rows.
+
+    Fields are never quoted in GDELT files, and GKG text fields can hold stray
+    quotes and invalid UTF-8, so quoting is disabled, undecodable bytes are
+    replaced and malformed lines are skipped.
+
+    Args:
+        source (str or file-like): Tab-separated data without a header
+        names (list): Column names in file order, e.g. MENTIONS_COLUMNS
+        dtypes (dict): Column dtypes, e.g. MENTIONS_DTYPES
+        columns (list): Columns to materialise; None reads all
+        chunksize (int): Rows per chunk
+
+    Yields:
+        pandas.DataFrame: Typed rows
+    """
+    usecols = list(columns) if columns is not None else list(names)
+    unknown = set(usecols) - set(names)
+    if unknown:
+        raise ValueError(f"Unknown columns: {sorted(unknown)}")
+    reader = pd.read_csv(
+        source,
+        sep='\t',
+        header=None,
+        names=names,
+        usecols=usecols,
+        dtype={column: dtypes[column] for column in usecols},
+        quoting=3,  # csv.QUOTE_NONE
+        encoding_errors='replace',
+        on_bad_lines='skip',
+        chunksize=chunksize,
+    )
+    with reader:
+        yield from reader
+
+
+def _read_export_pyarrow(source, usecols):
+    """
+    Parses an export with pyarrow's multithreaded CSV reader.
+
+    pandas' own pyarrow engine cannot combine names= with usecols=, so the
+    reader is driven directly and the result cast to the schema dtypes.
+    """
+    import pyarrow as pa
+    from pyarrow import csv as pa_csv
+
+    arrow_types = {
+        'Int64': pa.int64(), 'Int32': pa.int32(), 'Int8': pa.int8(),
+        'float64': pa.float64(), 'float32': pa.float32(),
+    }
+    column_types = {
+        column: arrow_types.get(GDELT_DTYPES[column], pa.string()) for column in usecols
+    }
+    table = pa_csv.read_csv(
+        source,
+        read_options=pa_csv.ReadOptions(column_names=GDELT_COLUMNS),
+        parse_options=pa_csv.ParseOptions(delimiter='\t'),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types=column_types,
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas().astype({column: GDELT_DTYPES[column] for column in usecols})
+
+
+def empty_export(columns=None):
+    """
+    Creates an empty GDELT frame with the schema dtypes.
+
+    Args:
+        columns (list): Columns to include; None includes all 61
+
+    Returns:
+        pandas.DataFrame: Zero-row frame
+    """
+    columns = list(columns) if columns is not None else GDELT_COLUMNS
+    return pd.DataFrame({
+        column: pd.Series(dtype=GDELT_DTYPES[column]) for column in columns
+    })
+
+
+def parse_dateadded(values):
+    """
+    Converts YYYYMMDDHHMMSS integers to datetimes with integer arithmetic.
+
+    This avoids formatting every value back to a string for strptime-style
+    parsing. Missing or malformed values become NaT.
+
+    Args:
+        values (pandas.Series): DATEADDED values (integers or digit strings)
+
+    Returns:
+        pandas.Series: datetime64 values aligned with the input index
+    """
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+    valid = ~np.isnan(numbers)
+    stamps = np.where(valid, numbers, 0).astype('int64')
+
+    parts = pd.DataFrame({
+        'year': stamps // 10**10,
+        'month': stamps // 10**8 % 100,
+        'day': stamps // 10**6 % 100,
+        'hour': stamps // 10**4 % 100,
+        'minute': stamps // 10**2 % 100,
+        'second': stamps % 100,
+    })
+    parts.loc[~valid, 'year'] = np.nan
+
+    result = pd.to_datetime(parts, errors='coerce')
+    result.index = values.index
+    return result
+
+
+def concat_frames(frames):
+    """
+    Concatenates GDELT frames without losing categorical dtypes.
+
+    pandas.concat falls back to object dtype when categoricals carry different
+    categories, so the categories are unioned first.
+
+    Args:
+        frames (list): DataFrames with the same columns
+
+    Returns:
+        pandas.DataFrame: Concatenated frame
+    """
+    frames = [frame for frame in frames if frame is not None]
+    if len(frames) > 1:
+        unified = {}
+        for column in frames[0].columns:
+            if isinstance(frames[0][column].dtype, pd.CategoricalDtype):
+                categories = frames[0][column].cat.categories
+                for frame in frames[1:]:
+                    categories = categories.union(frame[column].cat.categories)
+                unified[column] = categories
+        if unified:
+            frames = [
+                frame.assign(**{
+                    column: frame[column].cat.set_categories(categories)
+                    for column, categories in unified.items()
+                })
+                for frame in frames
+            ]
+    return pd.concat(frames) if frames else pd.DataFrame()
@@ -1,13 +1,147 @@
 import pandas as pd
 import numpy as np
-from gdelt_processor import get_event_details
+from cameo import resolve_event_codes
+from gdelt_schema import ICEWS_SOURCE_COLUMNS, parse_dateadded, empty_export
+import metrics
 
-def adapt_gdelt_to_icews(gdelt_df):
+# Text columns stored dictionary-encoded (categorical) in compact mode: a few
+# thousand distinct values repeated over every event, URLs included (the GKG
+# columns repeat per article, see enrichment.py)
+COMPACT_CATEGORY_COLUMNS = [
+    'cameo_code', 'event_root_type', 'event_base_type', 'event_type',
+    'source_name', 'source_country', 'target_name', 'target_country',
+    'country', 'location', 'source_url', 'source_sectors', 'target_sectors',
+    'gkg_record_id', 'gkg_themes',
+]
+
+# Numeric columns stored as float32 in compact mode
+COMPACT_FLOAT_COLUMNS = ['latitude', 'longitude', 'intensity', 'tone']
+
+def _fill_text(series, fill_value='Unknown'):
+    """
+    Fills missing values in a text column and returns plain strings.
+    
+    Categorical code columns from the typed GDELT schema need the placeholder
+    added as a category before they can be filled.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        if fill_value not in series.cat.categories:
+            series = series.cat.add_categories([fill_value])
+        return series.fillna(fill_value).astype(str)
+    return series.fillna(fill_value)
+
+def _build_icews_frame(gdelt_df):
+    """
+    Maps one GDELT frame to ICEWS columns in a single DataFrame construction.
+    
+    Rows without an event ID or date are dropped up front, so no column is
+    computed for rows that would be discarded.
+    """
+    if 'datetime' in gdelt_df.columns:
+        # Already parsed once by gdelt_schema.read_export
+        dates = gdelt_df['datetime']
+    else:
+        dates = parse_dateadded(gdelt_df['DATEADDED'])
+    
+    # Remove records with invalid values
+    valid = (gdelt_df['GlobalEventID'].notna() & dates.notna()).to_numpy()
+    if not valid.all():
+        gdelt_df = gdelt_df[valid]
+        dates = dates[valid]
+    
+    event_types = resolve_event_codes(gdelt_df['EventCode'])
+    
+    return pd.DataFrame({
+        # Core fields
+        'event_id': gdelt_df['GlobalEventID'],
+        'date': dates,
+        
+        # Event type info
+        'cameo_code': gdelt_df['EventCode'].astype(str),
+        'event_root_type': event_types['event_root_type'].astype(str),
+        'event_base_type': event_types['event_base_type'].astype(str),
+        'event_type': event_types['event_type'].astype(str),
+        
+        # Source and target actors, with placeholders for missing values
+        'source_name': _fill_text(gdelt_df['Actor1Name']),
+        'source_country': _fill_text(gdelt_df['Actor1CountryCode']),
+        'target_name': _fill_text(gdelt_df['Actor2Name']),
+        'target_country': _fill_text(gdelt_df['Actor2CountryCode']),
+        
+        # Location information
+        'country': _fill_text(gdelt_df['ActionGeo_CountryCode']),
+        'latitude': gdelt_df['ActionGeo_Lat'],
+        'longitude': gdelt_df['ActionGeo_Long'],
+        'location': _fill_text(gdelt_df['ActionGeo_FullName']),
+        
+        # Event details
+        'intensity': pd.to_numeric(gdelt_df['GoldsteinScale'], errors='coerce'),
+        'tone': pd.to_numeric(gdelt_df['AvgTone'], errors='coerce'),
+        'quad_class': gdelt_df['QuadClass'],
+        
+        # Source URL
+        'source_url': gdelt_df['SOURCEURL'],
+        
+        # Additional ICEWS-specific fields
+        'source_sectors': 'Unknown',
+        'target_sectors': 'Unknown',
+    }, index=gdelt_df.index)
+
+def compact_icews_frame(df):
+    """
+    Converts an ICEWS frame to the compact memory layout.
+    
+    Repeated text (event types, actors, countries, locations, CAMEO codes,
+    source URLs and the constant sector columns) becomes categorical, i.e.
+    small integer codes into one copy of each distinct value; coordinates,
+    intensity and tone become float32 and quad_class stays an Int8 code.
+    Values are unchanged, so every consumer of the regular layout can read it.
+    
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+    
+    Returns:
+        pandas.DataFrame: The same events in the compact layout
+    """
+    columns = {}
+    with metrics.stage('compact', rows_in=len(df)):
+        for column in COMPACT_CATEGORY_COLUMNS:
+            if column in df.columns and not isinstance(df[column].dtype, pd.CategoricalDtype):
+                columns[column] = df[column].astype('category')
+        for column in COMPACT_FLOAT_COLUMNS:
+            if column in df.columns and df[column].dtype != np.float32:
+                columns[column] = df[column].astype(np.float32)
+        if 'quad_class' in df.columns and df['quad_class'].dtype != 'Int8':
+            columns['quad_class'] = df['quad_class'].astype('Int8')
+        return df.assign(**columns) if columns else df
+
+def memory_report(df):
+    """
+    Reports the memory held by a frame, column by column.
+    
+    Args:
+        df (pandas.DataFrame): Any frame, typically events in ICEWS format
+    
+    Returns:
+        pandas.DataFrame: dtype, bytes and bytes per row for the index, every
+            column and a final 'total' row, counting string contents
+    """
+    usage = df.memory_usage(deep=True, index=True)
+    dtypes = pd.Series({'Index': str(df.index.dtype)})
+    dtypes = pd.concat([dtypes, df.dtypes.astype(str)])
+    report = pd.DataFrame({'dtype': dtypes.reindex(usage.index), 'bytes': usage})
+    report.loc['total'] = ['', int(usage.sum())]
+    report['bytes'] = report['bytes'].astype('int64')
+    report['bytes_per_row'] = (report['bytes'] / max(len(df), 1)).round(1)
+    return report
+
+def adapt_gdelt_to_icews(gdelt_df, compact=False):
     """
     Transforms GDELT data to match ICEWS format for compatibility with ICEWS Explorer.
     
     Args:
         gdelt_df (pandas.DataFrame): DataFrame containing GDELT data
+        compact (bool): Return the compact layout (see compact_icews_frame)
     
     Returns:
         pandas.DataFrame: Transformed data in ICEWS format
@@ -15,55 +149,46 @@ def adapt_gdelt_to_icews(gdelt_df):
     if gdelt_df is None or gdelt_df.empty:
         return pd.DataFrame()
     
-    # Create a new DataFrame for ICEWS format
-    icews_data = pd.DataFrame()
-    
-    # Map GDELT fields to ICEWS format
-    # Core fields
-    icews_data['event_id'] = gdelt_df['GlobalEventID']
-    icews_data['date'] = pd.to_datetime(gdelt_df['DATEADDED'], format='%Y%m%d%H%M%S')
-    
-    # Event type info
-    icews_data['cameo_code'] = gdelt_df['EventCode']
-    icews_data['event_type'] = gdelt_df['EventCode'].apply(get_event_details)
-    
-    # Source and target actors
-    icews_data['source_name'] = gdelt_df['Actor1Name']
-    icews_data['source_country'] = gdelt_df['Actor1CountryCode']
-    icews_data['target_name'] = gdelt_df['Actor2Name']
-    icews_data['target_country'] = gdelt_df['Actor2CountryCode']
-    
-    # Location information
-    icews_data['country'] = gdelt_df['ActionGeo_CountryCode']
-    icews_data['latitude'] = gdelt_df['ActionGeo_Lat']
-    icews_data['longitude'] = gdelt_df['ActionGeo_Long']
-    icews_data['location'] = gdelt_df['ActionGeo_FullName']
-    
-    # Event details
-    icews_data['intensity'] = gdelt_df['GoldsteinScale']
-    icews_data['tone'] = gdelt_df['AvgTone']
-    icews_data['quad_class'] = gdelt_df['QuadClass']
-    
-    # Source URL
-    icews_data['source_url'] = gdelt_df['SOURCEURL']
-    
-    # Fill missing values with appropriate placeholders
-    icews_data['source_name'] = icews_data['source_name'].fillna('Unknown')
-    icews_data['target_name'] = icews_data['target_name'].fillna('Unknown')
-    icews_data['source_country'] = icews_data['source_country'].fillna('Unknown')
-    icews_data['target_country'] = icews_data['target_country'].fillna('Unknown')
-    icews_data['country'] = icews_data['country'].fillna('Unknown')
-    icews_data['location'] = icews_data['location'].fillna('Unknown')
-    
-    # Convert numeric columns
-    icews_data['intensity'] = pd.to_numeric(icews_data['intensity'], errors='coerce')
-    icews_data['tone'] = pd.to_numeric(icews_data['tone'], errors='coerce')
-    
-    # Add additional ICEWS-specific fields
-    icews_data['source_sectors'] = 'Unknown'
-    icews_data['target_sectors'] = 'Unknown'
+    with metrics.stage('adapt', rows_in=len(gdelt_df)) as timer:
+        icews_df = _build_icews_frame(gdelt_df)
+        timer.stop(rows_out=len(icews_df))
+    metrics.count('rows_dropped', len(gdelt_df) - len(icews_df), reason='invalid')
+    return compact_icews_frame(icews_df) if compact else icews_df
+
+def adapt_gdelt_chunks(gdelt_chunks, compact=False):
+    """
+    Transforms a stream of GDELT chunks to ICEWS format one chunk at a time.
+    
+    Each output chunk has the same columns and semantics as
+    adapt_gdelt_to_icews, so memory stays proportional to one chunk. Pair it
+    with a chunked reader such as gdelt_processor.stream_gdelt_export or
+    gdelt_schema.iter_export.
     
-    # Remove records with invalid values
-    icews_data = icews_data.dropna(subset=['event_id', 'date', 'event_type'])
+    Args:
+        gdelt_chunks (iterable): GDELT DataFrames
+        compact (bool): Yield the compact layout (see compact_icews_frame)
+    
+    Yields:
+        pandas.DataFrame: Non-empty chunks in ICEWS format
+    """
+    for gdelt_df in gdelt_chunks:
+        if gdelt_df is None or gdelt_df.empty:
+            continue
+        with metrics.stage('adapt', rows_in=len(gdelt_df)) as timer:
+            icews_chunk = _build_icews_frame(gdelt_df)
+            timer.stop(rows_out=len(icews_chunk))
+        metrics.count('rows_dropped', len(gdelt_df) - len(icews_chunk), reason='invalid')
+        if not icews_chunk.empty:
+            yield compact_icews_frame(icews_chunk) if compact else icews_chunk
+
+def empty_icews_frame():
+    """
+    Creates an empty frame with the columns and dtypes adapted events have.
     
-    return icews_data
+    Returns:
+        pandas.DataFrame: Zero-row frame in ICEWS format
+    """
+    frame = _build_icews_frame(empty_export(ICEWS_SOURCE_COLUMNS))
+    # pandas gives dates parsed from no values the coarsest unit; use the one
+    # parsed dates have, so empty and non-empty outputs share a schema
+    return frame.astype({'date': parse_dateadded(pd.Series([19700101000000])).dtype})
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Background ingestor for the GDELT Data Visualization with ICEWS Explorer application.
+
+Polls lastupdate.txt, and whenever GDELT publishes a new 15-minute export
+slice it downloads, parses and adapts the slice to ICEWS format, appends it
+to the event store and publishes it as the store's latest snapshot. The
+Streamlit app then only reads the published snapshot, so page interactions
+never wait on a download.
+
+Example:
+    python ingestor.py --store event_store
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+import uuid
+
+from downloader import LASTUPDATE_URL, DEFAULT_TIMEOUT, fetch_update_list, slice_id, slice_time
+from event_store import DEFAULT_STORE_DIR, EventStore
+import metrics
+
+# Dedup index of the event IDs already written, kept inside the store directory
+DEDUP_INDEX_DIR = 'dedup_index'
+
+# GDELT publishes a new slice every 15 minutes, usually a few minutes after the slot starts
+SLICE_INTERVAL = datetime.timedelta(minutes=15)
+PUBLISH_GRACE = datetime.timedelta(minutes=1)
+DEFAULT_POLL_SECONDS = 60
+
+
+def latest_export_entry(url=LASTUPDATE_URL, timeout=DEFAULT_TIMEOUT):
+    """
+    Returns the listing entry of the newest export slice.
+
+    Args:
+        url (str): lastupdate.txt URL
+        timeout (float or tuple): Per-request timeout
+
+    Returns:
+        SliceFile: Entry of the .export.CSV.zip file, or None if not listed
+    """
+    for entry in fetch_update_list(url, timeout=timeout):
+        if entry.url.endswith('.export.CSV.zip'):
+            return entry
+    return None
+
+
+def store_new_events(store, icews_df, stamp, dedup=None):
+    """
+    Appends the events of a slice that were not written before.
+
+    The IDs are only recorded in the dedup index once the write succeeded,
+    so a failed write is retried in full on the next attempt.
+
+    The index is consulted here, at the store boundary, rather than while
+    fetching: it records what was stored, and the app still shows every
+    event of the latest slice whether or not it was stored before.
+
+    Args:
+        store (event_store.EventStore): Store to append to
+        icews_df (pandas.DataFrame): Adapted events of the slice
+        stamp (str): Slice ID, used as the part name
+        dedup (dedup_index.DedupIndex): Optional index of IDs already written
+
+    Returns:
+        int: Number of events written
+    """
+    if dedup is None:
+        store.write(icews_df, part_name=stamp)
+        return len(icews_df)
+
+    # Held from the check to the flush, so a process sharing the index (the
+    # app and the ingestor) cannot store the same events in between
+    with dedup.locked():
+        part_name = stamp
+        if not icews_df.empty:
+            new = dedup.unseen(icews_df['event_id'])
+            if not new.all():
+                # Part of the slice is stored already; add the rest as a separate
+                # part instead of replacing the stored one
+                icews_df = icews_df[new]
+                part_name = f"{stamp}-{uuid.uuid4().hex[:8]}"
+        store.write(icews_df, part_name=part_name)
+        if not icews_df.empty:
+            dedup.add(icews_df['event_id'], slice_time(stamp))
+            dedup.flush()
+    return len(icews_df)
+
+
+def open_dedup_index(store):
+    """Opens the dedup index kept in an event store's directory."""
+    from dedup_index import DedupIndex
+    return DedupIndex(os.path.join(store.root, DEDUP_INDEX_DIR))
+
+
+def ingest_slice(entry, store, cache=None, engine=None, timeout=DEFAULT_TIMEOUT, dedup=None, enrich=False):
+    """
+    Loads, adapts, stores and publishes one export slice.
+
+    The whole slice is published as the latest snapshot, but only events not
+    written before are appended to the store.
+
+    Args:
+        entry (SliceFile): Listing entry of the slice
+        store (event_store.EventStore): Store to append to and publish in
+        cache (slice_cache.SliceCache): Optional local slice cache
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+        timeout (float or tuple): Per-request timeout
+        dedup (dedup_index.DedupIndex): Optional index of IDs already written
+        enrich (bool): Join the slice's mentions and GKG files onto the events
+            (see enrichment.enrich_slice)
+
+    Returns:
+        tuple: (slice ID, number of ICEWS rows published, number of new rows stored)
+    """
+    from gdelt_processor import load_export_slice
+    from gdelt_schema import ICEWS_SOURCE_COLUMNS
+    from icews_adapter import adapt_gdelt_to_icews
+
+    gdelt_df = load_export_slice(entry, columns=ICEWS_SOURCE_COLUMNS, engine=engine,
+                                 cache=cache, timeout=timeout)
+    gdelt_df = gdelt_df.drop_duplicates(subset=['GlobalEventID'])
+    icews_df = adapt_gdelt_to_icews(gdelt_df)
+    if enrich:
+        from enrichment import enrich_slice
+        icews_df = enrich_slice(icews_df, entry.url, timeout=timeout)
+
+    stamp = slice_id(entry.url)
+    stored = store_new_events(store, icews_df, stamp, dedup=dedup)
+    store.publish_latest(icews_df, stamp)
+    return stamp, len(icews_df), stored
+
+
+def next_poll_delay(last_slice, now, poll_seconds=DEFAULT_POLL_SECONDS):
+    """
+    Returns how long to sleep before checking lastupdate.txt again.
+
+    Right after a slice is ingested there is nothing to poll for until the
+    next one is due, so the ingestor sleeps until then; once it is due (or
+    overdue) it falls back to polling every poll_seconds.
+
+    Args:
+        last_slice (datetime.datetime): Time of the last ingested slice, or None
+        now (datetime.datetime): Current UTC time
+        poll_seconds (float): Polling interval while a slice is due
+
+    Returns:
+        float: Seconds to sleep
+    """
+    if last_slice is None:
+        return poll_seconds
+    due = last_slice + SLICE_INTERVAL + PUBLISH_GRACE
+    return max(poll_seconds, (due - now).total_seconds())
+
+
+def run_ingestor(store, cache=None, url=LASTUPDATE_URL, poll_seconds=DEFAULT_POLL_SECONDS,
+                 engine=None, timeout=DEFAULT_TIMEOUT, once=False, dedup=None, enrich=False):
+    """
+    Ingests every new slice until interrupted.
+
+    Errors are reported and retried on the next poll; they never stop the loop.
+
+    Args:
+        store (event_store.EventStore): Store to append to and publish in
+        cache (slice_cache.SliceCache): Optional local slice cache
+        url (str): lastupdate.txt URL
+        poll_seconds (float): Polling interval while a slice is due
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+        timeout (float or tuple): Per-request timeout
+        once (bool): Ingest the current slice (if new) and return
+        dedup (dedup_index.DedupIndex): Optional index of IDs already written
+        enrich (bool): Join each slice's mentions and GKG files onto its events
+    """
+    published = store.latest_meta()
+    last_id = published['slice_id'] if published else None
+    if last_id:
+        print(f"Last published slice: {last_id}")
+
+    while True:
+        try:
+            entry = latest_export_entry(url, timeout=timeout)
+            if entry is None:
+                print("No export slice listed in lastupdate.txt")
+            elif slice_id(entry.url) != last_id:
+                started = time.time()
+                last_id, rows, stored = ingest_slice(entry, store, cache=cache, engine=engine,
+                                                     timeout=timeout, dedup=dedup, enrich=enrich)
+                print(f"Published slice {last_id}: {rows} events ({stored} new) "
+                      f"in {time.time() - started:.1f}s")
+        except Exception as e:
+            print(f"Error ingesting GDELT data: {e}")
+
+        if once:
+            return
+
+        last_slice = slice_time(last_id) if last_id else None
+        time.sleep(next_poll_delay(last_slice, datetime.datetime.utcnow(), poll_seconds))
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Continuously ingest new GDELT slices in ICEWS format.")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Event store directory")
+    parser.add_argument('--url', default=LASTUPDATE_URL, help="lastupdate.txt URL")
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_SECONDS,
+                        help="Seconds between polls while a new slice is due")
+    parser.add_argument('--engine', choices=('c', 'pyarrow', 'auto'), default=None, help="CSV parse engine")
+    parser.add_argument('--cache-dir', default=None, help="Slice cache directory (default cache when omitted)")
+    parser.add_argument('--no-cache', action='store_true', help="Do not cache downloaded slices")
+    parser.add_argument('--no-dedup', action='store_true',
+                        help="Store every event, even if its ID was stored before")
+    parser.add_argument('--enrich', action='store_true',
+                        help="Join each slice's mentions and GKG files onto its events")
+    parser.add_argument('--once', action='store_true', help="Ingest the current slice and exit")
+    parser.add_argument('--metrics-log', default=None,
+                        help="Write per-stage metrics as JSON lines to this file ('-' for stderr)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve Prometheus metrics at http://127.0.0.1:PORT/metrics")
+    args = parser.parse_args(argv)
+
+    metrics.configure_from_env()
+    if args.metrics_log:
+        metrics.configure_log(args.metrics_log)
+        metrics.enable()
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        metrics.enable()
+
+    cache = None
+    if not args.no_cache:
+        from slice_cache import SliceCache
+        cache = SliceCache(args.cache_dir) if args.cache_dir else SliceCache()
+
+    store = EventStore(args.store)
+    dedup = None if args.no_dedup else open_dedup_index(store)
+
+    print(f"Starting GDELT ingestor, publishing to {args.store}")
+    print("Press Ctrl+C to stop the ingestor.")
+    try:
+        run_ingestor(store, cache=cache, url=args.url, poll_seconds=args.poll,
+                     engine=args.engine, once=args.once, dedup=dedup, enrich=args.enrich)
+    except KeyboardInterrupt:
+        print("\nIngestor has been stopped.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
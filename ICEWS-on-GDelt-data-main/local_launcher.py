@@ -40,7 +40,7 @@ gatherUsageStats = false
                       stderr=subprocess.PIPE)
     except (subprocess.CalledProcessError, FileNotFoundError):
         print("Streamlit not found. Please install it with:")
-        print("pip install streamlit pandas numpy plotly requests")
+        print("pip install streamlit pandas numpy plotly requests pyarrow")
         return
     
     # Start streamlit with the full app
@@ -0,0 +1,304 @@
+"""
+Pipeline instrumentation: stage timings, row counts and counters.
+
+Collection is off unless enabled: GDELT_METRICS=1, ingestor.py's
+--metrics-log or --metrics-port, or the app's sidebar switch. While off,
+stage() returns a shared no-op timer and count() returns immediately, so
+instrumented code pays one flag check per call.
+
+While on, every finished stage updates a process-wide registry (calls,
+total and maximum duration, rows in and out) and, when a log is configured,
+writes one JSON line. The registry can be read with snapshot(), rendered in
+the Prometheus text format with prometheus_text(), or served over HTTP with
+serve().
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_PREFIX = 'gdelt'
+LOGGER_NAME = 'gdelt.metrics'
+
+_enabled = os.environ.get('GDELT_METRICS', '').lower() in ('1', 'true', 'yes', 'on')
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+_servers = {}
+_logger = logging.getLogger(LOGGER_NAME)
+
+
+def enabled():
+    """Returns True while metrics are being collected."""
+    return _enabled
+
+
+def enable(flag=True):
+    """Turns collection on or off for the whole process."""
+    global _enabled
+    _enabled = bool(flag)
+
+
+def reset():
+    """Drops every recorded stage and counter."""
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+
+class StageTimer:
+    """
+    Times one run of a pipeline stage; created by stage().
+
+    Use it as a context manager, or call stop() explicitly when the stage
+    does not map onto one block. The run is recorded once, on the first
+    stop(); an exception leaving the block counts as an error.
+    """
+
+    __slots__ = ('name', 'rows_in', 'start', 'stopped')
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.start = time.perf_counter()
+        self.stopped = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop(error=exc_type is not None)
+        return False
+
+    def stop(self, rows_out=None, error=False, **fields):
+        """
+        Records the run.
+
+        Args:
+            rows_out (int): Rows the stage produced
+            error (bool): Whether the stage failed
+            **fields: Extra values for the JSON log line only
+        """
+        if self.stopped:
+            return
+        self.stopped = True
+        _record(self.name, time.perf_counter() - self.start, self.rows_in, rows_out, error, fields)
+
+
+class _NullTimer:
+    """Timer handed out while collection is off; does nothing."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def stop(self, rows_out=None, error=False, **fields):
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def stage(name, rows_in=None):
+    """
+    Starts timing a stage.
+
+    Args:
+        name (str): Stage name, e.g. 'download' or 'adapt'
+        rows_in (int): Rows the stage received
+
+    Returns:
+        StageTimer: Timer to stop, or a no-op timer while collection is off
+    """
+    if not _enabled:
+        return _NULL_TIMER
+    return StageTimer(name, rows_in)
+
+
+def count(name, value=1, **labels):
+    """
+    Adds to a counter such as bytes downloaded or rows dropped.
+
+    Args:
+        name (str): Counter name, e.g. 'rows_dropped'
+        value (int): Amount to add
+        **labels: Label values, e.g. reason='dedup'
+    """
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+    if _logger.isEnabledFor(logging.INFO):
+        _logger.info(json.dumps({'time': time.time(), 'counter': name, 'value': value, **labels}))
+
+
+def _record(name, seconds, rows_in, rows_out, error, fields):
+    with _lock:
+        entry = _stages.get(name)
+        if entry is None:
+            entry = _stages[name] = {'calls': 0, 'errors': 0, 'seconds_sum': 0.0, 'seconds_max': 0.0,
+                                     'seconds_last': 0.0, 'rows_in': 0, 'rows_out': 0}
+        entry['calls'] += 1
+        entry['errors'] += int(error)
+        entry['seconds_sum'] += seconds
+        entry['seconds_max'] = max(entry['seconds_max'], seconds)
+        entry['seconds_last'] = seconds
+        entry['rows_in'] += rows_in or 0
+        entry['rows_out'] += rows_out or 0
+    if _logger.isEnabledFor(logging.INFO):
+        record = {'time': time.time(), 'stage': name, 'seconds': round(seconds, 6)}
+        if rows_in is not None:
+            record['rows_in'] = rows_in
+        if rows_out is not None:
+            record['rows_out'] = rows_out
+        if error:
+            record['error'] = True
+        record.update(fields)
+        _logger.info(json.dumps(record, default=str))
+
+
+def snapshot():
+    """
+    Returns a copy of everything recorded so far.
+
+    Returns:
+        dict: 'stages' (stage -> calls, errors, seconds_sum/max/last, rows_in,
+            rows_out) and 'counters' (list of (name, labels, value))
+    """
+    with _lock:
+        return {
+            'stages': {name: dict(entry) for name, entry in _stages.items()},
+            'counters': [(name, dict(labels), value) for (name, labels), value in _counters.items()],
+        }
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def prometheus_text():
+    """
+    Renders the registry in the Prometheus text exposition format.
+
+    Returns:
+        str: One family per stage measure and per counter
+    """
+    data = snapshot()
+    lines = []
+    families = [
+        ('stage_seconds', 'summary', 'Duration of pipeline stages', None),
+        ('stage_seconds_max', 'gauge', 'Longest run of each pipeline stage', 'seconds_max'),
+        ('stage_errors_total', 'counter', 'Failed runs of each pipeline stage', 'errors'),
+        ('stage_rows_in_total', 'counter', 'Rows received by each pipeline stage', 'rows_in'),
+        ('stage_rows_out_total', 'counter', 'Rows produced by each pipeline stage', 'rows_out'),
+    ]
+    for family, kind, help_text, field in families:
+        metric = f"{METRIC_PREFIX}_{family}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, entry in sorted(data['stages'].items()):
+            labels = _labels([('stage', name)])
+            if field is None:
+                lines.append(f"{metric}_sum{labels} {entry['seconds_sum']:.6f}")
+                lines.append(f"{metric}_count{labels} {entry['calls']}")
+            else:
+                lines.append(f"{metric}{labels} {entry[field]}")
+
+    by_name = {}
+    for name, labels, value in data['counters']:
+        by_name.setdefault(name, []).append((labels, value))
+    for name, values in sorted(by_name.items()):
+        metric = f"{METRIC_PREFIX}_{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for labels, value in sorted(values, key=lambda item: sorted(item[0].items())):
+            lines.append(f"{metric}{_labels(sorted(labels.items()))} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = prometheus_text().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port, host='127.0.0.1'):
+    """
+    Serves prometheus_text() at http://host:port/metrics from a daemon thread.
+
+    Calling it again for the same port returns the running server.
+
+    Args:
+        port (int): TCP port
+        host (str): Interface to listen on
+
+    Returns:
+        http.server.ThreadingHTTPServer: The server
+    """
+    with _lock:
+        server = _servers.get((host, port))
+        if server is None:
+            server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            server.daemon_threads = True
+            threading.Thread(target=server.serve_forever, name=f'metrics-{port}', daemon=True).start()
+            _servers[(host, port)] = server
+        return server
+
+
+def configure_log(destination):
+    """
+    Writes one JSON line per finished stage and counter update.
+
+    Replaces the destination configured before, if any, so each line is
+    written once (e.g. a command-line flag overrides GDELT_METRICS_LOG).
+
+    Args:
+        destination (str): File path, or '-' for standard error
+    """
+    handler = logging.StreamHandler(sys.stderr) if destination == '-' else logging.FileHandler(destination)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for previous in list(_logger.handlers):
+        _logger.removeHandler(previous)
+        previous.close()
+    _logger.addHandler(handler)
+    _logger.setLevel(logging.INFO)
+    _logger.propagate = False
+
+
+def configure_from_env():
+    """
+    Applies GDELT_METRICS_LOG (JSON log destination) and GDELT_METRICS_PORT
+    (Prometheus endpoint port); either one also enables collection. Safe to
+    call more than once.
+    """
+    destination = os.environ.get('GDELT_METRICS_LOG')
+    port = os.environ.get('GDELT_METRICS_PORT')
+    if destination and not _logger.handlers:
+        configure_log(destination)
+        enable()
+    if port:
+        try:
+            serve(int(port))
+            enable()
+        except (OSError, ValueError) as e:
+            print(f"Error starting metrics endpoint on port {port}: {e}")
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the GDELT 2.0 file server, for offline and load testing.
+
+Serves lastupdate.txt, masterfilelist.txt and the slice zips found in a
+directory (archived GDELT files, or synthetic ones written with
+benchmarks/synthetic.py --slices). Slices are published one at a time, in
+slice ID order, at a configurable cadence, so clients see the listing move
+the way the real one does. Latency, per-connection bandwidth, HTTP error
+rate and dropped connections can be injected to measure sustained ingestion
+throughput and tail latency.
+
+Point the app, ingestor or backfill at it with GDELT_BASE_URL (or the
+ingestor's --url / backfill's --source).
+
+Example:
+    python benchmarks/synthetic.py --slices 96 --rows 5000 --directory mirror_data
+    python mirror_server.py mirror_data --port 8765 --cadence 5 --latency 0.05 --bandwidth 2000000
+    GDELT_BASE_URL=http://127.0.0.1:8765 python ingestor.py --poll 1
+"""
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from downloader import CHUNK_SIZE
+
+# Slice files as GDELT names them
+SLICE_FILE_PATTERN = re.compile(r'^(\d{14})\.(export\.CSV|mentions\.CSV|gkg\.csv)\.zip$')
+# Order of the files of one slice in GDELT listings
+KIND_ORDER = ('export.CSV', 'mentions.CSV', 'gkg.csv')
+
+DEFAULT_PORT = 8765
+DEFAULT_ERROR_STATUS = 503
+
+
+class SliceDirectory:
+    """
+    The slice files of a directory and the part of them published so far.
+
+    Args:
+        directory (str): Directory holding <slice ID>.<kind>.zip files
+        cadence (float): Seconds between two slice publications; 0 publishes
+            every slice at once
+        initial (int): Slices published at start-up
+    """
+
+    def __init__(self, directory, cadence=0, initial=1):
+        self.directory = directory
+        self.cadence = cadence
+        self.initial = max(1, initial)
+        self.started = time.monotonic()
+        self._md5 = {}
+        self._lock = threading.Lock()
+
+        files = {}
+        for name in os.listdir(directory):
+            match = SLICE_FILE_PATTERN.match(name)
+            if match:
+                files.setdefault(match.group(1), []).append(name)
+        if not files:
+            raise ValueError(f"No GDELT slice files (<YYYYMMDDHHMMSS>.export.CSV.zip) in {directory}")
+        self.stamps = sorted(files)
+        self._position = {stamp: i for i, stamp in enumerate(self.stamps)}
+        kind = lambda name: KIND_ORDER.index(SLICE_FILE_PATTERN.match(name).group(2))  # noqa: E731
+        self.files = {stamp: sorted(names, key=kind) for stamp, names in files.items()}
+
+    def published(self):
+        """Returns the number of slices published so far."""
+        if not self.cadence:
+            return len(self.stamps)
+        elapsed = time.monotonic() - self.started
+        return min(len(self.stamps), self.initial + int(elapsed // self.cadence))
+
+    def is_published(self, name):
+        """Returns True if name is a file of a published slice."""
+        match = SLICE_FILE_PATTERN.match(name)
+        if not match or name not in self.files.get(match.group(1), ()):
+            return False
+        return self._position[match.group(1)] < self.published()
+
+    def _entry(self, name, base_url):
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            digest = self._md5.get(name)
+        if digest is None:
+            md5 = hashlib.md5()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1024 * 1024), b''):
+                    md5.update(block)
+            digest = md5.hexdigest()
+            with self._lock:
+                self._md5[name] = digest
+        return f"{os.path.getsize(path)} {digest} {base_url}/{name}\n"
+
+    def lastupdate(self, base_url):
+        """Returns lastupdate.txt: the files of the newest published slice."""
+        stamp = self.stamps[self.published() - 1]
+        return ''.join(self._entry(name, base_url) for name in self.files[stamp])
+
+    def masterfilelist(self, base_url):
+        """Returns masterfilelist.txt: the files of every published slice."""
+        return ''.join(self._entry(name, base_url)
+                       for stamp in self.stamps[:self.published()] for name in self.files[stamp])
+
+
+class MirrorStats:
+    """Thread-safe request counters, printed when the server stops."""
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.dropped = 0
+        self.bytes_sent = 0
+        self.durations = []
+        self._lock = threading.Lock()
+
+    def record(self, seconds, sent, error=False, dropped=False):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.dropped += int(dropped)
+            self.bytes_sent += sent
+            self.durations.append(seconds)
+
+    def summary(self):
+        with self._lock:
+            durations = sorted(self.durations)
+            line = (f"{self.requests} requests, {self.errors} injected errors, {self.dropped} dropped, "
+                    f"{self.bytes_sent / 2**20:.1f} MiB sent")
+        if durations:
+            p50 = durations[len(durations) // 2]
+            p99 = durations[min(len(durations) - 1, int(len(durations) * 0.99))]
+            line += f", response time p50 {p50 * 1000:.0f} ms, p99 {p99 * 1000:.0f} ms"
+        return line
+
+
+class MirrorHandler(BaseHTTPRequestHandler):
+    """Serves the listings and slice files of server.slices, with injected faults."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def _serve(self, head):
+        server = self.server
+        started = time.perf_counter()
+        name = self.path.split('?')[0].rsplit('/', 1)[-1]
+
+        delay = server.latency + (server.rng_exponential(server.jitter) if server.jitter else 0)
+        if delay:
+            time.sleep(delay)
+
+        if server.error_rate and server.rng_random() < server.error_rate:
+            self._send_bytes(server.error_status, b'Injected error\n', 'text/plain', head)
+            server.stats.record(time.perf_counter() - started, 0, error=True)
+            return
+
+        if name == 'lastupdate.txt':
+            body = server.slices.lastupdate(server.public_url).encode('ascii')
+            sent = self._send_bytes(200, body, 'text/plain', head)
+        elif name == 'masterfilelist.txt':
+            body = server.slices.masterfilelist(server.public_url).encode('ascii')
+            sent = self._send_bytes(200, body, 'text/plain', head)
+        elif server.slices.is_published(name):
+            sent = self._send_file(os.path.join(server.slices.directory, name), head)
+        else:
+            sent = self._send_bytes(404, b'Not found\n', 'text/plain', head)
+        server.stats.record(time.perf_counter() - started, abs(sent), dropped=sent < 0)
+
+    def _send_bytes(self, status, body, content_type, head):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if head:
+            return 0
+        return self._write(body, len(body))
+
+    def _send_file(self, path, head):
+        size = os.path.getsize(path)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/zip')
+        self.send_header('Content-Length', str(size))
+        self.end_headers()
+        if head:
+            return 0
+        with open(path, 'rb') as f:
+            return self._write(f, size)
+
+    def _write(self, source, size):
+        """
+        Writes a body at the configured bandwidth, possibly dropping the connection.
+
+        Returns:
+            int: Bytes sent, negated when the connection was dropped on purpose
+        """
+        server = self.server
+        # A dropped body is cut after at least one byte and before its last,
+        # so the drop always happens mid-body and is always recorded
+        drop_at = None
+        if server.drop_rate and size > 1 and server.rng_random() < server.drop_rate:
+            drop_at = 1 + int((size - 1) * server.rng_random())
+        # Small writes keep the rate smooth when bandwidth is capped
+        block = min(CHUNK_SIZE, max(1024, int(server.bandwidth / 20))) if server.bandwidth else CHUNK_SIZE
+        started = time.perf_counter()
+        sent = 0
+        while sent < size:
+            length = block if drop_at is None else min(block, drop_at - sent)
+            data = source[sent:sent + length] if isinstance(source, bytes) else source.read(length)
+            if not data:
+                break
+            self.wfile.write(data)
+            sent += len(data)
+            if drop_at is not None and sent >= drop_at:
+                self.close_connection = True
+                return -sent
+            if server.bandwidth:
+                ahead = sent / server.bandwidth - (time.perf_counter() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+        return sent
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class MirrorServer(ThreadingHTTPServer):
+    """
+    HTTP server for a SliceDirectory with fault injection.
+
+    Args:
+        address (tuple): (host, port) to listen on
+        slices (SliceDirectory): Files to serve
+        public_url (str): Base URL written into the listings; defaults to
+            http://host:port
+        latency (float): Seconds added before every response
+        jitter (float): Mean of an extra exponentially distributed delay in
+            seconds, which gives the response times a tail
+        bandwidth (float): Bytes per second per response; 0 is unlimited
+        error_rate (float): Share of requests answered with error_status
+        error_status (int): HTTP status of injected errors
+        drop_rate (float): Share of responses cut off part way through the body
+        seed (int): Seed of the fault injection, for reproducible runs
+        verbose (bool): Log every request
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, slices, public_url=None, latency=0.0, jitter=0.0, bandwidth=0,
+                 error_rate=0.0, error_status=DEFAULT_ERROR_STATUS, drop_rate=0.0, seed=None, verbose=False):
+        super().__init__(address, MirrorHandler)
+        self.slices = slices
+        self.public_url = (public_url or f"http://{address[0]}:{self.server_address[1]}").rstrip('/')
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.drop_rate = drop_rate
+        self.verbose = verbose
+        self.stats = MirrorStats()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def rng_random(self):
+        with self._rng_lock:
+            return self._rng.random()
+
+    def rng_exponential(self, mean):
+        with self._rng_lock:
+            return self._rng.expovariate(1.0 / mean)
+
+
+def main(argv=None):
+    """Command-line entry point."""
+    parser = argparse.ArgumentParser(description="Serve a directory of GDELT slice files like the GDELT file server.")
+    parser.add_argument('directory', help="Directory of <YYYYMMDDHHMMSS>.export.CSV.zip (and mentions/gkg) files")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument('--public-url', default=None,
+                        help="Base URL written into the listings (default: http://HOST:PORT)")
+    parser.add_argument('--cadence', type=float, default=0,
+                        help="Seconds between slice publications (GDELT: 900); 0 publishes every slice at once")
+    parser.add_argument('--initial', type=int, default=1, help="Slices published at start-up when --cadence is set")
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds added before every response")
+    parser.add_argument('--jitter', type=float, default=0.0,
+                        help="Mean extra delay in seconds, exponentially distributed")
+    parser.add_argument('--bandwidth', type=float, default=0,
+                        help="Bytes per second per response (0: unlimited)")
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help="Share of requests answered with --error-status")
+    parser.add_argument('--error-status', type=int, default=DEFAULT_ERROR_STATUS, help="HTTP status of injected errors")
+    parser.add_argument('--drop-rate', type=float, default=0.0,
+                        help="Share of responses whose connection is dropped part way through")
+    parser.add_argument('--seed', type=int, default=None, help="Seed of the fault injection")
+    parser.add_argument('--verbose', action='store_true', help="Log every request")
+    args = parser.parse_args(argv)
+
+    try:
+        slices = SliceDirectory(args.directory, cadence=args.cadence, initial=args.initial)
+    except (OSError, ValueError) as e:
+        print(f"Error reading slice directory: {e}")
+        return 1
+
+    server = MirrorServer((args.host, args.port), slices, public_url=args.public_url, latency=args.latency,
+                          jitter=args.jitter, bandwidth=args.bandwidth, error_rate=args.error_rate,
+                          error_status=args.error_status, drop_rate=args.drop_rate, seed=args.seed,
+                          verbose=args.verbose)
+    print(f"Serving {len(slices.stamps)} slices from {args.directory} at {server.public_url}")
+    print(f"Set GDELT_BASE_URL={server.public_url} to use it. Press Ctrl+C to stop.")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\nMirror stopped: {server.stats.summary()}")
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
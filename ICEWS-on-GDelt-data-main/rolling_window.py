@@ -0,0 +1,198 @@
+import collections
+import datetime
+import threading
+
+from downloader import (
+    LASTUPDATE_URL, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT, SliceFile, create_session,
+    download_files, fetch_update_list, slice_id, slice_time, slice_ids_between, slice_url,
+)
+from gdelt_processor import read_export_zip
+from gdelt_schema import ICEWS_SOURCE_COLUMNS, concat_frames
+from icews_adapter import adapt_gdelt_to_icews, memory_report
+from rollup import RollupCube
+
+# Window lengths offered by the app, in hours
+WINDOW_HOURS = (6, 24)
+
+
+class RollingWindow:
+    """
+    In-memory ring buffer of adapted GDELT slices covering the last N hours.
+
+    Each refresh downloads and adapts only the slices published after the
+    newest one held, then drops the slices that have left the window. Events
+    are deduplicated on GlobalEventID as each slice arrives, against the set
+    of IDs already held, so a refresh costs one slice of work regardless of
+    the window length. A slice that is missing on the server (HTTP 404) is
+    skipped; one that failed for any other reason is retried on the following
+    refreshes until it succeeds or leaves the window. A rollup cube is kept
+    in step with the slices held.
+
+    Refreshes are serialised, so one window can be shared by every session
+    of the app. Frames returned by frame() are shared and must be treated as
+    read-only.
+
+    Args:
+        hours (float): Window length
+        cache (slice_cache.SliceCache): Optional local slice cache
+        engine (str): Parse engine, see gdelt_schema.resolve_engine
+        max_workers (int): Number of concurrent slice downloads
+        timeout (float or tuple): Per-request timeout in seconds
+        url (str): lastupdate.txt URL
+        compact (bool): Hold slices in the compact layout (see
+            icews_adapter.compact_icews_frame)
+    """
+
+    def __init__(self, hours=6, cache=None, engine=None, max_workers=DEFAULT_MAX_WORKERS,
+                 timeout=DEFAULT_TIMEOUT, url=LASTUPDATE_URL, compact=True):
+        self.span = datetime.timedelta(hours=hours)
+        self.cache = cache
+        self.engine = engine
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.url = url
+        self.compact = compact
+        self._slices = collections.OrderedDict()  # slice ID -> adapted frame, oldest first
+        self._seen = set()
+        self._failed = set()  # slice IDs to retry on the next refresh
+        self._newest = None
+        self._frame = None
+        self._rollup = RollupCube()
+        self._lock = threading.Lock()
+
+    @property
+    def newest(self):
+        """ID of the newest slice fetched, or None before the first refresh."""
+        return self._newest
+
+    def _add_slice(self, stamp, gdelt_df):
+        """Adapts one parsed slice and keeps only the events not held yet."""
+        gdelt_df = gdelt_df.drop_duplicates(subset=['GlobalEventID'])
+        gdelt_df = gdelt_df[~gdelt_df['GlobalEventID'].isin(self._seen)]
+        icews_df = adapt_gdelt_to_icews(gdelt_df, compact=self.compact)
+        if icews_df.empty:
+            return
+        icews_df = icews_df.sort_values('date', ascending=False)
+        self._seen.update(icews_df['event_id'].tolist())
+        self._slices[stamp] = icews_df
+        self._rollup.add(stamp, icews_df)
+
+    def _evict(self, window_start):
+        """Drops slices published at or before window_start; returns how many."""
+        evicted = 0
+        while self._slices:
+            stamp = next(iter(self._slices))
+            if slice_time(stamp) > window_start:
+                break
+            dropped = self._slices.pop(stamp)
+            self._seen.difference_update(dropped['event_id'].tolist())
+            self._rollup.remove(stamp)
+            evicted += 1
+        return evicted
+
+    def refresh(self):
+        """
+        Brings the window up to the latest published slice.
+
+        Returns:
+            int: Number of slices added
+        """
+        with self._lock:
+            session = create_session(self.max_workers)
+            latest = None
+            for entry in fetch_update_list(self.url, session=session, timeout=self.timeout):
+                if entry.url.endswith('.export.CSV.zip'):
+                    latest = entry
+                    break
+            if latest is None:
+                return 0
+
+            latest_id = slice_id(latest.url)
+            latest_time = slice_time(latest_id)
+            window_start = latest_time - self.span
+            after = window_start
+            if self._newest is not None:
+                after = max(after, slice_time(self._newest))
+
+            # Slices that failed before are retried along with the new ones
+            self._failed = {stamp for stamp in self._failed if slice_time(stamp) > window_start}
+            stamps = sorted(self._failed.union(slice_ids_between(after, latest_time)))
+
+            # Only the newest slice is listed with its MD5; older ones are
+            # addressed by name, and the cache keys and checks them by name
+            # and zip CRCs instead (see slice_cache.SliceCache)
+            base_url = latest.url.rsplit('/', 1)[0]
+            entries = [
+                latest if stamp == latest_id else SliceFile(None, None, slice_url(base_url, stamp))
+                for stamp in stamps
+            ]
+
+            added = 0
+            downloads = download_files(entries, max_workers=self.max_workers, timeout=self.timeout,
+                                       session=session, cache=self.cache)
+            for stamp, entry, download in zip(stamps, entries, downloads):
+                try:
+                    if download.error is not None:
+                        raise download.error
+                    gdelt_df = read_export_zip(download.content, columns=ICEWS_SOURCE_COLUMNS,
+                                               engine=self.engine)
+                    self._add_slice(stamp, gdelt_df)
+                    self._failed.discard(stamp)
+                    added += 1
+                except Exception as e:
+                    print(f"Error processing file {entry.url}: {e}")
+                    response = getattr(e, 'response', None)
+                    if getattr(response, 'status_code', None) == 404:
+                        self._failed.discard(stamp)
+                    else:
+                        self._failed.add(stamp)
+
+            if added and list(self._slices) != sorted(self._slices):
+                # A retried slice arrived after newer ones; restore slice order
+                self._slices = collections.OrderedDict(sorted(self._slices.items()))
+            if entries:
+                self._newest = latest_id
+            if self._evict(window_start) or added:
+                self._frame = None
+            return added
+
+    def frame(self):
+        """
+        Returns every event in the window, newest slice first.
+
+        The concatenated frame is built once per refresh and then reused.
+
+        Returns:
+            pandas.DataFrame: Events in ICEWS format
+        """
+        with self._lock:
+            if self._frame is None:
+                frames = list(reversed(self._slices.values()))
+                self._frame = concat_frames(frames).reset_index(drop=True)
+            return self._frame
+
+    def rollup(self):
+        """
+        Returns the rollup cube of every event in the window.
+
+        Returns:
+            pandas.DataFrame: Cube, see rollup.rollup_events
+        """
+        with self._lock:
+            return self._rollup.total()
+
+    def stats(self):
+        """
+        Summarises the window contents.
+
+        Returns:
+            dict: Number of slices and events held, the newest slice ID and
+                the bytes held by the slices
+        """
+        with self._lock:
+            return {
+                'slices': len(self._slices),
+                'events': len(self._seen),
+                'newest': self._newest,
+                'bytes': sum(int(memory_report(df).at['total', 'bytes']) for df in self._slices.values()),
+            }
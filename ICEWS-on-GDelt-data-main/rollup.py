@@ -0,0 +1,143 @@
+import collections
+import threading
+
+import pandas as pd
+
+# GDELT stamps every event of a slice with the slice time, so 15-minute
+# buckets lose nothing for live data
+DEFAULT_BUCKET = '15min'
+
+# Goldstein intensity categories shown in the Event Analysis tab
+INTENSITY_BINS = [-10, -5, 0, 5, 10]
+INTENSITY_LABELS = ['Very Negative', 'Negative', 'Positive', 'Very Positive']
+
+# Cube key and the additive measures kept per key. event_root_type and
+# intensity_category follow from event_type, so they add no extra rows.
+CUBE_DIMENSIONS = ['bucket', 'event_root_type', 'event_type', 'country', 'quad_class', 'intensity_category']
+CUBE_MEASURES = ['count', 'intensity_sum', 'intensity_count', 'tone_sum', 'tone_count']
+
+
+def rollup_events(df, bucket=DEFAULT_BUCKET):
+    """
+    Aggregates ICEWS events into a cube of counts and Goldstein/tone sums.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+        bucket (str): Time bucket width as a pandas frequency
+
+    Returns:
+        pandas.DataFrame: One row per CUBE_DIMENSIONS key with CUBE_MEASURES
+    """
+    if df is None or df.empty:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS + CUBE_MEASURES)
+
+    intensity = df['intensity'].astype('float64')
+    tone = df['tone'].astype('float64')
+    frame = pd.DataFrame({
+        'bucket': df['date'].dt.floor(bucket),
+        'event_root_type': df['event_root_type'],
+        'event_type': df['event_type'],
+        'country': df['country'],
+        'quad_class': df['quad_class'],
+        'intensity_category': pd.cut(intensity, bins=INTENSITY_BINS, labels=INTENSITY_LABELS),
+        'count': 1,
+        'intensity_sum': intensity.fillna(0),
+        'intensity_count': intensity.notna().astype('int64'),
+        'tone_sum': tone.fillna(0),
+        'tone_count': tone.notna().astype('int64'),
+    })
+    return merge_cubes([frame])
+
+
+def merge_cubes(cubes):
+    """
+    Adds cubes (or raw cube rows) together key by key.
+
+    Args:
+        cubes (list): DataFrames with CUBE_DIMENSIONS and CUBE_MEASURES columns
+
+    Returns:
+        pandas.DataFrame: Combined cube
+    """
+    cubes = [cube for cube in cubes if cube is not None and not cube.empty]
+    if not cubes:
+        return pd.DataFrame(columns=CUBE_DIMENSIONS + CUBE_MEASURES)
+    combined = pd.concat(cubes, ignore_index=True) if len(cubes) > 1 else cubes[0]
+    return combined.groupby(CUBE_DIMENSIONS, observed=True, dropna=False, sort=False)[CUBE_MEASURES] \
+        .sum().reset_index()
+
+
+def summarise(cube, by):
+    """
+    Rolls a cube up to one or more dimensions.
+
+    Args:
+        cube (pandas.DataFrame): Cube from rollup_events or RollupCube.total
+        by (str or list): Dimensions to keep
+
+    Returns:
+        pandas.DataFrame: Event count and average Goldstein intensity and tone
+            per value of by, largest count first
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    totals = cube.groupby(by, observed=True, sort=False)[CUBE_MEASURES].sum().reset_index()
+    totals['avg_intensity'] = totals['intensity_sum'] / totals['intensity_count'].where(totals['intensity_count'] > 0)
+    totals['avg_tone'] = totals['tone_sum'] / totals['tone_count'].where(totals['tone_count'] > 0)
+    totals = totals.sort_values('count', ascending=False, ignore_index=True)
+    return totals[by + ['count', 'avg_intensity', 'avg_tone']]
+
+
+class RollupCube:
+    """
+    Rollup cube maintained incrementally, one part per ingested slice.
+
+    Adding a slice aggregates only that slice, and removing one (e.g. when it
+    leaves a rolling window) just drops its part. The combined cube is
+    rebuilt from the parts when first asked for after a change, at a cost
+    proportional to the number of cube rows rather than events.
+
+    Args:
+        bucket (str): Time bucket width as a pandas frequency
+    """
+
+    def __init__(self, bucket=DEFAULT_BUCKET):
+        self.bucket = bucket
+        self._parts = collections.OrderedDict()
+        self._total = None
+        self._lock = threading.Lock()
+
+    def add(self, key, df):
+        """
+        Aggregates a batch of events and stores it under key.
+
+        Args:
+            key (hashable): Batch key, e.g. the slice ID; an existing part
+                with the same key is replaced
+            df (pandas.DataFrame): Events in ICEWS format
+        """
+        part = rollup_events(df, self.bucket)
+        with self._lock:
+            self._parts[key] = part
+            self._total = None
+
+    def remove(self, key):
+        """Drops the part stored under key, if any."""
+        with self._lock:
+            if self._parts.pop(key, None) is not None:
+                self._total = None
+
+    def total(self):
+        """
+        Returns the combined cube of every part.
+
+        Returns:
+            pandas.DataFrame: Cube with CUBE_DIMENSIONS and CUBE_MEASURES columns
+        """
+        with self._lock:
+            if self._total is None:
+                self._total = merge_cubes(list(self._parts.values()))
+            return self._total
+
+    def __len__(self):
+        with self._lock:
+            return len(self._parts)
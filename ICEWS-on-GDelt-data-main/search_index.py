@@ -0,0 +1,150 @@
+import bisect
+import collections
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columns covered by the Data Explorer free-text search
+SEARCH_COLUMNS = ['source_name', 'target_name', 'location']
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """Splits text into lower-case word tokens."""
+    return TOKEN_PATTERN.findall(str(text).lower())
+
+
+def _csr(keys, values, size):
+    """
+    Groups values by integer key into (offsets, values) arrays.
+
+    The values of key k are values[offsets[k]:offsets[k + 1]], in input order.
+    """
+    order = np.argsort(keys, kind='stable')
+    keys, values = keys[order], values[order]
+    offsets = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=offsets[1:])
+    return offsets, values
+
+
+class SearchIndex:
+    """
+    Inverted token index over actor names and locations.
+
+    Built once per data load. Each distinct cell value is tokenised once and
+    the tokens are kept in a sorted vocabulary, so a query term resolves to
+    the range of tokens it prefixes with a binary search. The matching values
+    map to row positions through posting lists, and multi-word queries are
+    answered by intersecting the posting lists of their words. Query cost
+    follows the number of matches, not the number of rows.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+        columns (list): Text columns to index
+        max_cached (int): Number of query results kept
+    """
+
+    def __init__(self, df, columns=SEARCH_COLUMNS, max_cached=64):
+        columns = [c for c in columns if c in df.columns]
+        self.size = len(df)
+
+        # Distinct values across all columns, and a (value, row) pair per cell
+        value_codes, rows = [], []
+        uniques = pd.Index([], dtype=object)
+        for column in columns:
+            codes, column_uniques = pd.factorize(df[column])
+            column_uniques = pd.Index(column_uniques.astype(str), dtype=object)
+            remap = uniques.append(column_uniques).unique()
+            lookup = remap.get_indexer(column_uniques)
+            value_codes.append(lookup[codes[codes >= 0]])
+            rows.append(np.flatnonzero(codes >= 0))
+            uniques = remap
+        value_codes = np.concatenate(value_codes) if value_codes else np.array([], dtype=np.int64)
+        rows = np.concatenate(rows) if rows else np.array([], dtype=np.int64)
+
+        # Posting lists: value -> rows (a row appears twice if two of its
+        # columns hold the same value; lookups deduplicate)
+        self._value_offsets, self._value_rows = _csr(value_codes.astype(np.int64), rows.astype(np.int64),
+                                                     len(uniques))
+
+        # Token vocabulary, sorted for prefix lookups: token -> values containing it
+        pairs = [(token, value_id) for value_id, value in enumerate(uniques) for token in set(tokenize(value))]
+        self.tokens = sorted({token for token, _ in pairs})
+        rank = {token: i for i, token in enumerate(self.tokens)}
+        self._token_offsets, self._token_values = _csr(
+            np.fromiter((rank[token] for token, _ in pairs), dtype=np.int64, count=len(pairs)),
+            np.fromiter((value_id for _, value_id in pairs), dtype=np.int64, count=len(pairs)),
+            len(self.tokens))
+
+        self._cache = collections.OrderedDict()
+        self._max_cached = max_cached
+        self._lock = threading.Lock()
+
+    def _term_rows(self, term):
+        """Row positions of values with a token starting with term."""
+        first = bisect.bisect_left(self.tokens, term)
+        last = bisect.bisect_left(self.tokens, term + '\U0010ffff', lo=first)
+        if first == last:
+            return np.array([], dtype=np.int64)
+        values = np.unique(self._token_values[self._token_offsets[first]:self._token_offsets[last]])
+        starts = self._value_offsets[values]
+        lengths = self._value_offsets[values + 1] - starts
+        # Gather every value's slice of the posting array in one indexing step
+        positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        return np.unique(self._value_rows[positions])
+
+    def search(self, query):
+        """
+        Finds the rows where every word of the query starts a word in one of the indexed columns.
+
+        Args:
+            query (str): Free-text query; case and punctuation are ignored
+
+        Returns:
+            numpy.ndarray: Sorted row positions, or None for a blank query. A
+                query without any word (e.g. only punctuation) matches no rows.
+        """
+        if not str(query).strip():
+            return None
+        terms = sorted(set(tokenize(query)))
+        if not terms:
+            return np.array([], dtype=np.int64)
+        key = tuple(terms)
+        with self._lock:
+            rows = self._cache.get(key)
+            if rows is not None:
+                self._cache.move_to_end(key)
+                return rows
+
+        rows = None
+        # Start from the rarest term so the intersections stay small
+        for term_rows in sorted((self._term_rows(term) for term in terms), key=len):
+            rows = term_rows if rows is None else np.intersect1d(rows, term_rows, assume_unique=True)
+            if not len(rows):
+                break
+
+        with self._lock:
+            self._cache[key] = rows
+            while len(self._cache) > self._max_cached:
+                self._cache.popitem(last=False)
+        return rows
+
+    def mask(self, query):
+        """
+        Returns a boolean row mask for a query.
+
+        Args:
+            query (str): Free-text query
+
+        Returns:
+            numpy.ndarray: True for matching rows, or None for a blank query
+        """
+        rows = self.search(query)
+        if rows is None:
+            return None
+        mask = np.zeros(self.size, dtype=bool)
+        mask[rows] = True
+        return mask
@@ -0,0 +1,115 @@
+import threading
+import time
+
+# GDELT publishes a new slice every 15 minutes
+SLICE_TTL_SECONDS = 15 * 60
+
+
+class _Flight:
+    """One in-progress load that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightCache:
+    """
+    Process-wide cache with a TTL and single-flight loading.
+
+    When several callers ask for the same missing key at once, only the first
+    runs the loader; the others block until it finishes and receive the same
+    object (or the same exception). Cached values are shared, not copied, so
+    callers must treat them as read-only.
+
+    Args:
+        ttl (float): Seconds a loaded value stays valid
+        max_entries (int): Number of keys kept; the oldest are dropped first
+    """
+
+    def __init__(self, ttl=SLICE_TTL_SECONDS, max_entries=4):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.loads = 0
+
+    def _purge(self, now):
+        """Drops expired entries and trims to max_entries (lock held)."""
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            oldest = min(self._entries, key=lambda k: self._entries[k][0])
+            del self._entries[oldest]
+
+    def get(self, key):
+        """
+        Returns the cached value for key, or None if missing or expired.
+
+        Args:
+            key (hashable): Cache key, e.g. a GDELT slice ID
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        return None
+
+    def get_or_load(self, key, loader):
+        """
+        Returns the value for key, running loader at most once per key at a time.
+
+        A loader result of None is handed to the callers that waited for it
+        but is not cached, so the next call tries again.
+
+        Args:
+            key (hashable): Cache key, e.g. a GDELT slice ID
+            loader (callable): Zero-argument function producing the value
+
+        Returns:
+            object: Cached or freshly loaded value
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+            with self._lock:
+                self.loads += 1
+                if flight.value is not None:
+                    self._entries[key] = (time.time() + self.ttl, flight.value)
+                    self._purge(time.time())
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def clear(self):
+        """Drops every cached value (in-flight loads are unaffected)."""
+        with self._lock:
+            self._entries.clear()
@@ -8,6 +8,10 @@ import io
 import zipfile
 from io import BytesIO
 
+from gdelt_schema import read_export, empty_export, concat_frames
+from exporter import ExportCache, EXPORT_FORMATS, export_file_name
+from downloader import LASTUPDATE_URL
+
 # Page configuration
 st.set_page_config(
     page_title="GDELT Data - Simple Version",
@@ -30,8 +34,8 @@ def fetch_gdelt_data():
         date_format = "%Y%m%d"
         time_format = "%H%M%S"
         
-        # Construct the GDELT URL for the last 15 minutes
-        gdelt_url = "http://data.gdeltproject.org/gdeltv2/lastupdate.txt"
+        # Construct the GDELT URL for the last 15 minutes (GDELT_BASE_URL overrides the host)
+        gdelt_url = LASTUPDATE_URL
         
         # Get the latest update file references
         response = requests.get(gdelt_url)
@@ -49,8 +53,8 @@ def fetch_gdelt_data():
                 if file_url.endswith('.export.CSV.zip'):
                     csv_urls.append(file_url)
         
-        # Initialize empty DataFrame to hold all data
-        all_data = pd.DataFrame()
+        # Collect per-file frames and concatenate once at the end
+        frames = []
         
         # Process each CSV file
         for url in csv_urls:
@@ -59,68 +63,24 @@ def fetch_gdelt_data():
                 file_response = requests.get(url)
                 file_response.raise_for_status()
                 
-                # Define GDELT column names
-                gdelt_columns = [
-                    'GlobalEventID', 'Day', 'MonthYear', 'Year', 'FractionDate', 
-                    'Actor1Code', 'Actor1Name', 'Actor1CountryCode', 'Actor1KnownGroupCode', 
-                    'Actor1EthnicCode', 'Actor1Religion1Code', 'Actor1Religion2Code', 
-                    'Actor1Type1Code', 'Actor1Type2Code', 'Actor1Type3Code', 
-                    'Actor2Code', 'Actor2Name', 'Actor2CountryCode', 'Actor2KnownGroupCode', 
-                    'Actor2EthnicCode', 'Actor2Religion1Code', 'Actor2Religion2Code', 
-                    'Actor2Type1Code', 'Actor2Type2Code', 'Actor2Type3Code', 
-                    'IsRootEvent', 'EventCode', 'EventBaseCode', 'EventRootCode', 
-                    'QuadClass', 'GoldsteinScale', 'NumMentions', 'NumSources', 
-                    'NumArticles', 'AvgTone', 'Actor1Geo_Type', 'Actor1Geo_FullName', 
-                    'Actor1Geo_CountryCode', 'Actor1Geo_ADM1Code', 'Actor1Geo_ADM2Code', 
-                    'Actor1Geo_Lat', 'Actor1Geo_Long', 'Actor1Geo_FeatureID', 
-                    'Actor2Geo_Type', 'Actor2Geo_FullName', 'Actor2Geo_CountryCode', 
-                    'Actor2Geo_ADM1Code', 'Actor2Geo_ADM2Code', 'Actor2Geo_Lat', 
-                    'Actor2Geo_Long', 'Actor2Geo_FeatureID', 'ActionGeo_Type', 
-                    'ActionGeo_FullName', 'ActionGeo_CountryCode', 'ActionGeo_ADM1Code', 
-                    'ActionGeo_ADM2Code', 'ActionGeo_Lat', 'ActionGeo_Long', 
-                    'ActionGeo_FeatureID', 'DATEADDED', 'SOURCEURL'
-                ]
-                
                 # Read the CSV data
                 z = zipfile.ZipFile(BytesIO(file_response.content))
                 csv_filename = z.namelist()[0]  # Get the CSV filename inside the zip
                 
                 with z.open(csv_filename) as f:
-                    df = pd.read_csv(f, sep='\t', header=None, names=gdelt_columns)
+                    df = read_export(f)
                 
                 # Filter out events older than 15 minutes
-                # DATEADDED format in GDELT is YYYYMMDDHHMMSS
-                df['datetime'] = pd.to_datetime(df['DATEADDED'], format='%Y%m%d%H%M%S')
                 df = df[df['datetime'] >= fifteen_min_ago]
                 
                 # Append to our collection
-                all_data = pd.concat([all_data, df])
+                frames.append(df)
             
             except Exception as e:
                 st.error(f"Error processing file {url}: {e}")
                 continue
         
-        # Define GDELT columns outside the condition for scope clarity
-        gdelt_columns = [
-            'GlobalEventID', 'Day', 'MonthYear', 'Year', 'FractionDate', 
-            'Actor1Code', 'Actor1Name', 'Actor1CountryCode', 'Actor1KnownGroupCode', 
-            'Actor1EthnicCode', 'Actor1Religion1Code', 'Actor1Religion2Code', 
-            'Actor1Type1Code', 'Actor1Type2Code', 'Actor1Type3Code', 
-            'Actor2Code', 'Actor2Name', 'Actor2CountryCode', 'Actor2KnownGroupCode', 
-            'Actor2EthnicCode', 'Actor2Religion1Code', 'Actor2Religion2Code', 
-            'Actor2Type1Code', 'Actor2Type2Code', 'Actor2Type3Code', 
-            'IsRootEvent', 'EventCode', 'EventBaseCode', 'EventRootCode', 
-            'QuadClass', 'GoldsteinScale', 'NumMentions', 'NumSources', 
-            'NumArticles', 'AvgTone', 'Actor1Geo_Type', 'Actor1Geo_FullName', 
-            'Actor1Geo_CountryCode', 'Actor1Geo_ADM1Code', 'Actor1Geo_ADM2Code', 
-            'Actor1Geo_Lat', 'Actor1Geo_Long', 'Actor1Geo_FeatureID', 
-            'Actor2Geo_Type', 'Actor2Geo_FullName', 'Actor2Geo_CountryCode', 
-            'Actor2Geo_ADM1Code', 'Actor2Geo_ADM2Code', 'Actor2Geo_Lat', 
-            'Actor2Geo_Long', 'Actor2Geo_FeatureID', 'ActionGeo_Type', 
-            'ActionGeo_FullName', 'ActionGeo_CountryCode', 'ActionGeo_ADM1Code', 
-            'ActionGeo_ADM2Code', 'ActionGeo_Lat', 'ActionGeo_Long', 
-            'ActionGeo_FeatureID', 'DATEADDED', 'SOURCEURL'
-        ]
+        all_data = concat_frames(frames)
         
         # If we found any data
         if not all_data.empty:
@@ -133,7 +93,7 @@ def fetch_gdelt_data():
             return all_data
         else:
             # Create a sample empty dataframe with the right columns if no data
-            return pd.DataFrame(columns=gdelt_columns)
+            return empty_export()
     
     except Exception as e:
         st.error(f"Error fetching GDELT data: {e}")
@@ -234,13 +194,18 @@ if 'data' in st.session_state and st.session_state.data is not None and not st.s
     # Display the data
     st.dataframe(st.session_state.data[display_cols].head(50))
     
-    # Option to download the data
-    csv = st.session_state.data.to_csv(index=False)
+    # Option to download the data; the file is only written when the button is
+    # clicked, and reused until the data is fetched again
+    if 'exports' not in st.session_state:
+        st.session_state.exports = ExportCache(max_exports=2)
+    exports, data, data_key = st.session_state.exports, st.session_state.data, st.session_state.last_update
+    export_format = st.selectbox("Download format", ['csv', 'parquet'],
+                                 format_func=lambda fmt: EXPORT_FORMATS[fmt][0])
     st.download_button(
-        label="Download data as CSV",
-        data=csv,
-        file_name=f"gdelt_events_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv",
+        label=f"Download data as {EXPORT_FORMATS[export_format][0]}",
+        data=lambda: exports.export(data, data_key, export_format),
+        file_name=export_file_name(export_format),
+        mime=EXPORT_FORMATS[export_format][2],
     )
 else:
     st.info("Click the '🔄 Fetch GDELT Data' button above to load the latest GDELT events.")
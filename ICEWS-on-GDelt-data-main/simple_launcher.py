@@ -18,7 +18,7 @@ def main():
                       stderr=subprocess.PIPE)
     except (subprocess.CalledProcessError, FileNotFoundError):
         print("Streamlit not found. Please install it with:")
-        print("pip install streamlit pandas numpy plotly requests")
+        print("pip install streamlit pandas numpy plotly requests pyarrow")
         return
     
     # Start streamlit
@@ -0,0 +1,296 @@
+import hashlib
+import io
+import os
+import threading
+import zipfile
+
+import pandas as pd
+
+from downloader import slice_id
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'GDELT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'gdelt-icews'))
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+# Eviction frees space down to this share of max_bytes, so a full cache is
+# not rescanned on every write
+EVICT_TARGET = 0.9
+
+RAW_DIR = 'raw'
+FRAME_DIR = 'frames'
+# Key suffix of slices addressed by name, without a listed MD5
+UNLISTED_KEY = 'unlisted'
+
+
+def md5_hex(data):
+    """Returns the hex MD5 digest of a bytes object."""
+    return hashlib.md5(data).hexdigest()
+
+
+def zip_intact(data):
+    """Returns True if a bytes object is a complete zip whose members pass their CRC check."""
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            return archive.testzip() is None
+    except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError, EOFError):
+        return False
+
+
+class SliceCache:
+    """
+    Content-addressed on-disk cache of GDELT slice zips and parsed frames.
+
+    Entries are keyed by the slice file name (which carries the slice
+    timestamp) and the MD5 published in lastupdate.txt / masterfilelist.txt,
+    and are re-hashed on every read so a corrupt or stale file is never
+    served. Slices addressed by name only (e.g. the older slices of a
+    rolling window, which lastupdate.txt does not list) have no MD5; they
+    are keyed by name alone and checked against the zip's own CRCs instead;
+    published slices never change, so the name identifies the content. The
+    total size is capped; the least recently used entries are evicted first.
+    The size is tracked as a running total, taken from one
+    scan of the directory and then updated by each write, so the directory is
+    only walked again once the total passes the cap. Writes go through a
+    temporary file and a rename, so several processes (e.g. backfill workers)
+    can share one directory; each counts its own writes and picks up the
+    others' at its next scan.
+
+    Args:
+        directory (str): Cache root directory
+        max_bytes (int): Size cap for raw zips and frames together
+        cache_frames (bool): Also cache parsed frames, not only raw zips
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, cache_frames=True):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.cache_frames = cache_frames
+        self._lock = threading.Lock()
+        self._total = None  # bytes cached, as of the last scan plus later writes
+        os.makedirs(os.path.join(directory, RAW_DIR), exist_ok=True)
+        os.makedirs(os.path.join(directory, FRAME_DIR), exist_ok=True)
+
+    # Keys and paths
+
+    @staticmethod
+    def _key(entry):
+        name = entry.url.rsplit('/', 1)[-1]
+        if slice_id(name) is None:
+            raise ValueError(f"Not a GDELT slice file: {entry.url}")
+        return f"{name}.{entry.md5 or UNLISTED_KEY}"
+
+    def _raw_path(self, entry):
+        return os.path.join(self.directory, RAW_DIR, self._key(entry))
+
+    def _frame_path(self, entry, columns):
+        variant = md5_hex(','.join(columns or ['*']).encode('utf-8'))[:12]
+        return os.path.join(self.directory, FRAME_DIR, f"{self._key(entry)}.{variant}.pkl")
+
+    @staticmethod
+    def _touch(path):
+        """Marks an entry as recently used."""
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+    def _write(self, path, write):
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            write(tmp_path)
+            added = os.path.getsize(tmp_path)
+            try:
+                added -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        with self._lock:
+            if self._total is None:
+                self._total = sum(size for _, size, _ in self._entries())
+            else:
+                self._total += added
+            over = self._total > self.max_bytes
+        if over:
+            self.evict()
+
+    # Raw slice zips
+
+    def get(self, entry):
+        """
+        Returns the cached zip for a slice if it still checks out.
+
+        Args:
+            entry (SliceFile): Listing entry with the expected MD5, if known
+
+        Returns:
+            bytes: Raw zip content, or None on a miss
+        """
+        path = self._raw_path(entry)
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+
+        if not self._verify(entry, content):
+            self._discard(path)
+            return None
+        self._touch(path)
+        return content
+
+    def put(self, entry, content):
+        """
+        Stores a downloaded zip after checking it against the listed MD5, or
+        against its own CRCs when no MD5 is known.
+
+        Args:
+            entry (SliceFile): Listing entry with the expected MD5, if known
+            content (bytes): Raw zip content
+
+        Returns:
+            bool: True if stored, False if the content did not check out
+        """
+        if not self._verify(entry, content):
+            return False
+
+        def write(tmp_path):
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+
+        self._write(self._raw_path(entry), write)
+        return True
+
+    @staticmethod
+    def _verify(entry, content):
+        if entry.md5:
+            return md5_hex(content) == entry.md5
+        return zip_intact(content)
+
+    # Parsed frames
+
+    def get_frame(self, entry, columns=None):
+        """
+        Returns a cached parsed frame for a slice and column projection.
+
+        Args:
+            entry (SliceFile): Listing entry
+            columns (list): Column projection the frame was parsed with
+
+        Returns:
+            pandas.DataFrame: Cached frame, or None on a miss
+        """
+        if not self.cache_frames:
+            return None
+        path = self._frame_path(entry, columns)
+        try:
+            df = pd.read_pickle(path)
+        except (OSError, EOFError, ValueError):
+            return None
+        except Exception:
+            # Unreadable pickle (e.g. written by an incompatible pandas version)
+            self._discard(path)
+            return None
+        self._touch(path)
+        return df
+
+    def put_frame(self, entry, df, columns=None):
+        """
+        Stores a parsed frame for a slice and column projection.
+
+        Args:
+            entry (SliceFile): Listing entry
+            df (pandas.DataFrame): Parsed frame (before any time filtering)
+            columns (list): Column projection the frame was parsed with
+        """
+        if not self.cache_frames:
+            return
+        self._write(self._frame_path(entry, columns), df.to_pickle)
+
+    # Size management
+
+    def _discard(self, path):
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._total is not None:
+                self._total = max(0, self._total - size)
+
+    @staticmethod
+    def _remove(path):
+        """Removes a file without touching the running total."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        """Lists (last use time, size, path) for every cached file."""
+        entries = []
+        for subdir in (RAW_DIR, FRAME_DIR):
+            root = os.path.join(self.directory, subdir)
+            try:
+                scanner = os.scandir(root)
+            except OSError:
+                continue
+            with scanner:
+                for item in scanner:
+                    if item.name.endswith('.tmp'):
+                        continue
+                    try:
+                        stat = item.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, item.path))
+        return entries
+
+    def size(self):
+        """Returns the number of bytes currently cached."""
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Removes least recently used entries until the cache is back under
+        EVICT_TARGET of max_bytes (if it was over max_bytes).
+
+        Returns:
+            int: Number of bytes freed
+        """
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            target = self.max_bytes * EVICT_TARGET if total > self.max_bytes else total
+            freed = 0
+            for _, size, path in sorted(entries):
+                if total - freed <= target:
+                    break
+                self._remove(path)
+                freed += size
+            self._total = total - freed
+            return freed
+
+    def clear(self):
+        """Removes every cached entry."""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+            self._total = 0
+
+    def stats(self):
+        """
+        Summarises the cache contents.
+
+        Returns:
+            dict: Entry count, bytes used and the size cap
+        """
+        entries = self._entries()
+        return {
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+        }
@@ -0,0 +1,169 @@
+import collections
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Grid cell sizes in degrees, finest first
+GRID_RESOLUTIONS = (0.25, 1.0, 2.5, 5.0)
+
+# Above this many points the map shows grid cells instead of single events
+DEFAULT_POINT_THRESHOLD = 5000
+
+# Coarsest acceptable map: the finest grid with at most this many cells is used
+DEFAULT_MAX_CELLS = 3000
+
+# Most events offered at once by the map's event picker
+DEFAULT_MAX_OPTIONS = 1000
+
+
+def grid_cells(latitude, longitude, size):
+    """
+    Assigns coordinates to square grid cells.
+
+    Args:
+        latitude (numpy.ndarray): Latitudes in degrees
+        longitude (numpy.ndarray): Longitudes in degrees
+        size (float): Cell size in degrees
+
+    Returns:
+        numpy.ndarray: int64 cell number per point
+    """
+    columns = int(np.ceil(360 / size)) + 1
+    rows = np.floor((np.clip(latitude, -90, 90) + 90) / size).astype(np.int64)
+    cols = np.floor((np.clip(longitude, -180, 180) + 180) / size).astype(np.int64)
+    return rows * columns + cols
+
+
+class SpatialIndex:
+    """
+    Multi-resolution grid aggregation of event coordinates for the map.
+
+    Cell numbers for every resolution are computed once when the data is
+    loaded. Aggregating a subset of events is then a few bincounts over cell
+    numbers, and the result (point count, dominant event type and mean
+    intensity per cell) is cached per subset and resolution, so the map
+    payload is bounded by the number of cells rather than the number of
+    events.
+
+    Args:
+        df (pandas.DataFrame): Events in ICEWS format
+        resolutions (tuple): Grid cell sizes in degrees
+        max_cached (int): Number of aggregations kept
+    """
+
+    def __init__(self, df, resolutions=GRID_RESOLUTIONS, max_cached=16):
+        located = df['latitude'].notna() & df['longitude'].notna()
+        self.positions = np.flatnonzero(located.to_numpy())
+        # Only the columns the aggregation reads are gathered
+        points = df[['latitude', 'longitude', 'intensity', 'event_type', 'event_root_type']].take(self.positions)
+        self.latitude = points['latitude'].to_numpy(dtype='float64')
+        self.longitude = points['longitude'].to_numpy(dtype='float64')
+        self.intensity = points['intensity'].to_numpy(dtype='float64', na_value=np.nan)
+        self.resolutions = tuple(sorted(resolutions))
+        self.cells = {size: grid_cells(self.latitude, self.longitude, size) for size in self.resolutions}
+
+        # Event types as integer codes; the root type follows from the type
+        self.type_codes, self.type_names = pd.factorize(points['event_type'].astype(str))
+        roots = pd.Series(points['event_root_type'].astype(str).to_numpy()).groupby(self.type_codes).first()
+        self.root_names = roots.reindex(range(len(self.type_names))).to_numpy()
+
+        self._cache = collections.OrderedDict()
+        self._max_cached = max_cached
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.positions)
+
+    def choose_resolution(self, mask=None, max_cells=DEFAULT_MAX_CELLS):
+        """
+        Returns the finest resolution that keeps the map within max_cells.
+
+        Args:
+            mask (numpy.ndarray): Boolean selection over the located points
+            max_cells (int): Largest acceptable number of cells
+
+        Returns:
+            float: Cell size in degrees
+        """
+        for size in self.resolutions:
+            cells = self.cells[size] if mask is None else self.cells[size][mask]
+            if len(cells) <= max_cells or np.count_nonzero(np.bincount(cells)) <= max_cells:
+                return size
+        return self.resolutions[-1]
+
+    def aggregate(self, size, mask=None, mask_key=None):
+        """
+        Aggregates the (selected) located events into grid cells.
+
+        Args:
+            size (float): Cell size in degrees, one of the index resolutions
+            mask (numpy.ndarray): Boolean selection over the located points
+            mask_key (hashable): Identifies mask for caching; None disables
+                the cache when a mask is given
+
+        Returns:
+            pandas.DataFrame: One row per cell with its cell number,
+                latitude/longitude (mean of its events), count, event_type and
+                event_root_type (most frequent) and mean intensity
+        """
+        key = (size, mask_key)
+        cacheable = mask is None or mask_key is not None
+        if cacheable:
+            with self._lock:
+                cells = self._cache.get(key)
+                if cells is not None:
+                    self._cache.move_to_end(key)
+                    return cells
+
+        cell, codes = self.cells[size], self.type_codes
+        latitude, longitude, intensity = self.latitude, self.longitude, self.intensity
+        if mask is not None:
+            cell, codes = cell[mask], codes[mask]
+            latitude, longitude, intensity = latitude[mask], longitude[mask], intensity[mask]
+
+        # Every statistic is a weighted bincount over dense cell numbers
+        dense, cell_ids = pd.factorize(cell)
+        count = np.bincount(dense)
+        rated = ~np.isnan(intensity)
+        rated_count = np.bincount(dense, weights=rated, minlength=len(count))
+        intensity_sum = np.bincount(dense, weights=np.where(rated, intensity, 0), minlength=len(count))
+
+        # Most frequent event type per cell from a (cell x type) count table
+        n_types = max(len(self.type_names), 1)
+        pairs = np.bincount(dense * n_types + codes, minlength=len(count) * n_types)
+        dominant = pairs.reshape(len(count), n_types).argmax(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cells = pd.DataFrame({
+                'cell': np.asarray(cell_ids, dtype=np.int64),
+                'latitude': np.bincount(dense, weights=latitude) / count,
+                'longitude': np.bincount(dense, weights=longitude) / count,
+                'count': count,
+                'intensity': intensity_sum / rated_count,
+                'event_type': self.type_names.to_numpy()[dominant] if len(count) else [],
+                'event_root_type': self.root_names[dominant] if len(count) else [],
+            })
+        cells = cells.sort_values('count', ascending=False, ignore_index=True)
+
+        if cacheable:
+            with self._lock:
+                self._cache[key] = cells
+                while len(self._cache) > self._max_cached:
+                    self._cache.popitem(last=False)
+        return cells
+
+    def cell_mask(self, size, cell, mask=None):
+        """
+        Selects the located events in one grid cell.
+
+        Args:
+            size (float): Cell size in degrees, one of the index resolutions
+            cell (int): Cell number, from the 'cell' column of aggregate()
+            mask (numpy.ndarray): Boolean selection over the located points
+
+        Returns:
+            numpy.ndarray: Boolean mask over the located points
+        """
+        selected = self.cells[size] == cell
+        return selected if mask is None else selected & mask
@@ -0,0 +1,169 @@
+import io
+import struct
+import zlib
+
+import metrics
+
+# Zip local file header layout (see PKWARE APPNOTE 4.3.7)
+LOCAL_HEADER_SIGNATURE = 0x04034b50
+LOCAL_HEADER_FORMAT = '<IHHHHHIIIHH'
+LOCAL_HEADER_SIZE = struct.calcsize(LOCAL_HEADER_FORMAT)
+
+METHOD_STORED = 0
+METHOD_DEFLATED = 8
+FLAG_DATA_DESCRIPTOR = 0x08
+
+# Default read sizes
+NETWORK_CHUNK_SIZE = 64 * 1024
+DEFAULT_CHUNK_BYTES = 16 * 1024 * 1024
+
+
+class ZipMemberStream(io.RawIOBase):
+    """
+    Decompresses the first member of a zip archive while its bytes arrive.
+
+    zipfile.ZipFile needs a seekable file because it reads the central
+    directory at the end of the archive. GDELT slice zips hold exactly one
+    deflated member, so the local file header at the start of the archive is
+    enough to decode it front to back without buffering the whole download.
+
+    Args:
+        chunks (iterable): Iterable of bytes objects, e.g.
+            response.iter_content() or iter(lambda: f.read(n), b'')
+    """
+
+    def __init__(self, chunks):
+        super().__init__()
+        self._chunks = iter(chunks)
+        self._pending = b''
+        self._output = b''
+        self._offset = 0
+        self._eof = False
+        self._crc = 0
+        self._read_header()
+
+    def _next_chunk(self):
+        for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b''
+
+    def _take(self, nbytes):
+        """Reads exactly nbytes of raw archive data."""
+        while len(self._pending) < nbytes:
+            chunk = self._next_chunk()
+            if not chunk:
+                raise EOFError("Zip stream ended inside the local file header")
+            self._pending += chunk
+        data, self._pending = self._pending[:nbytes], self._pending[nbytes:]
+        return data
+
+    def _read_header(self):
+        (signature, _version, flags, method, _time, _date, crc, compressed_size,
+         _size, name_length, extra_length) = struct.unpack(
+            LOCAL_HEADER_FORMAT, self._take(LOCAL_HEADER_SIZE))
+        if signature != LOCAL_HEADER_SIGNATURE:
+            raise ValueError("Not a zip archive (bad local file header signature)")
+
+        self.name = self._take(name_length).decode('utf-8', errors='replace')
+        self._take(extra_length)
+
+        has_descriptor = bool(flags & FLAG_DATA_DESCRIPTOR)
+        self._expected_crc = None if has_descriptor else crc
+
+        if method == METHOD_DEFLATED:
+            self._decompressor = zlib.decompressobj(-zlib.MAX_WBITS)
+            self._remaining = None
+        elif method == METHOD_STORED and not has_descriptor:
+            self._decompressor = None
+            self._remaining = compressed_size
+        else:
+            raise ValueError(f"Unsupported zip member encoding (method {method}, flags {flags:#x})")
+
+    def _fill(self):
+        """Decodes raw data until some output is available or the member ends."""
+        while not self._output and not self._eof:
+            if self._decompressor is None and self._remaining == 0:
+                self._finish()
+                break
+
+            raw = self._pending or self._next_chunk()
+            self._pending = b''
+            if not raw:
+                raise EOFError("Zip stream ended before the end of the member")
+
+            if self._decompressor is None:
+                raw, self._pending = raw[:self._remaining], raw[self._remaining:]
+                self._remaining -= len(raw)
+                self._output = raw
+            else:
+                self._output = self._decompressor.decompress(raw)
+
+            self._crc = zlib.crc32(self._output, self._crc)
+            if self._decompressor is not None and self._decompressor.eof:
+                self._finish()
+
+    def _finish(self):
+        self._eof = True
+        if self._expected_crc is not None and self._crc != self._expected_crc:
+            raise zlib.error("CRC mismatch in streamed zip member")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if self._offset >= len(self._output):
+            self._output = b''
+            self._offset = 0
+            self._fill()
+            if not self._output:
+                return 0
+        n = min(len(buffer), len(self._output) - self._offset)
+        buffer[:n] = self._output[self._offset:self._offset + n]
+        self._offset += n
+        return n
+
+
+def open_zip_member(chunks, buffer_size=NETWORK_CHUNK_SIZE):
+    """
+    Opens the first member of a streamed zip archive as a buffered reader.
+
+    Args:
+        chunks (iterable): Iterable of raw archive bytes
+        buffer_size (int): Read buffer size
+
+    Returns:
+        io.BufferedReader: Binary reader over the decompressed member
+    """
+    return io.BufferedReader(ZipMemberStream(chunks), buffer_size=buffer_size)
+
+
+def iter_line_batches(reader, chunk_bytes=DEFAULT_CHUNK_BYTES, keep=None, stage=None):
+    """
+    Reads complete lines from a binary reader in bounded batches.
+
+    Args:
+        reader (io.BufferedReader): Binary line-oriented reader
+        chunk_bytes (int): Approximate number of bytes per batch
+        keep (callable): Optional predicate on each raw line; lines for which
+            it returns False are discarded before they are yielded
+        stage (str): Metrics stage the filtering of each batch is recorded
+            as; the discarded lines are counted as rows_dropped with the
+            stage name as reason
+
+    Yields:
+        bytes: Concatenated lines of one batch (never empty)
+    """
+    while True:
+        lines = reader.readlines(chunk_bytes)
+        if not lines:
+            return
+        if keep is not None:
+            rows_in = len(lines)
+            timer = metrics.stage(stage, rows_in=rows_in) if stage else None
+            lines = [line for line in lines if keep(line)]
+            if timer is not None:
+                timer.stop(rows_out=len(lines))
+                metrics.count('rows_dropped', rows_in - len(lines), reason=stage)
+        if lines:
+            yield b''.join(lines)
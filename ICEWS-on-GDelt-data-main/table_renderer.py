@@ -0,0 +1,174 @@
+import collections
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Columns of the Data Explorer event table, in display order; the mention
+# aggregates are only present for slices ingested with ingestor.py --enrich
+TABLE_COLUMNS = ['date', 'event_type', 'source_name', 'target_name', 'country', 'location',
+                 'intensity', 'tone', 'mention_count', 'mention_sources', 'source_url']
+DEFAULT_PAGE_SIZE = 50
+PAGE_SIZES = (25, 50, 100, 250)
+DEFAULT_MAX_PAGES = 64
+
+CELL_STYLE = "text-align:left;padding:8px;border-bottom:1px solid #ddd;"
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def _escape(values):
+    """HTML-escapes a string Series without a Python-level loop."""
+    return (values.str.replace('&', '&amp;', regex=False)
+                  .str.replace('<', '&lt;', regex=False)
+                  .str.replace('>', '&gt;', regex=False)
+                  .str.replace('"', '&quot;', regex=False))
+
+
+def _format_column(series):
+    """Formats one column of a page as escaped cell text."""
+    if pd.api.types.is_datetime64_any_dtype(series):
+        text = series.dt.strftime(DATE_FORMAT)
+    elif pd.api.types.is_float_dtype(series):
+        text = series.round(2).astype('string')
+    else:
+        text = series.astype('string')
+    return _escape(text.fillna(''))
+
+
+def _format_links(urls):
+    """Formats source URLs as links, or 'No URL' where missing."""
+    urls = urls.astype('string')
+    missing = urls.isna() | (urls == '')
+    links = '<a href="' + _escape(urls.fillna('')) + '" target="_blank">Source Link</a>'
+    return links.where(~missing, 'No URL')
+
+
+def column_label(column):
+    """Returns the table header for a column."""
+    return 'Source URL' if column == 'source_url' else column.replace('_', ' ').title()
+
+
+def sort_positions(df, sort_by=None, ascending=True):
+    """
+    Returns the row order of a frame for a sort column.
+
+    Args:
+        df (pandas.DataFrame): Rows to order
+        sort_by (str): Column to sort on; None keeps the frame order
+        ascending (bool): Sort direction
+
+    Returns:
+        numpy.ndarray: Row positions, missing values last
+    """
+    if sort_by is None or sort_by not in df.columns:
+        return np.arange(len(df))
+    order = df[sort_by].reset_index(drop=True).sort_values(ascending=ascending, kind='stable',
+                                                          na_position='last')
+    return order.index.to_numpy()
+
+
+def render_rows(page):
+    """
+    Renders the rows of one page as an HTML table.
+
+    Every column is formatted as a whole and the cells are joined with
+    vectorised string concatenation, so the cost is a handful of column
+    operations instead of one Python call per cell.
+
+    Args:
+        page (pandas.DataFrame): Rows to render, with TABLE_COLUMNS present
+
+    Returns:
+        str: HTML table
+    """
+    columns = [c for c in TABLE_COLUMNS if c in page.columns]
+    header = ''.join(f"<th style='{CELL_STYLE}'>{column_label(c)}</th>" for c in columns)
+
+    cells = None
+    for column in columns:
+        text = _format_links(page[column]) if column == 'source_url' else _format_column(page[column])
+        cell = f"<td style='{CELL_STYLE}'>" + text + "</td>"
+        cells = cell if cells is None else cells + cell
+
+    body = '' if cells is None else '<tr>' + cells.str.cat(sep='</tr><tr>') + '</tr>'
+    return f"<table style='width:100%'><tr>{header}</tr>{body}</table>"
+
+
+class TableRenderer:
+    """
+    Paginated, sortable HTML renderer for the Data Explorer event table.
+
+    Only the rows of the requested page are formatted. Sort orders and
+    rendered pages are cached per filter state, so paging back and forth or
+    rerunning the app without changing the filters costs a dictionary lookup.
+    The caller supplies the filter key; it must change whenever the rows
+    passed in change.
+
+    Args:
+        max_pages (int): Number of rendered pages kept
+    """
+
+    def __init__(self, max_pages=DEFAULT_MAX_PAGES):
+        self.max_pages = max_pages
+        self._pages = collections.OrderedDict()
+        self._orders = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def page_count(self, df, page_size=DEFAULT_PAGE_SIZE):
+        """Returns the number of pages needed for df (at least 1)."""
+        return max(1, math.ceil(len(df) / page_size))
+
+    def _order(self, df, filter_key, sort_by, ascending):
+        key = (filter_key, sort_by, ascending)
+        with self._lock:
+            order = self._orders.get(key)
+            if order is not None:
+                self._orders.move_to_end(key)
+                return order
+        order = sort_positions(df, sort_by, ascending)
+        with self._lock:
+            self._orders[key] = order
+            while len(self._orders) > 8:
+                self._orders.popitem(last=False)
+        return order
+
+    def render(self, df, filter_key, page=1, page_size=DEFAULT_PAGE_SIZE, sort_by=None, ascending=True):
+        """
+        Returns the HTML of one page of df.
+
+        Args:
+            df (pandas.DataFrame): Filtered events in ICEWS format, or an
+                event_frame.EventView of them
+            filter_key (hashable): Identifies the filter state that produced df
+            page (int): 1-based page number; clamped to the valid range
+            page_size (int): Rows per page
+            sort_by (str): Column to sort on; None keeps the frame order
+            ascending (bool): Sort direction
+
+        Returns:
+            str: HTML table of the page
+        """
+        page = min(max(1, int(page)), self.page_count(df, page_size))
+        key = (filter_key, sort_by, ascending, page, page_size)
+        with self._lock:
+            html = self._pages.get(key)
+            if html is not None:
+                self._pages.move_to_end(key)
+                return html
+
+        order = self._order(df, filter_key, sort_by, ascending)
+        start = (page - 1) * page_size
+        html = render_rows(df.take(order[start:start + page_size]))
+
+        with self._lock:
+            self._pages[key] = html
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return html
+
+    def clear(self):
+        """Drops every cached page and sort order."""
+        with self._lock:
+            self._pages.clear()
+            self._orders.clear()
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from event_frame import EventFrame
+
+
+def make_events():
+    return pd.DataFrame({
+        'event_id': pd.array([1, 2, 3], dtype='Int64'),
+        'latitude': np.array([1.0, 2.0, 3.0], dtype=np.float32),
+        'event_type': pd.Categorical(['Protest', 'Assault', 'Protest']),
+        'source_name': ['A', 'B', 'C'],
+    })
+
+
+def test_writing_through_a_view_raises():
+    frame = EventFrame(make_events())
+    for view in (frame.view(), frame.view(np.array([0, 2]))):
+        with pytest.raises(ValueError):
+            view.frame.df.iloc[0, view.frame.df.columns.get_loc('latitude')] = 9.0
+    with pytest.raises(ValueError):
+        frame.view().column('latitude').to_numpy()[0] = 9.0
+    with pytest.raises(ValueError):
+        frame.view().column('event_id').array._data[0] = 9
+    with pytest.raises(ValueError):
+        frame.view().column('event_type').array._codes[0] = 1
+    assert frame.df['latitude'].tolist() == [1.0, 2.0, 3.0]
+    assert frame.df['event_id'].tolist() == [1, 2, 3]
+    assert frame.df['event_type'].tolist() == ['Protest', 'Assault', 'Protest']
+
+
+def test_copies_of_view_columns_stay_writable():
+    frame = EventFrame(make_events())
+    column = frame.view().column('latitude')
+    column.iloc[0] = 9.0
+    rows = frame.view(np.array([1])).select(['latitude'])
+    rows.iloc[0, 0] = 8.0
+    assert column.tolist() == [9.0, 2.0, 3.0]
+    assert rows['latitude'].tolist() == [8.0]
+    assert frame.df['latitude'].tolist() == [1.0, 2.0, 3.0]